@@ -3,7 +3,7 @@ Admin configuration for the appointments app.
 """
 
 from django.contrib import admin
-from .models import Service, Appointment, Recurrence, Block
+from .models import Service, Appointment, Recurrence, RecurrenceException, Block
 
 
 @admin.register(Service)
@@ -30,6 +30,13 @@ class RecurrenceAdmin(admin.ModelAdmin):
     search_fields = ['actor__username']
 
 
+@admin.register(RecurrenceException)
+class RecurrenceExceptionAdmin(admin.ModelAdmin):
+    list_display = ['recurrence', 'occurrence_date', 'is_cancelled', 'start_time', 'end_time']
+    list_filter = ['is_cancelled', 'occurrence_date']
+    search_fields = ['recurrence__actor__username']
+
+
 @admin.register(Block)
 class BlockAdmin(admin.ModelAdmin):
     list_display = ['title', 'actor', 'block_type', 'start_time', 'end_time', 'is_active']
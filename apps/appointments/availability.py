@@ -0,0 +1,333 @@
+"""
+Availability engine for the appointments app.
+
+Working windows are combined with the busy time from occupancy.py (appointments,
+blocks and recurrences) using sorted interval arithmetic.
+"""
+
+import math
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from .occupancy import aget_busy_entries, combine_aware, get_busy_entries
+
+
+DEFAULT_WORKING_HOURS = ('08:00', '18:00')
+DEFAULT_SLOT_STEP_MINUTES = 30
+DEFAULT_SEARCH_RESOLUTION_MINUTES = 5
+
+
+def merge_intervals(intervals):
+    """Sorts intervals and coalesces the ones that overlap or touch."""
+    merged = []
+    for start, end in sorted(intervals):
+        if start >= end:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def subtract_intervals(windows, busy):
+    """
+    Removes busy intervals from windows.
+
+    Both lists must be sorted and non-overlapping (see merge_intervals), so a
+    single forward sweep over both is enough.
+    """
+    free = []
+    index = 0
+    for window_start, window_end in windows:
+        cursor = window_start
+        while index < len(busy) and busy[index][1] <= cursor:
+            index += 1
+        position = index
+        while position < len(busy) and busy[position][0] < window_end:
+            busy_start, busy_end = busy[position]
+            if busy_start > cursor:
+                free.append((cursor, busy_start))
+            cursor = max(cursor, busy_end)
+            if cursor >= window_end:
+                break
+            position += 1
+        if cursor < window_end:
+            free.append((cursor, window_end))
+    return free
+
+
+def split_into_slots(free, duration, step):
+    """Returns (start, end) slots of the given duration aligned to step."""
+    slots = []
+    for free_start, free_end in free:
+        slot_start = free_start
+        while slot_start + duration <= free_end:
+            slots.append((slot_start, slot_start + duration))
+            slot_start += step
+    return slots
+
+
+def _parse_clock(value):
+    """Parses an 'HH:MM' setting into a time."""
+    if isinstance(value, time):
+        return value
+    return datetime.strptime(value, '%H:%M').time()
+
+
+def get_working_windows(start_date, end_date):
+    """Returns the working windows for every day in the range."""
+    opening, closing = getattr(settings, 'APPOINTMENT_WORKING_HOURS', DEFAULT_WORKING_HOURS)
+    opening = _parse_clock(opening)
+    closing = _parse_clock(closing)
+
+    windows = []
+    current_date = start_date
+    while current_date <= end_date:
+        windows.append((combine_aware(current_date, opening), combine_aware(current_date, closing)))
+        current_date += timedelta(days=1)
+    return windows
+
+
+def get_busy_intervals(actor_ids, start, end):
+    """
+    Returns {actor_id: merged busy intervals} between start and end.
+
+    Busy time comes from the per-day occupancy cache, which loads misses with
+    one query per table for every actor at once.
+    """
+    return _merge_busy(get_busy_entries(actor_ids, start, end))
+
+
+async def aget_busy_intervals(actor_ids, start, end):
+    """Async version of get_busy_intervals."""
+    return _merge_busy(await aget_busy_entries(actor_ids, start, end))
+
+
+def _merge_busy(busy):
+    return {
+        actor_id: merge_intervals((busy_start, busy_end) for busy_start, busy_end, _, _ in entries)
+        for actor_id, entries in busy.items()
+    }
+
+
+def get_available_slots(actor_id, start_date, end_date, duration_minutes, step_minutes=None):
+    """
+    Returns the bookable (start, end) slots for an actor between two dates.
+
+    Slots are sized to duration_minutes, start every step_minutes inside each
+    free interval and never start in the past.
+    """
+    now = timezone.now()
+    windows = _open_windows(start_date, end_date, now)
+    if not windows:
+        return []
+
+    busy = get_busy_intervals([actor_id], windows[0][0], windows[-1][1])[actor_id]
+    return _bookable_slots(windows, busy, now, duration_minutes, step_minutes)
+
+
+async def aget_available_slots(actor_id, start_date, end_date, duration_minutes, step_minutes=None):
+    """Async version of get_available_slots."""
+    now = timezone.now()
+    windows = _open_windows(start_date, end_date, now)
+    if not windows:
+        return []
+
+    busy = (await aget_busy_intervals([actor_id], windows[0][0], windows[-1][1]))[actor_id]
+    return _bookable_slots(windows, busy, now, duration_minutes, step_minutes)
+
+
+def _open_windows(start_date, end_date, now):
+    """Returns the working windows that have not ended yet."""
+    return [window for window in get_working_windows(start_date, end_date) if window[1] > now]
+
+
+def _bookable_slots(windows, busy, now, duration_minutes, step_minutes):
+    if step_minutes is None:
+        step_minutes = getattr(settings, 'APPOINTMENT_SLOT_STEP_MINUTES', DEFAULT_SLOT_STEP_MINUTES)
+
+    free = subtract_intervals(windows, busy)
+    slots = split_into_slots(free, timedelta(minutes=duration_minutes), timedelta(minutes=step_minutes))
+    return [slot for slot in slots if slot[0] >= now]
+
+
+def _to_bins(intervals, origin, resolution):
+    """Converts datetime intervals to an (n x 2) array of [start, end) bins, rounding outwards."""
+    seconds = np.fromiter(
+        (moment.timestamp() for interval in intervals for moment in interval),
+        dtype=np.float64,
+        count=2 * len(intervals)
+    ).reshape(-1, 2) - origin.timestamp()
+    bins = np.empty((len(intervals), 2), dtype=np.int64)
+    bins[:, 0] = np.floor(seconds[:, 0] / resolution)
+    bins[:, 1] = np.ceil(seconds[:, 1] / resolution)
+    return bins
+
+
+def _interval_mask(rows, bins, shape, offset=0):
+    """
+    Builds an (actors x bins) boolean mask that is True inside the intervals.
+
+    rows holds the row of each interval and bins its [start, end) bins; bins
+    are shifted by offset and clipped to the mask.
+    """
+    actors, size = shape
+    starts = np.clip(bins[:, 0] - offset, 0, size)
+    ends = np.clip(bins[:, 1] - offset, 0, size)
+    valid = starts < ends
+    if not valid.any():
+        return np.zeros(shape, dtype=bool)
+
+    offsets = rows[valid] * (size + 1)
+    length = actors * (size + 1)
+    delta = (
+        np.bincount(offsets + starts[valid], minlength=length)
+        - np.bincount(offsets + ends[valid], minlength=length)
+    ).astype(np.int32).reshape(actors, size + 1)
+    return np.cumsum(delta[:, :-1], axis=1, dtype=np.int32) > 0
+
+
+class OccupancyBitmap:
+    """
+    Free-time bitmaps for several actors over a date range.
+
+    Busy intervals are loaded in bulk for every actor and rasterized into
+    (actors x bins) boolean arrays a few days at a time, so a search can stop
+    as soon as it has enough slots without touching the rest of the range.
+    """
+
+    def __init__(self, actor_ids, start_date, end_date, resolution_minutes=None):
+        if resolution_minutes is None:
+            resolution_minutes = getattr(
+                settings, 'APPOINTMENT_SEARCH_RESOLUTION_MINUTES', DEFAULT_SEARCH_RESOLUTION_MINUTES
+            )
+        self.actor_ids = list(actor_ids)
+        self.start_date = start_date
+        self.end_date = end_date
+        self.resolution_minutes = resolution_minutes
+        self.resolution = resolution_minutes * 60
+        self.origin = combine_aware(start_date, time(0, 0)).astimezone(dt_timezone.utc)
+        end = combine_aware(end_date + timedelta(days=1), time(0, 0))
+        self.size = math.ceil((end - self.origin).total_seconds() / self.resolution)
+
+        self.working = _to_bins(get_working_windows(start_date, end_date), self.origin, self.resolution)
+
+        # Nothing can be booked in the past
+        self.first_bookable_bin = math.ceil((timezone.now() - self.origin).total_seconds() / self.resolution)
+
+    def day_bin(self, day):
+        """Returns the first bin of a local day."""
+        return math.floor((combine_aware(day, time(0, 0)) - self.origin).total_seconds() / self.resolution)
+
+    def bin_time(self, index):
+        """Returns the datetime at which a bin starts."""
+        return self.origin + timedelta(seconds=index * self.resolution)
+
+    def free(self, first_bin, last_bin):
+        """Returns the free-time bitmap for bins in [first_bin, last_bin)."""
+        size = last_bin - first_bin
+        working = _interval_mask(
+            np.zeros(len(self.working), dtype=np.int64), self.working, (1, size), first_bin
+        )
+
+        rows = []
+        intervals = []
+        busy = get_busy_intervals(self.actor_ids, self.bin_time(first_bin), self.bin_time(last_bin))
+        for row, actor_id in enumerate(self.actor_ids):
+            rows.extend([row] * len(busy[actor_id]))
+            intervals.extend(busy[actor_id])
+        occupied = _interval_mask(
+            np.asarray(rows, dtype=np.int64),
+            _to_bins(intervals, self.origin, self.resolution),
+            (len(self.actor_ids), size),
+            first_bin
+        )
+        free = working & ~occupied
+        if self.first_bookable_bin > first_bin:
+            free[:, :min(self.first_bookable_bin - first_bin, size)] = False
+        return free
+
+    def chunks(self, days):
+        """
+        Yields (first_bin, free) bitmaps covering the range, `days` days at a time.
+
+        Working windows never cross midnight, so no slot spans two chunks.
+        """
+        current_date = self.start_date
+        while current_date <= self.end_date:
+            next_date = min(current_date + timedelta(days=days), self.end_date + timedelta(days=1))
+            first_bin = max(self.day_bin(current_date), 0)
+            last_bin = self.size if next_date > self.end_date else self.day_bin(next_date)
+            yield first_bin, self.free(first_bin, last_bin)
+            current_date = next_date
+
+
+def find_slot_starts(free, duration_bins, step_bins):
+    """
+    Returns a boolean array marking bins where a slot can start.
+
+    A slot needs duration_bins consecutive free bins and must start a whole
+    number of steps after the beginning of its free run, matching the slots
+    produced by split_into_slots.
+    """
+    actors, size = free.shape
+    starts = np.zeros((actors, size), dtype=bool)
+    if duration_bins > size:
+        return starts
+
+    counts = np.zeros((actors, size + 1), dtype=np.int32)
+    np.cumsum(free, axis=1, out=counts[:, 1:])
+    fits = (counts[:, duration_bins:] - counts[:, :-duration_bins]) == duration_bins
+
+    positions = np.arange(size, dtype=np.int32)
+    previous = np.zeros_like(free)
+    previous[:, 1:] = free[:, :-1]
+    run_starts = np.where(free & ~previous, positions, 0)
+    np.maximum.accumulate(run_starts, axis=1, out=run_starts)
+    aligned = ((positions - run_starts) % step_bins) == 0
+
+    starts[:, :size - duration_bins + 1] = fits & aligned[:, :size - duration_bins + 1]
+    return starts
+
+
+def search_available_slots(actor_durations, start_date, end_date, limit, step_minutes=None, chunk_days=7):
+    """
+    Returns the first `limit` free slots across several actors.
+
+    actor_durations maps actor ids to the slot duration in minutes. Slots are
+    returned as (start, end, actor_id) ordered by start time and actor.
+    """
+    if step_minutes is None:
+        step_minutes = getattr(settings, 'APPOINTMENT_SLOT_STEP_MINUTES', DEFAULT_SLOT_STEP_MINUTES)
+
+    actor_ids = list(actor_durations)
+    if not actor_ids:
+        return []
+
+    bitmap = OccupancyBitmap(actor_ids, start_date, end_date)
+    step_bins = max(step_minutes // bitmap.resolution_minutes, 1)
+
+    # Actors sharing a duration are scanned together
+    durations = np.asarray([actor_durations[actor_id] for actor_id in actor_ids])
+    groups = [
+        (np.nonzero(durations == duration)[0], math.ceil(duration / bitmap.resolution_minutes))
+        for duration in np.unique(durations)
+    ]
+
+    slots = []
+    for first_bin, free in bitmap.chunks(chunk_days):
+        starts = np.zeros_like(free)
+        for rows, duration_bins in groups:
+            starts[rows] = find_slot_starts(free[rows], duration_bins, step_bins)
+
+        bins, rows = np.nonzero(starts.T)
+        for start_bin, row in zip(bins[:limit - len(slots)].tolist(), rows[:limit - len(slots)].tolist()):
+            slot_start = bitmap.bin_time(first_bin + start_bin)
+            slot_end = slot_start + timedelta(minutes=int(durations[row]))
+            slots.append((slot_start, slot_end, actor_ids[row]))
+        if len(slots) >= limit:
+            break
+    return slots
@@ -0,0 +1,271 @@
+"""
+Bulk appointment creation and status changes for the appointments app.
+
+A batch is validated as a set: referenced users and services are loaded with
+one query per table, conflicts with existing appointments, blocks and
+recurrence occurrences come from a single occupancy lookup for every actor,
+and conflicts inside the batch are found with a sorted sweep. Accepted
+appointments are inserted with bulk_create.
+
+Status changes of many appointments, such as cancelling the day of an actor
+who called in sick, are written with a single UPDATE.
+"""
+
+from django.core.exceptions import ValidationError
+from django.db import transaction, IntegrityError
+from django.utils import timezone
+from rest_framework.settings import api_settings
+from apps.authentication.models import User
+from .catalog import SCOPE_ACTOR, get_catalogs
+from .models import (
+    Service, Appointment, Block, APPOINTMENT_OVERLAP_CONSTRAINT, APPOINTMENT_CONFLICT_MESSAGE,
+    has_overlap_constraint,
+)
+from .occupancy import ACTIVE_STATUSES, KIND_APPOINTMENT, KIND_BLOCK, get_busy_entries
+from .serializers import AppointmentBulkItemSerializer, RECURRENCE_CONFLICT_MESSAGE, SERVICE_UNAVAILABLE_MESSAGE
+from .signals import appointments_bulk_created, appointments_bulk_updated
+
+
+MAX_BULK_APPOINTMENTS = 500
+BULK_CREATE_BATCH_SIZE = 100
+
+# Statuses that can be set on many appointments at once
+BULK_STATUSES = ('confirmed', 'cancelled')
+
+
+def _error(message):
+    return {api_settings.NON_FIELD_ERRORS_KEY: [message]}
+
+
+def _merge_busy(entries):
+    """
+    Coalesces sorted busy entries into [start, end, entries] groups.
+
+    Groups are disjoint and sorted, so a forward sweep can skip the ones that
+    end before an appointment starts.
+    """
+    groups = []
+    for entry in entries:
+        busy_start, busy_end = entry[0], entry[1]
+        if groups and busy_start < groups[-1][1]:
+            groups[-1][1] = max(groups[-1][1], busy_end)
+            groups[-1][2].append(entry)
+        else:
+            groups.append([busy_start, busy_end, [entry]])
+    return groups
+
+
+def find_batch_conflicts(items):
+    """
+    Returns {index: message} for the batch items that cannot be booked.
+
+    items holds (index, actor_id, start, end) tuples. Each item is checked
+    against the busy time of its actor and against the items accepted before
+    it; items are processed in start order.
+    """
+    if not items:
+        return {}
+
+    actor_ids = sorted({actor_id for _, actor_id, _, _ in items})
+    busy = get_busy_entries(
+        actor_ids,
+        min(start for _, _, start, _ in items),
+        max(end for _, _, _, end in items)
+    )
+
+    conflicts = {}
+    blocked = {}
+    by_actor = {actor_id: [] for actor_id in actor_ids}
+    for item in sorted(items, key=lambda item: (item[2], item[0])):
+        by_actor[item[1]].append(item)
+
+    for actor_id, actor_items in by_actor.items():
+        groups = _merge_busy(busy[actor_id])
+        position = 0
+        last_accepted = None
+        for index, _, start, end in actor_items:
+            while position < len(groups) and groups[position][1] <= start:
+                position += 1
+
+            overlapping = []
+            cursor = position
+            while cursor < len(groups) and groups[cursor][0] < end:
+                overlapping.extend(
+                    entry for entry in groups[cursor][2] if entry[0] < end and entry[1] > start
+                )
+                cursor += 1
+
+            if any(kind == KIND_APPOINTMENT for _, _, kind, _ in overlapping):
+                conflicts[index] = APPOINTMENT_CONFLICT_MESSAGE
+            elif any(kind == KIND_BLOCK for _, _, kind, _ in overlapping):
+                blocked[index] = min(entry for entry in overlapping if entry[2] == KIND_BLOCK)[3]
+            elif overlapping:
+                conflicts[index] = RECURRENCE_CONFLICT_MESSAGE
+            elif last_accepted is not None and start < last_accepted[1]:
+                conflicts[index] = f"Overlaps with item {last_accepted[0]} of this request."
+            else:
+                last_accepted = (index, end)
+
+    if blocked:
+        titles = dict(Block.objects.filter(id__in=set(blocked.values())).values_list('id', 'title'))
+        for index, block_id in blocked.items():
+            conflicts[index] = f"This time is blocked: {titles.get(block_id, '')}"
+
+    return conflicts
+
+
+def create_appointments(user, rows):
+    """
+    Creates the valid appointments of a batch.
+
+    Returns (created, errors), where created lists the new appointments in
+    request order and errors maps the index of every rejected row to its
+    validation errors. Raises ValidationError when the database rejects the
+    batch because of an appointment booked concurrently.
+    """
+    errors = {}
+    candidates = []
+    for index, row in enumerate(rows):
+        serializer = AppointmentBulkItemSerializer(data=row)
+        if serializer.is_valid():
+            candidates.append((index, serializer.validated_data))
+        else:
+            errors[index] = serializer.errors
+
+    users = User.objects.in_bulk(
+        {attrs['client'] for _, attrs in candidates} | {attrs['actor'] for _, attrs in candidates}
+    )
+    services = Service.objects.select_related('company').in_bulk(
+        {attrs['service'] for _, attrs in candidates}
+    )
+    # Bookable services come from the actors' catalogs
+    bookable = {
+        (actor_id, entry['id'])
+        for actor_id, entries in get_catalogs(SCOPE_ACTOR, [attrs['actor'] for _, attrs in candidates if attrs['actor'] in users]).items()
+        for entry in entries
+    }
+
+    resolved = []
+    for index, attrs in candidates:
+        client = users.get(attrs['client'])
+        actor = users.get(attrs['actor'])
+        service = services.get(attrs['service'])
+        if client is None or actor is None or service is None:
+            errors[index] = _error("Client, actor or service not found.")
+        elif not actor.is_actor:
+            errors[index] = _error("The selected user is not an actor.")
+        elif service.actor_id != actor.id:
+            errors[index] = _error("The service does not belong to the selected actor.")
+        elif (actor.id, service.id) not in bookable:
+            errors[index] = _error(SERVICE_UNAVAILABLE_MESSAGE)
+        elif not user.can_create_appointments(service.company):
+            errors[index] = _error("Permission denied.")
+        else:
+            resolved.append((index, attrs, client, actor, service))
+
+    conflicts = find_batch_conflicts([
+        (index, actor.id, attrs['start_time'], attrs['end_time'])
+        for index, attrs, _, actor, _ in resolved
+    ])
+    for index, message in conflicts.items():
+        errors[index] = _error(message)
+
+    appointments = [
+        Appointment(
+            client=client,
+            actor=actor,
+            service=service,
+            start_time=attrs['start_time'],
+            end_time=attrs['end_time'],
+            notes=attrs.get('notes'),
+            final_price=attrs.get('final_price') or service.base_price,
+            status='pending'
+        )
+        for index, attrs, client, actor, service in resolved
+        if index not in conflicts
+    ]
+
+    try:
+        with transaction.atomic():
+            created = Appointment.objects.bulk_create(appointments, batch_size=BULK_CREATE_BATCH_SIZE)
+    except IntegrityError as exc:
+        if APPOINTMENT_OVERLAP_CONSTRAINT not in str(exc):
+            raise
+        raise ValidationError(APPOINTMENT_CONFLICT_MESSAGE) from exc
+
+    if created:
+        appointments_bulk_created.send(sender=Appointment, instances=created)
+
+    return created, errors
+
+
+def find_overlapping_appointments(appointments):
+    """
+    Returns the ids of appointments that would overlap another active appointment of their actor.
+
+    Each appointment is checked against the active appointments of its actor
+    from a single occupancy lookup, and against the appointments accepted
+    before it with a sorted sweep.
+    """
+    if not appointments:
+        return []
+
+    actor_ids = sorted({appointment.actor_id for appointment in appointments})
+    busy = get_busy_entries(
+        actor_ids,
+        min(appointment.start_time for appointment in appointments),
+        max(appointment.end_time for appointment in appointments)
+    )
+
+    overlapping = []
+    last_end = {}
+    for appointment in sorted(appointments, key=lambda appointment: (appointment.start_time, appointment.id)):
+        actor_id = appointment.actor_id
+        if any(
+            kind == KIND_APPOINTMENT and object_id != appointment.id
+            and busy_start < appointment.end_time and busy_end > appointment.start_time
+            for busy_start, busy_end, kind, object_id in busy[actor_id]
+        ) or (actor_id in last_end and appointment.start_time < last_end[actor_id]):
+            overlapping.append(appointment.id)
+        else:
+            last_end[actor_id] = appointment.end_time
+    return overlapping
+
+
+def update_appointment_statuses(appointments, new_status):
+    """
+    Moves appointments to new_status with a single UPDATE.
+
+    Appointments already in new_status are left alone. Returns the updated
+    appointments; since update() bypasses post_save, appointments_bulk_updated
+    is sent for them. Raises ValidationError when confirming an appointment
+    would overlap another active one: on PostgreSQL the exclusion constraint
+    rejects the UPDATE, elsewhere appointments coming back from an inactive
+    status are checked first.
+    """
+    updated = [appointment for appointment in appointments if appointment.status != new_status]
+    if not updated:
+        return []
+
+    if new_status in ACTIVE_STATUSES and not has_overlap_constraint():
+        reactivated = [appointment for appointment in updated if appointment.status not in ACTIVE_STATUSES]
+        if find_overlapping_appointments(reactivated):
+            raise ValidationError(APPOINTMENT_CONFLICT_MESSAGE)
+
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            Appointment.objects.filter(id__in=[appointment.id for appointment in updated]).update(
+                status=new_status, updated_at=now
+            )
+    except IntegrityError as exc:
+        if APPOINTMENT_OVERLAP_CONSTRAINT not in str(exc):
+            raise
+        raise ValidationError(APPOINTMENT_CONFLICT_MESSAGE) from exc
+    for appointment in updated:
+        appointment.status = new_status
+        appointment.updated_at = now
+
+    appointments_bulk_updated.send(sender=Appointment, instances=updated)
+
+    return updated
@@ -0,0 +1,148 @@
+"""
+Columnar calendar feed for the month and week views.
+
+The feed lists appointments, blocks and recurrence occurrences for many
+actors as parallel arrays. Rows hold integers only: epoch seconds,
+durations in seconds, and indexes into small lookup tables for actors,
+clients, services and status codes. Each name is therefore sent once,
+instead of once per row as the AppointmentSerializer output does.
+"""
+
+from datetime import timedelta
+from .models import Appointment, Block
+from .occupancy import ACTIVE_STATUSES, day_start
+from .occurrences import iter_occurrences, load_exceptions
+
+
+STATUS_CODES = tuple(value for value, _ in Appointment.STATUS_CHOICES)
+BLOCK_TYPE_CODES = tuple(value for value, _ in Block.TYPE_CHOICES)
+
+
+class LookupTable:
+    """Gives each distinct id a small index into parallel id/name arrays."""
+
+    def __init__(self):
+        self.indexes = {}
+        self.ids = []
+        self.names = []
+
+    def index(self, object_id, name):
+        index = self.indexes.get(object_id)
+        if index is None:
+            index = self.indexes[object_id] = len(self.ids)
+            self.ids.append(object_id)
+            self.names.append(name)
+        return index
+
+    def as_columns(self):
+        return {'id': self.ids, 'name': self.names}
+
+
+def _full_name(first_name, last_name):
+    return f'{first_name} {last_name}'.strip()
+
+
+def _epoch(moment):
+    return int(moment.timestamp())
+
+
+def _duration(start, end):
+    return int((end - start).total_seconds())
+
+
+def build_calendar_feed(appointments, blocks, recurrences, start_date, end_date):
+    """
+    Builds the columnar feed for [start_date, end_date].
+
+    The querysets must already be scoped to what the user may see; the
+    date window is applied here. Blocks and occurrences overlapping the
+    window are included, like appointments starting in it. Occurrences
+    materialized as an active appointment are listed once, as the
+    appointment.
+    """
+    window_start = day_start(start_date)
+    window_end = day_start(end_date + timedelta(days=1))
+
+    actors = LookupTable()
+    clients = LookupTable()
+    services = LookupTable()
+    status_codes = {value: code for code, value in enumerate(STATUS_CODES)}
+    block_type_codes = {value: code for code, value in enumerate(BLOCK_TYPE_CODES)}
+
+    appointment_columns = {
+        'id': [], 'actor': [], 'client': [], 'service': [],
+        'start': [], 'duration': [], 'status': [],
+    }
+    rows = appointments.filter(
+        start_time__lt=window_end,
+        end_time__gt=window_start
+    ).order_by('start_time', 'id').values_list(
+        'id', 'start_time', 'end_time', 'status',
+        'actor_id', 'actor__first_name', 'actor__last_name',
+        'client_id', 'client__first_name', 'client__last_name',
+        'service_id', 'service__name', 'recurrence_id', 'occurrence_date',
+    )
+    materialized = set()
+    for (appointment_id, start, end, status, actor_id, actor_first, actor_last,
+         client_id, client_first, client_last, service_id, service_name,
+         recurrence_id, occurrence_date) in rows:
+        if recurrence_id and status in ACTIVE_STATUSES:
+            materialized.add((recurrence_id, occurrence_date))
+        appointment_columns['id'].append(appointment_id)
+        appointment_columns['actor'].append(actors.index(actor_id, _full_name(actor_first, actor_last)))
+        appointment_columns['client'].append(clients.index(client_id, _full_name(client_first, client_last)))
+        appointment_columns['service'].append(services.index(service_id, service_name))
+        appointment_columns['start'].append(_epoch(start))
+        appointment_columns['duration'].append(_duration(start, end))
+        appointment_columns['status'].append(status_codes[status])
+
+    block_columns = {'id': [], 'actor': [], 'start': [], 'duration': [], 'type': []}
+    rows = blocks.filter(
+        is_active=True,
+        start_time__lt=window_end,
+        end_time__gt=window_start
+    ).order_by('start_time', 'id').values_list(
+        'id', 'start_time', 'end_time', 'block_type',
+        'actor_id', 'actor__first_name', 'actor__last_name',
+    )
+    for block_id, start, end, block_type, actor_id, actor_first, actor_last in rows:
+        block_columns['id'].append(block_id)
+        block_columns['actor'].append(actors.index(actor_id, _full_name(actor_first, actor_last)))
+        block_columns['start'].append(_epoch(start))
+        block_columns['duration'].append(_duration(start, end))
+        block_columns['type'].append(block_type_codes[block_type])
+
+    occurrence_columns = {'recurrence': [], 'actor': [], 'start': [], 'duration': [], 'exception': []}
+    recurrences = list(
+        recurrences.filter(is_active=True, start_date__lte=end_date)
+        .exclude(end_date__lt=start_date)
+        .select_related('actor')
+    )
+    if recurrences:
+        exceptions = load_exceptions([recurrence.id for recurrence in recurrences], start_date, end_date)
+        occurrences = sorted(
+            iter_occurrences(recurrences, start_date, end_date, exceptions),
+            key=lambda occurrence: (occurrence.start, occurrence.recurrence.id)
+        )
+        for occurrence in occurrences:
+            if (occurrence.recurrence.id, occurrence.date) in materialized:
+                continue
+            actor = occurrence.recurrence.actor
+            occurrence_columns['recurrence'].append(occurrence.recurrence.id)
+            occurrence_columns['actor'].append(actors.index(actor.id, actor.get_full_name()))
+            occurrence_columns['start'].append(_epoch(occurrence.start))
+            occurrence_columns['duration'].append(_duration(occurrence.start, occurrence.end))
+            occurrence_columns['exception'].append(int(occurrence.is_exception))
+
+    return {
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'statuses': STATUS_CODES,
+        'block_types': BLOCK_TYPE_CODES,
+        'actors': actors.as_columns(),
+        'clients': clients.as_columns(),
+        'services': services.as_columns(),
+        'appointments': appointment_columns,
+        'blocks': block_columns,
+        'occurrences': occurrence_columns,
+    }
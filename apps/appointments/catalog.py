@@ -0,0 +1,233 @@
+"""
+Cached service catalog for the appointments app.
+
+Booking screens, the availability engine and booking validation read the
+active services of a company or actor on every request, while services
+change rarely. The catalog caches those services, with their durations and
+prices, per company and per actor under a versioned key. Signals in
+signals.py move a company or actor to a new version whenever one of its
+services, the actor or the company changes.
+
+The readers come in sync and async (a-prefixed) flavours.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import get_language
+from .fastpath import format_datetime, format_decimal
+from .models import Service
+from .occupancy import to_micros
+
+
+SCOPE_COMPANY = 'company'
+SCOPE_ACTOR = 'actor'
+
+SCOPE_FIELDS = {
+    SCOPE_COMPANY: 'company_id',
+    SCOPE_ACTOR: 'actor_id',
+}
+
+CACHE_PREFIX = 'appointments:catalog'
+DEFAULT_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _version_key(scope, object_id):
+    return f'{CACHE_PREFIX}:version:{scope}:{object_id}'
+
+
+def _catalog_key(scope, object_id, version):
+    # Names and descriptions are translated, so each language is cached apart
+    return f'{CACHE_PREFIX}:{scope}:{object_id}:{version}:{get_language()}'
+
+
+def _cache_timeout():
+    return getattr(settings, 'APPOINTMENT_CATALOG_CACHE_TIMEOUT', DEFAULT_CACHE_TIMEOUT)
+
+
+def _new_version():
+    # A timestamp avoids reusing the keys of an evicted version
+    return to_micros(timezone.now())
+
+
+def _get_versions(scope, object_ids):
+    """Returns the cache version of each company or actor, creating missing ones."""
+    keys = {_version_key(scope, object_id): object_id for object_id in object_ids}
+    found = cache.get_many(list(keys))
+    versions = {}
+    for key, object_id in keys.items():
+        if key not in found:
+            cache.add(key, _new_version(), None)
+            found[key] = cache.get(key)
+        versions[object_id] = found[key]
+    return versions
+
+
+async def _aget_versions(scope, object_ids):
+    """Async version of _get_versions."""
+    keys = {_version_key(scope, object_id): object_id for object_id in object_ids}
+    found = await cache.aget_many(list(keys))
+    versions = {}
+    for key, object_id in keys.items():
+        if key not in found:
+            await cache.aadd(key, _new_version(), None)
+            found[key] = await cache.aget(key)
+        versions[object_id] = found[key]
+    return versions
+
+
+def _catalog_queryset(scope, object_ids):
+    """Returns the active services of the given companies or actors in one query."""
+    return Service.objects.filter(
+        is_active=True,
+        **{f'{SCOPE_FIELDS[scope]}__in': object_ids}
+    ).select_related('actor', 'company').order_by('name', 'id')
+
+
+def _entry(service):
+    """Keeps what the catalog readers need from a service."""
+    return {
+        'id': service.id,
+        'name': service.name,
+        'description': service.description,
+        'duration_minutes': service.duration_minutes,
+        'base_price': service.base_price,
+        'company': service.company_id,
+        'actor': service.actor_id,
+        'is_active': service.is_active,
+        'created_at': service.created_at,
+        'updated_at': service.updated_at,
+        'actor_name': service.actor.get_full_name(),
+        'company_name': service.company.name,
+        'actor_is_active': service.actor.is_active,
+    }
+
+
+def _group(scope, object_ids, services):
+    """Builds {object_id: [entry]} from the loaded services."""
+    catalogs = {object_id: [] for object_id in object_ids}
+    field = SCOPE_FIELDS[scope]
+    for service in services:
+        catalogs[getattr(service, field)].append(_entry(service))
+    return catalogs
+
+
+def _read_cached(keys, found):
+    """Splits {key: object_id} into cached catalogs and missing ids."""
+    catalogs = {}
+    missing = []
+    for key, object_id in keys.items():
+        if key in found:
+            catalogs[object_id] = found[key]
+        else:
+            missing.append(object_id)
+    return catalogs, missing
+
+
+def _cache_values(scope, loaded, versions):
+    return {
+        _catalog_key(scope, object_id, versions[object_id]): entries
+        for object_id, entries in loaded.items()
+    }
+
+
+def get_catalogs(scope, object_ids):
+    """
+    Returns {object_id: [entry]} with the active services of several companies or actors.
+
+    Entries are dicts ordered by name. Cached catalogs are read with a single
+    get_many; missing ones are loaded with one query and written back.
+    """
+    object_ids = list(dict.fromkeys(object_ids))
+    if not object_ids:
+        return {}
+
+    versions = _get_versions(scope, object_ids)
+    keys = {_catalog_key(scope, object_id, versions[object_id]): object_id for object_id in object_ids}
+    catalogs, missing = _read_cached(keys, cache.get_many(list(keys)))
+
+    if missing:
+        loaded = _group(scope, missing, _catalog_queryset(scope, missing))
+        cache.set_many(_cache_values(scope, loaded, versions), _cache_timeout())
+        catalogs.update(loaded)
+
+    return catalogs
+
+
+async def aget_catalogs(scope, object_ids):
+    """Async version of get_catalogs."""
+    object_ids = list(dict.fromkeys(object_ids))
+    if not object_ids:
+        return {}
+
+    versions = await _aget_versions(scope, object_ids)
+    keys = {_catalog_key(scope, object_id, versions[object_id]): object_id for object_id in object_ids}
+    catalogs, missing = _read_cached(keys, await cache.aget_many(list(keys)))
+
+    if missing:
+        services = [service async for service in _catalog_queryset(scope, missing)]
+        loaded = _group(scope, missing, services)
+        await cache.aset_many(_cache_values(scope, loaded, versions), _cache_timeout())
+        catalogs.update(loaded)
+
+    return catalogs
+
+
+def get_company_services(company_id):
+    """Returns the catalog entries of a company."""
+    return get_catalogs(SCOPE_COMPANY, [company_id])[company_id]
+
+
+def get_actor_services(actor_id):
+    """Returns the catalog entries of an actor."""
+    return get_catalogs(SCOPE_ACTOR, [actor_id])[actor_id]
+
+
+def _find(entries, service_id):
+    return next((entry for entry in entries if entry['id'] == service_id), None)
+
+
+def get_actor_service(actor_id, service_id):
+    """Returns the entry of an active service of the actor, or None."""
+    return _find(get_actor_services(actor_id), service_id)
+
+
+async def aget_actor_service(actor_id, service_id):
+    """Async version of get_actor_service."""
+    return _find((await aget_catalogs(SCOPE_ACTOR, [actor_id]))[actor_id], service_id)
+
+
+def service_row(entry):
+    """Builds the ServiceSerializer representation of a catalog entry."""
+    return {
+        'id': entry['id'],
+        'name': entry['name'],
+        'description': entry['description'],
+        'duration_minutes': entry['duration_minutes'],
+        'base_price': format_decimal(entry['base_price']),
+        'company': entry['company'],
+        'actor': entry['actor'],
+        'is_active': entry['is_active'],
+        'created_at': format_datetime(entry['created_at']),
+        'updated_at': format_datetime(entry['updated_at']),
+        'actor_name': entry['actor_name'],
+        'company_name': entry['company_name'],
+    }
+
+
+def invalidate_catalog(scope, object_id):
+    """
+    Drops the cached catalog of a company or actor by moving to a new version.
+
+    The version moves right away and again once the surrounding transaction
+    commits, so a concurrent reader cannot keep stale data.
+    """
+    if not object_id:
+        return
+
+    def bump():
+        cache.set(_version_key(scope, object_id), _new_version(), None)
+
+    bump()
+    transaction.on_commit(bump)
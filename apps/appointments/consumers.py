@@ -2,9 +2,11 @@
 WebSocket consumers for the appointments app.
 """
 
+import asyncio
 import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
 from apps.authentication.models import User
 
@@ -80,12 +82,24 @@ class AppointmentConsumer(AsyncWebsocketConsumer):
         }))
 
 
-class NotificacaoConsumer(AsyncWebsocketConsumer):
-    """Consumer for real-time notifications."""
+# Pushes arriving within this window are sent to the client as one frame
+DEFAULT_NOTIFICATION_PUSH_WINDOW_MS = 250
+
+
+class NotificationConsumer(AsyncWebsocketConsumer):
+    """
+    Consumer for real-time notifications.
+
+    New and updated notifications are published to the user's group after
+    each commit. Bursts are coalesced: pushes received within the push window
+    go out as a single `notifications` frame.
+    """
     
     async def connect(self):
         self.user_id = self.scope['url_route']['kwargs']['user_id']
         self.room_group_name = f'notifications_{self.user_id}'
+        self.pending = {}
+        self.flush_task = None
         
         # Check if user is authenticated
         if self.scope['user'] == AnonymousUser():
@@ -107,6 +121,9 @@ class NotificacaoConsumer(AsyncWebsocketConsumer):
         await self.accept()
     
     async def disconnect(self, close_code):
+        if getattr(self, 'flush_task', None):
+            self.flush_task.cancel()
+        
         # Remove from group
         await self.channel_layer.group_discard(
             self.room_group_name,
@@ -152,16 +169,24 @@ class NotificacaoConsumer(AsyncWebsocketConsumer):
         except Notification.DoesNotExist:
             return False
     
-    async def new_notification(self, event):
-        """Sends new notification to client."""
-        await self.send(text_data=json.dumps({
-            'type': 'new_notification',
-            'data': event['data']
-        }))
+    async def notifications_push(self, event):
+        """Queues published notifications for the next coalesced frame."""
+        for notification in event['notifications']:
+            previous = self.pending.get(notification['id'])
+            # A notification created and then updated in one window is still new
+            kind = previous[0] if previous else event['event']
+            self.pending[notification['id']] = (kind, notification)
+        
+        if self.flush_task is None:
+            self.flush_task = asyncio.ensure_future(self.flush_pending())
     
-    async def notification_updated(self, event):
-        """Sends updated notification."""
-        await self.send(text_data=json.dumps({
-            'type': 'notification_updated',
-            'data': event['data']
-        }))
+    async def flush_pending(self):
+        """Sends the queued notifications as one frame after the push window."""
+        window = getattr(settings, 'NOTIFICATION_PUSH_WINDOW_MS', DEFAULT_NOTIFICATION_PUSH_WINDOW_MS)
+        await asyncio.sleep(window / 1000)
+        
+        pending, self.pending, self.flush_task = self.pending, {}, None
+        frame = {'type': 'notifications', 'created': [], 'updated': []}
+        for kind, notification in pending.values():
+            frame[kind].append(notification)
+        await self.send(text_data=json.dumps(frame))
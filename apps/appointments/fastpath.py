@@ -0,0 +1,95 @@
+"""
+Fast read path for high-volume list endpoints.
+
+List views that mix in ValuesListMixin answer `?fast=true` by reading only
+the columns they render with .values() and building plain dicts, without
+instantiating models or running DRF field machinery. Rows have the same keys
+and formats as the regular serializer output.
+"""
+
+from django.utils import timezone
+from rest_framework.response import Response
+
+
+FAST_LIST_PARAM = 'fast'
+
+
+def format_datetime(value):
+    """Formats a datetime like DRF's DateTimeField."""
+    if not value:
+        return None
+    formatted = timezone.localtime(value).isoformat()
+    if formatted.endswith('+00:00'):
+        formatted = formatted[:-6] + 'Z'
+    return formatted
+
+
+def format_decimal(value, decimal_places=2):
+    """Formats a decimal like DRF's DecimalField with string coercion."""
+    if value is None:
+        return None
+    return f'{value:.{decimal_places}f}'
+
+
+def full_name(first_name, last_name):
+    """Mirrors User.get_full_name()."""
+    return f'{first_name} {last_name}'.strip()
+
+
+def appointment_values(prefix=''):
+    """Returns the .values() lookups read by appointment_row."""
+    return tuple(prefix + lookup for lookup in (
+        'id', 'client', 'actor', 'service', 'start_time', 'end_time', 'status',
+        'notes', 'final_price', 'created_at', 'updated_at',
+        'client__first_name', 'client__last_name',
+        'actor__first_name', 'actor__last_name',
+        'service__name',
+    ))
+
+
+def appointment_row(values, prefix=''):
+    """Builds the AppointmentSerializer representation from .values() output."""
+    return {
+        'id': values[prefix + 'id'],
+        'client': values[prefix + 'client'],
+        'actor': values[prefix + 'actor'],
+        'service': values[prefix + 'service'],
+        'start_time': format_datetime(values[prefix + 'start_time']),
+        'end_time': format_datetime(values[prefix + 'end_time']),
+        'status': values[prefix + 'status'],
+        'notes': values[prefix + 'notes'],
+        'final_price': format_decimal(values[prefix + 'final_price']),
+        'created_at': format_datetime(values[prefix + 'created_at']),
+        'updated_at': format_datetime(values[prefix + 'updated_at']),
+        'client_name': full_name(values[prefix + 'client__first_name'], values[prefix + 'client__last_name']),
+        'actor_name': full_name(values[prefix + 'actor__first_name'], values[prefix + 'actor__last_name']),
+        'service_name': values[prefix + 'service__name'],
+    }
+
+
+class ValuesListMixin:
+    """
+    Adds the opt-in `?fast=true` path to a viewset's list action.
+
+    Views set fast_values to the lookups they need and implement
+    fast_row(values) to build each output dict.
+    """
+
+    fast_values = ()
+
+    def fast_row(self, values):
+        raise NotImplementedError
+
+    def use_fast_list(self):
+        return self.request.query_params.get(FAST_LIST_PARAM, '').lower() in ('1', 'true')
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_list():
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset()).values(*self.fast_values)
+        page = self.paginate_queryset(queryset)
+        rows = [self.fast_row(values) for values in (queryset if page is None else page)]
+        if page is not None:
+            return self.get_paginated_response(rows)
+        return Response(rows)
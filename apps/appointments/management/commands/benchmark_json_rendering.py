@@ -0,0 +1,66 @@
+"""
+Management command to compare DRF's JSONRenderer with the orjson renderer.
+"""
+
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from apps.appointments.serializers import AppointmentSerializer
+from apps.notifications.models import Notification
+from apps.notifications.serializers import NotificationSerializer
+from secretariaVirtual.renderers import ORJSONRenderer
+from .benchmark_list_serialization import Command as ListBenchmarkCommand, Rollback
+
+
+class Command(ListBenchmarkCommand):
+    """Command to benchmark JSON rendering of large list payloads."""
+    
+    help = 'Compare JSONRenderer with ORJSONRenderer on appointment and notification payloads'
+    
+    def handle(self, *args, **options):
+        """Execute the command."""
+        rows = options['rows']
+        repeat = options['repeat']
+        
+        # Rows are created inside a transaction that is always rolled back
+        results = []
+        try:
+            with transaction.atomic():
+                appointments = self._create_rows(rows)
+                Notification.objects.bulk_create([
+                    Notification(
+                        user=appointment.client,
+                        title='Appointment confirmed',
+                        message='Your appointment was confirmed.',
+                        type='appointment_confirmed',
+                        appointment=appointment
+                    )
+                    for appointment in appointments.select_related('client')
+                ])
+                payloads = (
+                    ('appointments', AppointmentSerializer(
+                        appointments.select_related('client', 'actor', 'service'), many=True
+                    ).data),
+                    ('notifications', NotificationSerializer(
+                        Notification.objects.filter(appointment__in=appointments).select_related(
+                            'user', 'appointment__client', 'appointment__actor', 'appointment__service'
+                        ),
+                        many=True
+                    ).data),
+                )
+                for name, data in payloads:
+                    results.append((
+                        name,
+                        len(ORJSONRenderer().render(data)),
+                        self._best_of(repeat, lambda: JSONRenderer().render(data)),
+                        self._best_of(repeat, lambda: ORJSONRenderer().render(data)),
+                    ))
+                raise Rollback
+        except Rollback:
+            pass
+        
+        self.stdout.write(f'Rows: {rows}')
+        for name, size, json_seconds, orjson_seconds in results:
+            self.stdout.write(f'\n=== {name} ({size / 1024:.0f} KiB) ===')
+            self.stdout.write(f'JSONRenderer: {json_seconds * 1000:.1f} ms')
+            self.stdout.write(f'ORJSONRenderer: {orjson_seconds * 1000:.1f} ms')
+            self.stdout.write(self.style.SUCCESS(f'Speedup: {json_seconds / orjson_seconds:.1f}x'))
@@ -0,0 +1,93 @@
+"""
+Management command to compare the list serializer with the values() fast path.
+"""
+
+import time
+from datetime import date, datetime, timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.companies.models import Company
+from apps.authentication.models import User
+from apps.appointments.fastpath import appointment_row, appointment_values
+from apps.appointments.models import Service, Appointment
+from apps.appointments.occupancy import combine_aware
+from apps.appointments.serializers import AppointmentSerializer
+
+
+class Rollback(Exception):
+    """Raised to discard the benchmark rows."""
+
+
+class Command(BaseCommand):
+    """Command to benchmark appointment list serialization."""
+    
+    help = 'Compare AppointmentSerializer with the values() fast path on generated rows'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Appointments to serialize')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per variant; the best one is kept')
+    
+    def handle(self, *args, **options):
+        """Execute the command."""
+        rows = options['rows']
+        repeat = options['repeat']
+        
+        # Rows are created inside a transaction that is always rolled back
+        try:
+            with transaction.atomic():
+                queryset = self._create_rows(rows)
+                serializer_seconds = self._best_of(repeat, lambda: AppointmentSerializer(
+                    queryset.select_related('client', 'actor', 'service'), many=True
+                ).data)
+                values = appointment_values()
+                fast_seconds = self._best_of(repeat, lambda: [
+                    appointment_row(row) for row in queryset.values(*values)
+                ])
+                raise Rollback
+        except Rollback:
+            pass
+        
+        self.stdout.write(f'Rows: {rows}')
+        self.stdout.write(f'ModelSerializer: {serializer_seconds * 1000:.1f} ms')
+        self.stdout.write(f'values() fast path: {fast_seconds * 1000:.1f} ms')
+        self.stdout.write(self.style.SUCCESS(f'Speedup: {serializer_seconds / fast_seconds:.1f}x'))
+    
+    def _best_of(self, repeat, run):
+        """Returns the fastest of repeat runs, queries included."""
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+    
+    def _create_rows(self, rows):
+        """Creates the benchmark appointments and returns their queryset."""
+        suffix = datetime.now().strftime('%Y%m%d%H%M%S%f')
+        company = Company.objects.create(name=f'Benchmark {suffix}')
+        client = User.objects.create(
+            username=f'benchmark_client_{suffix}', first_name='Bench', last_name='Client',
+            role='user', company=company
+        )
+        actor = User.objects.create(
+            username=f'benchmark_actor_{suffix}', first_name='Bench', last_name='Actor',
+            role='actor', company=company
+        )
+        service = Service.objects.create(
+            name='Benchmark', duration_minutes=30, base_price=25, company=company, actor=actor
+        )
+        day = date(2030, 1, 1)
+        Appointment.objects.bulk_create([
+            Appointment(
+                client=client,
+                actor=actor,
+                service=service,
+                start_time=combine_aware(day, datetime.min.time()) + timedelta(minutes=30 * index),
+                end_time=combine_aware(day, datetime.min.time()) + timedelta(minutes=30 * index + 30),
+                status='confirmed',
+                final_price=25
+            )
+            for index in range(rows)
+        ])
+        return Appointment.objects.filter(service=service).order_by('-start_time', '-id')
@@ -0,0 +1,86 @@
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations
+
+
+CONSTRAINT_SQL = """
+ALTER TABLE appointments_appointment
+ADD CONSTRAINT appointments_appointment_no_overlap
+EXCLUDE USING gist (
+    actor_id WITH =,
+    tstzrange(start_time, end_time, '[)') WITH &&
+)
+WHERE (status IN ('pending', 'confirmed'))
+"""
+
+# Pairs of active appointments that the constraint would reject
+OVERLAPS_SQL = """
+SELECT a.actor_id, a.id, b.id
+FROM appointments_appointment a
+JOIN appointments_appointment b
+  ON b.actor_id = a.actor_id
+ AND b.id > a.id
+ AND b.start_time < a.end_time
+ AND b.end_time > a.start_time
+WHERE a.status IN ('pending', 'confirmed')
+  AND b.status IN ('pending', 'confirmed')
+ORDER BY a.actor_id, a.id, b.id
+LIMIT %s
+"""
+
+# Overlapping pairs listed in the error message
+LISTED_OVERLAPS = 50
+
+DROP_CONSTRAINT_SQL = """
+ALTER TABLE appointments_appointment
+DROP CONSTRAINT IF EXISTS appointments_appointment_no_overlap
+"""
+
+
+def find_overlaps(connection):
+    """Returns up to LISTED_OVERLAPS (actor_id, appointment_id, other_id) overlapping active pairs."""
+    with connection.cursor() as cursor:
+        cursor.execute(OVERLAPS_SQL, [LISTED_OVERLAPS])
+        return cursor.fetchall()
+
+
+def add_overlap_constraint(apps, schema_editor):
+    """
+    Creates the exclusion constraint; other databases validate in Python.
+
+    Existing overlapping active appointments would make ALTER TABLE fail with
+    a bare constraint error, so they are looked up first and listed. They
+    must be resolved, e.g. by cancelling one of each pair, before migrating.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    overlaps = find_overlaps(schema_editor.connection)
+    if overlaps:
+        pairs = "\n".join(
+            f"  actor {actor_id}: appointments {appointment_id} and {other_id}"
+            for actor_id, appointment_id, other_id in overlaps
+        )
+        raise RuntimeError(
+            "Cannot add appointments_appointment_no_overlap: these pending or confirmed "
+            f"appointments overlap (at most {LISTED_OVERLAPS} pairs shown). Cancel or move one "
+            f"appointment of each pair, then run the migration again.\n{pairs}"
+        )
+
+    schema_editor.execute(CONSTRAINT_SQL)
+
+
+def remove_overlap_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(DROP_CONSTRAINT_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments", "0001_initial"),
+    ]
+
+    operations = [
+        BtreeGistExtension(),
+        migrations.RunPython(add_overlap_constraint, remove_overlap_constraint),
+    ]
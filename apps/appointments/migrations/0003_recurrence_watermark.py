@@ -0,0 +1,38 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments", "0002_appointment_no_overlap"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recurrence",
+            name="materialized_until",
+            field=models.DateField(blank=True, null=True, verbose_name="Materialized Until"),
+        ),
+        migrations.AddField(
+            model_name="appointment",
+            name="recurrence",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="appointments",
+                to="appointments.recurrence",
+                verbose_name="Recurrence",
+            ),
+        ),
+        migrations.AddField(
+            model_name="appointment",
+            name="occurrence_date",
+            field=models.DateField(blank=True, null=True, verbose_name="Occurrence Date"),
+        ),
+        migrations.AlterUniqueTogether(
+            name="appointment",
+            unique_together={("recurrence", "occurrence_date")},
+        ),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments", "0003_recurrence_watermark"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecurrenceException",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("occurrence_date", models.DateField(verbose_name="Occurrence Date")),
+                ("is_cancelled", models.BooleanField(default=False, verbose_name="Cancelled")),
+                ("start_time", models.TimeField(blank=True, null=True, verbose_name="New Start Time")),
+                ("end_time", models.TimeField(blank=True, null=True, verbose_name="New End Time")),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Created at")),
+                (
+                    "recurrence",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="exceptions",
+                        to="appointments.recurrence",
+                        verbose_name="Recurrence",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Recurrence Exception",
+                "verbose_name_plural": "Recurrence Exceptions",
+                "ordering": ["occurrence_date"],
+                "unique_together": {("recurrence", "occurrence_date")},
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments", "0004_recurrenceexception"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                condition=models.Q(("status__in", ["pending", "confirmed"])),
+                fields=["actor", "start_time", "end_time"],
+                include=["id", "recurrence", "occurrence_date"],
+                name="appt_actor_active_range_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["actor", "status", "start_time"], name="appt_actor_status_start_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(fields=["client", "start_time"], name="appt_client_start_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="recurrence",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["actor", "start_date"],
+                name="recurrence_actor_active_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="block",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["actor", "start_time", "end_time"],
+                include=["id"],
+                name="block_actor_active_range_idx",
+            ),
+        ),
+    ]
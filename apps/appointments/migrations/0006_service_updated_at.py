@@ -0,0 +1,18 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments", "0005_scheduling_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="service",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name="Updated at"),
+            preserve_default=False,
+        ),
+    ]
@@ -2,11 +2,27 @@
 Models for the appointments app.
 """
 
-from django.db import models
+from django.db import models, connection, transaction, IntegrityError
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 
 
+# Exclusion constraint created by migration 0002 on PostgreSQL
+APPOINTMENT_OVERLAP_CONSTRAINT = 'appointments_appointment_no_overlap'
+APPOINTMENT_CONFLICT_MESSAGE = "There is already an appointment at this time for this actor."
+
+# Statuses the confirm and cancel actions accept as a starting point
+STATUS_TRANSITIONS = {
+    'confirmed': ('pending', 'cancelled'),
+    'cancelled': ('pending', 'confirmed'),
+}
+
+
+def has_overlap_constraint():
+    """Tells whether the database itself rejects overlapping appointments."""
+    return connection.vendor == 'postgresql'
+
+
 class Service(models.Model):
     """Model to represent an offered service."""
     
@@ -44,6 +60,10 @@ class Service(models.Model):
         auto_now_add=True,
         verbose_name='Created at'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Updated at'
+    )
 
     class Meta:
         verbose_name = 'Service'
@@ -111,6 +131,19 @@ class Appointment(models.Model):
         blank=True,
         verbose_name='Final Price'
     )
+    recurrence = models.ForeignKey(
+        'Recurrence',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="appointments",
+        verbose_name='Recurrence'
+    )
+    occurrence_date = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name='Occurrence Date'
+    )
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Created at'
@@ -124,19 +157,45 @@ class Appointment(models.Model):
         verbose_name = 'Appointment'
         verbose_name_plural = 'Appointments'
         ordering = ['-start_time']
+        # A recurrence is materialized at most once per date; rows without
+        # a recurrence are NULL and never collide
+        unique_together = [('recurrence', 'occurrence_date')]
+        indexes = [
+            # Conflict checks and occupancy loads only look at active
+            # appointments; the included columns allow index-only scans
+            models.Index(
+                fields=['actor', 'start_time', 'end_time'],
+                include=['id', 'recurrence', 'occurrence_date'],
+                condition=models.Q(status__in=['pending', 'confirmed']),
+                name='appt_actor_active_range_idx',
+            ),
+            models.Index(fields=['actor', 'status', 'start_time'], name='appt_actor_status_start_idx'),
+            models.Index(fields=['client', 'start_time'], name='appt_client_start_idx'),
+        ]
 
     def __str__(self):
         return f"{self.service} - {self.start_time.strftime('%d/%m/%Y %H:%M')}"
 
     def clean(self):
         """Validates the appointment."""
+        self._validate_times()
+        self._validate_no_overlap()
+
+    def can_change_status(self, new_status):
+        """Tells whether the confirm and cancel actions may move the appointment to new_status."""
+        return self.status == new_status or self.status in STATUS_TRANSITIONS.get(new_status, ())
+
+    def _validate_times(self):
+        """Checks that the appointment starts before it ends."""
         if self.start_time and self.end_time:
             if self.start_time >= self.end_time:
                 raise ValidationError(
                     "The start date/time must be before the end date/time."
                 )
-            
-            # Check for conflicts with other appointments
+
+    def _validate_no_overlap(self):
+        """Checks for conflicts with other appointments of the actor, like the exclusion constraint does."""
+        if self.start_time and self.end_time and self.status in ('pending', 'confirmed'):
             conflicts = Appointment.objects.filter(
                 actor=self.actor,
                 status__in=['pending', 'confirmed'],
@@ -145,19 +204,32 @@ class Appointment(models.Model):
             ).exclude(id=self.id)
             
             if conflicts.exists():
-                raise ValidationError(
-                    "There is already an appointment at this time for this actor."
-                )
+                raise ValidationError(APPOINTMENT_CONFLICT_MESSAGE)
 
     def save(self, *args, **kwargs):
-        """Saves the appointment with validations."""
-        self.clean()
+        """
+        Saves the appointment with validations.
+
+        On PostgreSQL overlaps are rejected by an exclusion constraint during
+        the write itself, so no extra SELECT is needed and concurrent bookings
+        cannot both succeed. Other databases fall back to a query.
+        """
+        self._validate_times()
+        if not has_overlap_constraint():
+            self._validate_no_overlap()
         
         # Calculate final price if not set
         if not self.final_price:
             self.final_price = self.service.base_price
-            
-        super().save(*args, **kwargs)
+        
+        try:
+            # A savepoint keeps the surrounding transaction usable after a conflict
+            with transaction.atomic(using=kwargs.get('using')):
+                super().save(*args, **kwargs)
+        except IntegrityError as exc:
+            if APPOINTMENT_OVERLAP_CONSTRAINT not in str(exc):
+                raise
+            raise ValidationError(APPOINTMENT_CONFLICT_MESSAGE) from exc
 
 
 class Recurrence(models.Model):
@@ -215,6 +287,11 @@ class Recurrence(models.Model):
         default=True,
         verbose_name='Active Recurrence'
     )
+    materialized_until = models.DateField(
+        blank=True,
+        null=True,
+        verbose_name='Materialized Until'
+    )
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Created at'
@@ -224,6 +301,13 @@ class Recurrence(models.Model):
         verbose_name = 'Recurrence'
         verbose_name_plural = 'Recurrences'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['actor', 'start_date'],
+                condition=models.Q(is_active=True),
+                name='recurrence_actor_active_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.actor} - {self.get_frequency_display()} {self.start_time}-{self.end_time}"
@@ -241,6 +325,60 @@ class Recurrence(models.Model):
             )
 
 
+class RecurrenceException(models.Model):
+    """
+    Model to represent a change to a single occurrence of a recurrence.
+
+    Occurrences are expanded on the fly; only cancelled or rescheduled ones
+    are stored.
+    """
+
+    recurrence = models.ForeignKey(
+        Recurrence,
+        on_delete=models.CASCADE,
+        related_name="exceptions",
+        verbose_name='Recurrence'
+    )
+    occurrence_date = models.DateField(verbose_name='Occurrence Date')
+    is_cancelled = models.BooleanField(
+        default=False,
+        verbose_name='Cancelled'
+    )
+    start_time = models.TimeField(
+        blank=True,
+        null=True,
+        verbose_name='New Start Time'
+    )
+    end_time = models.TimeField(
+        blank=True,
+        null=True,
+        verbose_name='New End Time'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Created at'
+    )
+
+    class Meta:
+        verbose_name = 'Recurrence Exception'
+        verbose_name_plural = 'Recurrence Exceptions'
+        ordering = ['occurrence_date']
+        unique_together = [('recurrence', 'occurrence_date')]
+
+    def __str__(self):
+        return f"{self.recurrence} - {self.occurrence_date.strftime('%d/%m/%Y')}"
+
+    def clean(self):
+        """Validates the exception."""
+        if not self.is_cancelled:
+            start_time = self.start_time or self.recurrence.start_time
+            end_time = self.end_time or self.recurrence.end_time
+            if start_time >= end_time:
+                raise ValidationError(
+                    "The start time must be before the end time."
+                )
+
+
 class Block(models.Model):
     """Model to represent time blocks."""
     
@@ -287,6 +425,14 @@ class Block(models.Model):
         verbose_name = 'Block'
         verbose_name_plural = 'Blocks'
         ordering = ['-start_time']
+        indexes = [
+            models.Index(
+                fields=['actor', 'start_time', 'end_time'],
+                include=['id'],
+                condition=models.Q(is_active=True),
+                name='block_actor_active_range_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.start_time.strftime('%d/%m/%Y %H:%M')}"
@@ -0,0 +1,384 @@
+"""
+Per-actor day occupancy for the appointments app.
+
+Busy time of an actor (pending/confirmed appointments, active blocks and
+recurrence occurrences) is cached per local day in a packed binary form.
+Signals in signals.py invalidate exactly the days touched by a change, so
+availability lookups and conflict checks rarely need to hit the database.
+
+The readers come in sync and async (a-prefixed) flavours that share the
+same query and packing logic.
+"""
+
+from array import array
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from .models import Appointment, Block, Recurrence
+from .occurrences import combine_aware, exceptions_queryset, index_exceptions, iter_occurrences
+
+
+ACTIVE_STATUSES = ('pending', 'confirmed')
+
+KIND_APPOINTMENT = 0
+KIND_BLOCK = 1
+KIND_RECURRENCE = 2
+
+CACHE_PREFIX = 'appointments:occupancy'
+DEFAULT_CACHE_TIMEOUT = 60 * 60 * 24
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def day_start(day):
+    """Returns the aware datetime at which a local day starts."""
+    return combine_aware(day, datetime.min.time())
+
+
+def to_micros(moment):
+    """Converts an aware datetime to microseconds since the epoch."""
+    return (moment - EPOCH) // MICROSECOND
+
+
+def from_micros(value):
+    """Converts microseconds since the epoch to an aware UTC datetime."""
+    return EPOCH + timedelta(microseconds=value)
+
+
+def local_days(start, end):
+    """Returns the local dates touched by the interval [start, end)."""
+    first_day = timezone.localtime(start).date()
+    last_day = timezone.localtime(max(end - MICROSECOND, start)).date()
+    return [first_day + timedelta(days=offset) for offset in range((last_day - first_day).days + 1)]
+
+
+def _pack(entries):
+    """Packs (start, end, kind, object_id) entries into bytes."""
+    packed = array('q')
+    for entry in entries:
+        packed.extend(entry)
+    return packed.tobytes()
+
+
+def _unpack(data):
+    """Unpacks bytes produced by _pack."""
+    values = array('q')
+    values.frombytes(data)
+    return [tuple(values[index:index + 4]) for index in range(0, len(values), 4)]
+
+
+def _version_key(actor_id):
+    return f'{CACHE_PREFIX}:version:{actor_id}'
+
+
+def _day_version_key(actor_id, day):
+    return f'{CACHE_PREFIX}:version:{actor_id}:{day.isoformat()}'
+
+
+def _day_key(actor_id, version, day):
+    return f'{CACHE_PREFIX}:{actor_id}:{version}:{day.isoformat()}'
+
+
+def _new_version():
+    # A timestamp avoids reusing the keys of an evicted version
+    return to_micros(timezone.now())
+
+
+def _version_keys(actor_ids, days):
+    """Maps the actor and day version keys to (actor_id, day), with None as the actor's day."""
+    keys = {_version_key(actor_id): (actor_id, None) for actor_id in actor_ids}
+    keys.update({
+        _day_version_key(actor_id, day): (actor_id, day)
+        for actor_id in actor_ids for day in days
+    })
+    return keys
+
+
+def _version_timeout(day):
+    # Day versions only need to outlive the day entries they guard
+    return None if day is None else _cache_timeout()
+
+
+def _combine_versions(keys, found):
+    """Builds {(actor_id, day): version} from the actor and day versions."""
+    actor_versions = {actor_id: found[key] for key, (actor_id, day) in keys.items() if day is None}
+    return {
+        (actor_id, day): f'{actor_versions[actor_id]}.{found[key]}'
+        for key, (actor_id, day) in keys.items() if day is not None
+    }
+
+
+def _get_versions(actor_ids, days):
+    """
+    Returns the cache version of each (actor_id, day), creating missing ones.
+
+    A day's version combines the actor version, moved by invalidate_actor,
+    with the day version, moved by invalidate_days. Both are read with one
+    get_many.
+    """
+    keys = _version_keys(actor_ids, days)
+    found = cache.get_many(list(keys))
+    for key, (_, day) in keys.items():
+        if key not in found:
+            cache.add(key, _new_version(), _version_timeout(day))
+            found[key] = cache.get(key)
+    return _combine_versions(keys, found)
+
+
+async def _aget_versions(actor_ids, days):
+    """Async version of _get_versions."""
+    keys = _version_keys(actor_ids, days)
+    found = await cache.aget_many(list(keys))
+    for key, (_, day) in keys.items():
+        if key not in found:
+            await cache.aadd(key, _new_version(), _version_timeout(day))
+            found[key] = await cache.aget(key)
+    return _combine_versions(keys, found)
+
+
+def _entry_loader(actor_ids, days):
+    """
+    Loads the busy entries of several actors for a set of days.
+
+    Appointments, blocks and recurrences are each fetched with a single query
+    covering every actor and the whole day range; recurrences are expanded
+    on the fly, with one more query for their exceptions when there are any.
+
+    This is a generator: it yields each queryset it needs and is sent back
+    its rows, so _load_entries and _aload_entries only differ in how they
+    run the queries. The entries are its return value.
+    """
+    first_day = min(days)
+    last_day = max(days)
+    start = day_start(first_day)
+    end = day_start(last_day + timedelta(days=1))
+    wanted = set(days)
+    entries = {(actor_id, day): [] for actor_id in actor_ids for day in days}
+
+    def add(actor_id, kind, object_id, busy_start, busy_end):
+        entry = (to_micros(busy_start), to_micros(busy_end), kind, object_id)
+        for day in local_days(busy_start, busy_end):
+            if day in wanted:
+                entries[(actor_id, day)].append(entry)
+
+    # Occurrences materialized as appointments replace their virtual twin
+    materialized = set()
+    appointments = yield Appointment.objects.filter(
+        actor_id__in=actor_ids,
+        status__in=ACTIVE_STATUSES,
+        start_time__lt=end,
+        end_time__gt=start
+    ).values_list('actor_id', 'id', 'start_time', 'end_time', 'recurrence_id', 'occurrence_date')
+    for actor_id, object_id, busy_start, busy_end, recurrence_id, occurrence_date in appointments:
+        add(actor_id, KIND_APPOINTMENT, object_id, busy_start, busy_end)
+        if recurrence_id:
+            materialized.add((recurrence_id, occurrence_date))
+
+    blocks = yield Block.objects.filter(
+        actor_id__in=actor_ids,
+        is_active=True,
+        start_time__lt=end,
+        end_time__gt=start
+    ).values_list('actor_id', 'id', 'start_time', 'end_time')
+    for actor_id, object_id, busy_start, busy_end in blocks:
+        add(actor_id, KIND_BLOCK, object_id, busy_start, busy_end)
+
+    recurrences = yield Recurrence.objects.filter(
+        actor_id__in=actor_ids,
+        is_active=True,
+        start_date__lte=last_day
+    ).exclude(end_date__lt=first_day)
+    if recurrences:
+        exceptions = index_exceptions((yield exceptions_queryset(
+            [recurrence.id for recurrence in recurrences], first_day, last_day
+        )))
+        for occurrence in iter_occurrences(recurrences, first_day, last_day, exceptions):
+            if occurrence.date in wanted and (occurrence.recurrence.id, occurrence.date) not in materialized:
+                add(occurrence.actor_id, KIND_RECURRENCE, occurrence.recurrence.id, occurrence.start, occurrence.end)
+
+    return entries
+
+
+def _load_entries(actor_ids, days):
+    """Runs _entry_loader with the sync ORM."""
+    loader = _entry_loader(actor_ids, days)
+    try:
+        queryset = next(loader)
+        while True:
+            queryset = loader.send(list(queryset))
+    except StopIteration as stop:
+        return stop.value
+
+
+async def _aload_entries(actor_ids, days):
+    """Runs _entry_loader with the async ORM."""
+    loader = _entry_loader(actor_ids, days)
+    try:
+        queryset = next(loader)
+        while True:
+            queryset = loader.send([row async for row in queryset])
+    except StopIteration as stop:
+        return stop.value
+
+
+def _read_cached(keys, found):
+    """Splits {key: (actor_id, day)} into cached entries and missing pairs."""
+    entries = {}
+    missing = []
+    for key, pair in keys.items():
+        if key in found:
+            entries[pair] = _unpack(found[key])
+        else:
+            missing.append(pair)
+    return entries, missing
+
+
+def _missing_range(missing):
+    """Returns the actors and days to load for the missing (actor_id, day) pairs."""
+    return sorted({actor_id for actor_id, _ in missing}), sorted({day for _, day in missing})
+
+
+def _cache_values(loaded, missing, versions):
+    return {
+        _day_key(actor_id, versions[(actor_id, day)], day): _pack(loaded[(actor_id, day)])
+        for actor_id, day in missing
+    }
+
+
+def _cache_timeout():
+    return getattr(settings, 'APPOINTMENT_OCCUPANCY_CACHE_TIMEOUT', DEFAULT_CACHE_TIMEOUT)
+
+
+def get_day_entries(actor_ids, days):
+    """
+    Returns {(actor_id, day): [(start, end, kind, object_id)]} for every pair.
+
+    Times are microseconds since the epoch. Cached days are read with a single
+    get_many; missing ones are loaded together and written back.
+    """
+    actor_ids = list(actor_ids)
+    days = list(days)
+    if not actor_ids or not days:
+        return {}
+
+    versions = _get_versions(actor_ids, days)
+    keys = {
+        _day_key(actor_id, versions[(actor_id, day)], day): (actor_id, day)
+        for actor_id in actor_ids for day in days
+    }
+    entries, missing = _read_cached(keys, cache.get_many(list(keys)))
+
+    if missing:
+        loaded = _load_entries(*_missing_range(missing))
+        cache.set_many(_cache_values(loaded, missing, versions), _cache_timeout())
+        for pair in missing:
+            entries[pair] = loaded[pair]
+
+    return entries
+
+
+async def aget_day_entries(actor_ids, days):
+    """Async version of get_day_entries."""
+    actor_ids = list(actor_ids)
+    days = list(days)
+    if not actor_ids or not days:
+        return {}
+
+    versions = await _aget_versions(actor_ids, days)
+    keys = {
+        _day_key(actor_id, versions[(actor_id, day)], day): (actor_id, day)
+        for actor_id in actor_ids for day in days
+    }
+    entries, missing = _read_cached(keys, await cache.aget_many(list(keys)))
+
+    if missing:
+        loaded = await _aload_entries(*_missing_range(missing))
+        await cache.aset_many(_cache_values(loaded, missing, versions), _cache_timeout())
+        for pair in missing:
+            entries[pair] = loaded[pair]
+
+    return entries
+
+
+def get_busy_entries(actor_ids, start, end):
+    """
+    Returns {actor_id: [(start, end, kind, object_id)]} overlapping [start, end).
+
+    Entries are de-duplicated across days, sorted by start and use aware
+    datetimes.
+    """
+    return _busy_entries(actor_ids, start, end, get_day_entries(actor_ids, local_days(start, end)))
+
+
+async def aget_busy_entries(actor_ids, start, end):
+    """Async version of get_busy_entries."""
+    return _busy_entries(actor_ids, start, end, await aget_day_entries(actor_ids, local_days(start, end)))
+
+
+def _busy_entries(actor_ids, start, end, day_entries):
+    """Collects the day entries overlapping [start, end) per actor."""
+    start_micros = to_micros(start)
+    end_micros = to_micros(end)
+
+    busy = {actor_id: set() for actor_id in actor_ids}
+    for (actor_id, _), entries in day_entries.items():
+        for entry in entries:
+            if entry[0] < end_micros and entry[1] > start_micros:
+                busy[actor_id].add(entry)
+
+    return {
+        actor_id: [
+            (from_micros(busy_start), from_micros(busy_end), kind, object_id)
+            for busy_start, busy_end, kind, object_id in sorted(entries)
+        ]
+        for actor_id, entries in busy.items()
+    }
+
+
+def find_conflicts(actor_id, start, end, exclude_appointment_id=None,
+                   kinds=(KIND_APPOINTMENT, KIND_BLOCK, KIND_RECURRENCE)):
+    """Returns the (kind, object_id) of busy entries overlapping [start, end)."""
+    return [
+        (kind, object_id)
+        for _, _, kind, object_id in get_busy_entries([actor_id], start, end)[actor_id]
+        if kind in kinds and not (kind == KIND_APPOINTMENT and object_id == exclude_appointment_id)
+    ]
+
+
+def _bump_days(actor_id, days):
+    version = _new_version()
+    cache.set_many({_day_version_key(actor_id, day): version for day in days}, _cache_timeout())
+
+
+def invalidate_days(actor_id, days):
+    """
+    Drops the cached occupancy of an actor for the given days by moving them to a new version.
+
+    The versions move right away and again once the surrounding transaction
+    commits. A reader that loaded the rows before the commit writes them
+    under a version no later reader uses, so stale days are never read
+    back.
+    """
+    days = list(days)
+    if not days:
+        return
+    _bump_days(actor_id, days)
+    transaction.on_commit(lambda: _bump_days(actor_id, days))
+
+
+def invalidate_interval(actor_id, start, end):
+    """Drops the cached occupancy of an actor for the days touched by [start, end)."""
+    if actor_id and start and end:
+        invalidate_days(actor_id, local_days(start, end))
+
+
+def invalidate_actor(actor_id):
+    """Drops every cached day of an actor by moving to a new cache version."""
+    def bump():
+        cache.set(_version_key(actor_id), _new_version(), None)
+
+    bump()
+    transaction.on_commit(bump)
@@ -0,0 +1,118 @@
+"""
+Virtual recurrence occurrences for the appointments app.
+
+Occurrences of a recurrence are never stored as rows. They are expanded
+lazily for whatever window is being read, and only the exceptions to them
+(cancelled or rescheduled occurrences) live in the database.
+"""
+
+import calendar
+from datetime import date, datetime, timedelta
+from django.utils import timezone
+from .models import RecurrenceException
+
+
+def combine_aware(day, clock):
+    """Combines a date and a time into an aware datetime in the current timezone."""
+    return timezone.make_aware(datetime.combine(day, clock), timezone.get_current_timezone())
+
+
+def expand_recurrence(recurrence, start_date, end_date):
+    """
+    Yields the dates in [start_date, end_date] on which a recurrence occurs.
+
+    Dates are produced by stepping from one occurrence to the next, so weekly
+    and monthly recurrences never visit the days in between.
+    """
+    current_date = max(recurrence.start_date, start_date)
+    last_date = min(recurrence.end_date, end_date) if recurrence.end_date else end_date
+    if current_date > last_date:
+        return
+
+    if recurrence.frequency == 'daily':
+        for offset in range((last_date - current_date).days + 1):
+            yield current_date + timedelta(days=offset)
+    elif recurrence.frequency == 'weekly':
+        if recurrence.weekday is None:
+            return
+        current_date += timedelta(days=(recurrence.weekday - current_date.weekday()) % 7)
+        while current_date <= last_date:
+            yield current_date
+            current_date += timedelta(days=7)
+    elif recurrence.frequency == 'monthly':
+        if recurrence.day_of_month is None:
+            return
+        year, month = current_date.year, current_date.month
+        while date(year, month, 1) <= last_date:
+            # Months without the day (e.g. the 31st) are skipped
+            if recurrence.day_of_month <= calendar.monthrange(year, month)[1]:
+                occurrence = date(year, month, recurrence.day_of_month)
+                if current_date <= occurrence <= last_date:
+                    yield occurrence
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+class Occurrence:
+    """A single, non-persisted occurrence of a recurrence."""
+
+    __slots__ = ('recurrence', 'date', 'start', 'end', 'is_exception')
+
+    def __init__(self, recurrence, day, start, end, is_exception=False):
+        self.recurrence = recurrence
+        self.date = day
+        self.start = start
+        self.end = end
+        self.is_exception = is_exception
+
+    @property
+    def actor_id(self):
+        return self.recurrence.actor_id
+
+    def __repr__(self):
+        return f"<Occurrence {self.recurrence.id} {self.date.isoformat()}>"
+
+
+def exceptions_queryset(recurrence_ids, start_date, end_date):
+    """Returns the exceptions of some recurrences inside a window."""
+    return RecurrenceException.objects.filter(
+        recurrence_id__in=recurrence_ids,
+        occurrence_date__gte=start_date,
+        occurrence_date__lte=end_date
+    )
+
+
+def index_exceptions(exceptions):
+    """Returns {(recurrence_id, date): exception}, the form iter_occurrences expects."""
+    return {(exception.recurrence_id, exception.occurrence_date): exception for exception in exceptions}
+
+
+def load_exceptions(recurrence_ids, start_date, end_date):
+    """Returns {(recurrence_id, date): exception} for a window, with one query."""
+    return index_exceptions(exceptions_queryset(recurrence_ids, start_date, end_date))
+
+
+def iter_occurrences(recurrences, start_date, end_date, exceptions=None):
+    """
+    Lazily yields the occurrences of recurrences between two dates.
+
+    exceptions comes from load_exceptions; cancelled occurrences are skipped
+    and rescheduled ones use their new times. Nothing is read from or written
+    to the database here.
+    """
+    exceptions = exceptions or {}
+    for recurrence in recurrences:
+        for day in expand_recurrence(recurrence, start_date, end_date):
+            exception = exceptions.get((recurrence.id, day))
+            if exception is None:
+                yield Occurrence(
+                    recurrence, day,
+                    combine_aware(day, recurrence.start_time),
+                    combine_aware(day, recurrence.end_time)
+                )
+            elif not exception.is_cancelled:
+                yield Occurrence(
+                    recurrence, day,
+                    combine_aware(day, exception.start_time or recurrence.start_time),
+                    combine_aware(day, exception.end_time or recurrence.end_time),
+                    is_exception=True
+                )
@@ -0,0 +1,20 @@
+"""
+Pagination classes for the appointments app.
+"""
+
+from rest_framework.pagination import CursorPagination
+
+
+class AppointmentCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (start_time, id), newest first.
+
+    Each page seeks from the position encoded in the cursor instead of using
+    an OFFSET, and no COUNT(*) is run, so deep pages cost the same as the
+    first one.
+    """
+
+    ordering = ('-start_time', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
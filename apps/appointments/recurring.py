@@ -0,0 +1,292 @@
+"""
+Recurring appointment generation for the appointments app.
+
+Recurrences are normally expanded on the fly (see occurrences.py). When
+APPOINTMENT_MATERIALIZE_RECURRENCES is enabled, for integrations that need
+real rows, occurrences are also written as appointments.
+
+Generation is a set-based pipeline: occurrences of every recurrence are
+expanded in memory, the busy time of the actors involved is prefetched with
+one query per table, occurrences that collide with it (or with each other) are
+dropped with a sorted sweep, and the survivors are inserted with bulk_create.
+
+Each recurrence keeps a materialized_until watermark, so a run only expands
+the dates past the previous horizon. Generated appointments carry their
+(recurrence, occurrence_date) pair, which is unique in the database.
+"""
+
+import logging
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction, IntegrityError
+from django.db.models import Q
+from .availability import merge_intervals
+from .models import Appointment, Block, Recurrence, Service
+from .occupancy import ACTIVE_STATUSES
+from .occurrences import iter_occurrences, load_exceptions
+from .signals import appointments_bulk_created
+
+
+logger = logging.getLogger(__name__)
+
+# How far ahead occurrences are materialized, per frequency
+RECURRENCE_HORIZON_DAYS = {
+    'daily': 30,
+    'weekly': 30,
+    'monthly': 90,
+}
+
+# Default largest number of actors per chunk (and per Celery shard)
+ACTOR_CHUNK_SIZE = 500
+# Default smallest shard, so small runs are not split into tiny tasks
+MIN_ACTOR_SHARD_SIZE = 50
+# Default worker processes consuming the low queue
+RECURRENCE_WORKERS = 4
+BULK_CREATE_BATCH_SIZE = 500
+
+
+def horizon_end(recurrence, start_date):
+    """Returns the last date a run starting at start_date materializes."""
+    return start_date + timedelta(days=RECURRENCE_HORIZON_DAYS[recurrence.frequency])
+
+
+def expand_occurrences(recurrences, start_date):
+    """
+    Returns {actor_id: [(start, end, recurrence, day)]} for the recurrences.
+
+    Each recurrence is expanded from the day after its watermark (or from
+    start_date) up to its frequency horizon. Cancelled and rescheduled
+    occurrences follow their exceptions.
+    """
+    exceptions = load_exceptions(
+        [recurrence.id for recurrence in recurrences],
+        start_date,
+        start_date + timedelta(days=max(RECURRENCE_HORIZON_DAYS.values()))
+    )
+
+    occurrences = {}
+    for recurrence in recurrences:
+        first_date = start_date
+        if recurrence.materialized_until and recurrence.materialized_until >= first_date:
+            first_date = recurrence.materialized_until + timedelta(days=1)
+        for occurrence in iter_occurrences([recurrence], first_date, horizon_end(recurrence, start_date), exceptions):
+            occurrences.setdefault(recurrence.actor_id, []).append((
+                occurrence.start,
+                occurrence.end,
+                recurrence,
+                occurrence.date,
+            ))
+    return occurrences
+
+
+def pending_recurrences(start_date, actor_ids=None):
+    """Returns the active recurrences whose watermark is behind the horizon."""
+    behind = Q(materialized_until__isnull=True)
+    for frequency, days in RECURRENCE_HORIZON_DAYS.items():
+        behind |= Q(frequency=frequency, materialized_until__lt=start_date + timedelta(days=days))
+
+    recurrences = Recurrence.objects.filter(
+        behind,
+        is_active=True,
+        start_date__lte=start_date + timedelta(days=max(RECURRENCE_HORIZON_DAYS.values()))
+    ).exclude(end_date__lt=start_date)
+    if actor_ids is not None:
+        recurrences = recurrences.filter(actor_id__in=actor_ids)
+    return recurrences
+
+
+def prefetch_busy(actor_ids, start, end):
+    """
+    Returns {actor_id: busy intervals} between start and end.
+
+    Active appointments (including previously generated occurrences) and
+    blocks are loaded with one query per table for every actor.
+    """
+    busy = {actor_id: [] for actor_id in actor_ids}
+
+    appointments = Appointment.objects.filter(
+        actor_id__in=actor_ids,
+        status__in=ACTIVE_STATUSES,
+        start_time__lt=end,
+        end_time__gt=start
+    ).values_list('actor_id', 'start_time', 'end_time')
+    blocks = Block.objects.filter(
+        actor_id__in=actor_ids,
+        is_active=True,
+        start_time__lt=end,
+        end_time__gt=start
+    ).values_list('actor_id', 'start_time', 'end_time')
+
+    for rows in (appointments, blocks):
+        for actor_id, busy_start, busy_end in rows:
+            busy[actor_id].append((busy_start, busy_end))
+
+    return busy
+
+
+def filter_occurrences(occurrences, busy):
+    """
+    Returns the occurrences that overlap neither busy time nor each other.
+
+    Busy time is merged first, so occurrences and busy intervals are both
+    walked once in start order.
+    """
+    busy = merge_intervals(busy)
+    accepted = []
+    position = 0
+    accepted_until = None
+    for occurrence in sorted(occurrences, key=lambda occurrence: (occurrence[0], occurrence[1])):
+        start, end = occurrence[0], occurrence[1]
+        while position < len(busy) and busy[position][1] <= start:
+            position += 1
+        if position < len(busy) and busy[position][0] < end:
+            continue
+        if accepted_until is not None and accepted_until > start:
+            continue
+        accepted.append(occurrence)
+        accepted_until = end
+    return accepted
+
+
+def _insert(appointments):
+    """
+    Inserts appointments in batches and returns the created ones.
+
+    A batch rejected by the database (an appointment booked while the
+    generator ran, or an occurrence written by an earlier crashed run) is
+    retried row by row so the rest still goes in.
+    """
+    created = []
+    for offset in range(0, len(appointments), BULK_CREATE_BATCH_SIZE):
+        batch = appointments[offset:offset + BULK_CREATE_BATCH_SIZE]
+        try:
+            with transaction.atomic():
+                created.extend(Appointment.objects.bulk_create(batch))
+        except IntegrityError:
+            for appointment in batch:
+                try:
+                    with transaction.atomic():
+                        created.extend(Appointment.objects.bulk_create([appointment]))
+                except IntegrityError:
+                    logger.info(
+                        "Skipped occurrence %s of recurrence %s",
+                        appointment.occurrence_date, appointment.recurrence_id
+                    )
+    return created
+
+
+def _advance_watermarks(recurrences, start_date):
+    """Moves the watermark of each recurrence to its horizon, one UPDATE per frequency."""
+    by_horizon = {}
+    for recurrence in recurrences:
+        by_horizon.setdefault(horizon_end(recurrence, start_date), []).append(recurrence.id)
+    for until, recurrence_ids in by_horizon.items():
+        Recurrence.objects.filter(id__in=recurrence_ids).update(materialized_until=until)
+
+
+def generate_for_actors(actor_ids, start_date):
+    """
+    Materializes the recurrences of some actors from start_date on.
+
+    Returns the number of appointments created.
+    """
+    recurrences = list(pending_recurrences(start_date, actor_ids))
+    if not recurrences:
+        return 0
+    occurrences = expand_occurrences(recurrences, start_date)
+
+    # Generated appointments need a service; the actor's first active one is used
+    services = {}
+    for service in Service.objects.filter(actor_id__in=occurrences, is_active=True).order_by('-id'):
+        services[service.actor_id] = service
+
+    busy = {}
+    if occurrences:
+        first_start = min(start for actor_occurrences in occurrences.values() for start, _, _, _ in actor_occurrences)
+        last_end = max(end for actor_occurrences in occurrences.values() for _, end, _, _ in actor_occurrences)
+        busy = prefetch_busy(list(occurrences), first_start, last_end)
+
+    appointments = []
+    skipped_actor_ids = set()
+    for actor_id, actor_occurrences in occurrences.items():
+        service = services.get(actor_id)
+        if service is None:
+            logger.warning("Actor %s has recurrences but no active service", actor_id)
+            skipped_actor_ids.add(actor_id)
+            continue
+        for start, end, recurrence, day in filter_occurrences(actor_occurrences, busy[actor_id]):
+            # A "blocked" appointment, not available for clients
+            appointments.append(Appointment(
+                actor_id=actor_id,
+                client_id=actor_id,  # Self-scheduling
+                service=service,
+                start_time=start,
+                end_time=end,
+                status='confirmed',
+                final_price=Decimal('0.00'),
+                recurrence=recurrence,
+                occurrence_date=day,
+                notes=f'Recurring appointment - {recurrence.get_frequency_display()}'
+            ))
+
+    # Occurrences and watermarks are committed together, so a crashed run
+    # leaves nothing half-done behind
+    with transaction.atomic():
+        created = _insert(appointments)
+        _advance_watermarks(
+            [recurrence for recurrence in recurrences if recurrence.actor_id not in skipped_actor_ids],
+            start_date
+        )
+
+    if created:
+        appointments_bulk_created.send(sender=Appointment, instances=created)
+    return len(created)
+
+
+def materialization_enabled():
+    """Tells whether recurrence occurrences are stored as appointments."""
+    return getattr(settings, 'APPOINTMENT_MATERIALIZE_RECURRENCES', False)
+
+
+def shard_size_for(actor_count):
+    """
+    Returns the number of actors per shard when actor_count actors are pending.
+
+    Actors are spread evenly over the APPOINTMENT_RECURRENCE_WORKERS worker
+    processes, with at least APPOINTMENT_RECURRENCE_MIN_SHARD_SIZE and at most
+    APPOINTMENT_RECURRENCE_SHARD_SIZE actors per shard.
+    """
+    workers = max(getattr(settings, 'APPOINTMENT_RECURRENCE_WORKERS', RECURRENCE_WORKERS), 1)
+    minimum = getattr(settings, 'APPOINTMENT_RECURRENCE_MIN_SHARD_SIZE', MIN_ACTOR_SHARD_SIZE)
+    maximum = getattr(settings, 'APPOINTMENT_RECURRENCE_SHARD_SIZE', ACTOR_CHUNK_SIZE)
+    return max(min(-(-actor_count // workers), maximum), minimum, 1)
+
+
+def actor_shards(start_date, shard_size=None):
+    """
+    Splits the actors with pending recurrences into shards of sorted ids.
+
+    Shards never share an actor, so they can be generated in parallel without
+    competing for the same calendar. Without shard_size, the size follows
+    shard_size_for.
+    """
+    actor_ids = list(
+        pending_recurrences(start_date)
+        .order_by('actor_id')
+        .values_list('actor_id', flat=True)
+        .distinct()
+    )
+    shard_size = shard_size or shard_size_for(len(actor_ids))
+    return [actor_ids[offset:offset + shard_size] for offset in range(0, len(actor_ids), shard_size)]
+
+
+def generate_recurring_appointments(start_date):
+    """
+    Materializes every active recurrence from start_date on, in this process.
+
+    Actors are processed in chunks so memory stays bounded; each chunk costs a
+    fixed number of queries regardless of how many occurrences it holds. The
+    nightly task spreads the same chunks across workers instead.
+    """
+    return sum(generate_for_actors(actor_ids, start_date) for actor_ids in actor_shards(start_date))
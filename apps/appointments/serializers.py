@@ -3,8 +3,12 @@ Serializers for the appointments app.
 """
 
 from rest_framework import serializers
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.utils import timezone
-from .models import Service, Appointment, Recurrence, Block
+from .catalog import get_actor_service
+from .models import Service, Appointment, Recurrence, RecurrenceException, Block
+from .occupancy import KIND_APPOINTMENT, KIND_BLOCK, KIND_RECURRENCE, find_conflicts
+from .occurrences import expand_recurrence
 from apps.authentication.serializers import UserSerializer
 from apps.companies.serializers import CompanySerializer
 
@@ -19,12 +23,29 @@ class ServiceSerializer(serializers.ModelSerializer):
         model = Service
         fields = [
             'id', 'name', 'description', 'duration_minutes', 'base_price',
-            'company', 'actor', 'is_active', 'created_at', 'actor_name', 'company_name'
+            'company', 'actor', 'is_active', 'created_at', 'updated_at',
+            'actor_name', 'company_name'
         ]
-        read_only_fields = ['id', 'created_at']
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
 
+RECURRENCE_CONFLICT_MESSAGE = "This time is reserved by a recurring schedule of the actor."
 
-class AppointmentSerializer(serializers.ModelSerializer):
+SERVICE_UNAVAILABLE_MESSAGE = "The selected service is not available."
+
+
+class AppointmentSaveMixin:
+    """Reports model validation errors raised while saving as API validation errors."""
+    
+    def save(self, **kwargs):
+        try:
+            return super().save(**kwargs)
+        except DjangoValidationError as exc:
+            # Overlaps are only detected by the database constraint at write time
+            raise serializers.ValidationError(exc.messages)
+
+
+class AppointmentSerializer(AppointmentSaveMixin, serializers.ModelSerializer):
     """Serializer for the Appointment model."""
     
     client_name = serializers.CharField(source='client.get_full_name', read_only=True)
@@ -41,7 +62,7 @@ class AppointmentSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class AppointmentCreateSerializer(serializers.ModelSerializer):
+class AppointmentCreateSerializer(AppointmentSaveMixin, serializers.ModelSerializer):
     """Serializer for creating appointments."""
     
     class Meta:
@@ -60,8 +81,11 @@ class AppointmentCreateSerializer(serializers.ModelSerializer):
         
         # Check if the service belongs to the actor
         service = attrs.get('service')
-        if service and actor and service.actor != actor:
-            raise serializers.ValidationError("The service does not belong to the selected actor.")
+        if service and actor:
+            if service.actor_id != actor.id:
+                raise serializers.ValidationError("The service does not belong to the selected actor.")
+            if get_actor_service(actor.id, service.id) is None:
+                raise serializers.ValidationError(SERVICE_UNAVAILABLE_MESSAGE)
         
         # Time validations
         start_time = attrs.get('start_time')
@@ -79,38 +103,61 @@ class AppointmentCreateSerializer(serializers.ModelSerializer):
                     "Cannot schedule in the past."
                 )
             
-            # Check for conflicts with other appointments
+            # Check for conflicts with other appointments and blocks
             if actor:
-                conflicts = Appointment.objects.filter(
-                    actor=actor,
-                    status__in=['pending', 'confirmed'],
-                    start_time__lt=end_time,
-                    end_time__gt=start_time
-                )
+                conflicts = find_conflicts(actor.id, start_time, end_time)
                 
-                if conflicts.exists():
+                if any(kind == KIND_APPOINTMENT for kind, _ in conflicts):
                     raise serializers.ValidationError(
                         "There is already an appointment at this time for this actor."
                     )
-            
-            # Check for conflicts with blocks
-            if actor:
-                from .models import Block
-                blocks = Block.objects.filter(
-                    actor=actor,
-                    is_active=True,
-                    start_time__lt=end_time,
-                    end_time__gt=start_time
-                )
                 
-                if blocks.exists():
+                block_ids = [object_id for kind, object_id in conflicts if kind == KIND_BLOCK]
+                if block_ids:
+                    block = Block.objects.filter(id__in=block_ids).order_by('start_time').first()
                     raise serializers.ValidationError(
-                        f"This time is blocked: {blocks.first().title}"
+                        f"This time is blocked: {block.title if block else ''}"
+                    )
+                
+                if any(kind == KIND_RECURRENCE for kind, _ in conflicts):
+                    raise serializers.ValidationError(
+                        RECURRENCE_CONFLICT_MESSAGE
                     )
         
         return attrs
 
 
+class AppointmentBulkItemSerializer(serializers.Serializer):
+    """
+    Serializer for one item of a bulk appointment creation.
+
+    Related objects are plain ids so a whole batch can be resolved with one
+    query per table instead of one lookup per field and item.
+    """
+    
+    client = serializers.IntegerField(min_value=1)
+    actor = serializers.IntegerField(min_value=1)
+    service = serializers.IntegerField(min_value=1)
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+    notes = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    final_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, allow_null=True)
+    
+    def validate(self, attrs):
+        """Validates the appointment times."""
+        if attrs['start_time'] >= attrs['end_time']:
+            raise serializers.ValidationError(
+                "The start date/time must be before the end date/time."
+            )
+        
+        if attrs['start_time'] < timezone.now():
+            raise serializers.ValidationError(
+                "Cannot schedule in the past."
+            )
+        
+        return attrs
+
+
 class RecurrenceSerializer(serializers.ModelSerializer):
     """Serializer for the Recurrence model."""
     
@@ -120,9 +167,51 @@ class RecurrenceSerializer(serializers.ModelSerializer):
         model = Recurrence
         fields = [
             'id', 'actor', 'start_time', 'end_time', 'frequency', 'weekday',
-            'day_of_month', 'start_date', 'end_date', 'is_active', 'created_at', 'actor_name'
+            'day_of_month', 'start_date', 'end_date', 'is_active', 'materialized_until',
+            'created_at', 'actor_name'
+        ]
+        read_only_fields = ['id', 'materialized_until', 'created_at']
+
+
+class RecurrenceExceptionSerializer(serializers.ModelSerializer):
+    """Serializer for the RecurrenceException model."""
+    
+    class Meta:
+        model = RecurrenceException
+        fields = [
+            'id', 'recurrence', 'occurrence_date', 'is_cancelled', 'start_time', 'end_time', 'created_at'
         ]
         read_only_fields = ['id', 'created_at']
+    
+    def validate(self, attrs):
+        """Validates the exception against its recurrence."""
+        recurrence = attrs.get('recurrence', getattr(self.instance, 'recurrence', None))
+        occurrence_date = attrs.get('occurrence_date', getattr(self.instance, 'occurrence_date', None))
+        
+        request = self.context.get('request')
+        if recurrence and request and not request.user.is_superadmin:
+            if request.user.is_admin:
+                allowed = recurrence.actor.company_id == request.user.company_id
+            else:
+                allowed = recurrence.actor_id == request.user.id
+            if not allowed:
+                raise serializers.ValidationError("Permission denied.")
+        
+        if recurrence and occurrence_date:
+            if occurrence_date not in expand_recurrence(recurrence, occurrence_date, occurrence_date):
+                raise serializers.ValidationError(
+                    "The recurrence does not occur on this date."
+                )
+            
+            if not attrs.get('is_cancelled', getattr(self.instance, 'is_cancelled', False)):
+                start_time = attrs.get('start_time') or recurrence.start_time
+                end_time = attrs.get('end_time') or recurrence.end_time
+                if start_time >= end_time:
+                    raise serializers.ValidationError(
+                        "The start time must be before the end time."
+                    )
+        
+        return attrs
 
 
 class BlockSerializer(serializers.ModelSerializer):
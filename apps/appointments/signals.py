@@ -0,0 +1,132 @@
+"""
+Signal handlers for the appointments app.
+"""
+
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import Signal, receiver
+from apps.authentication.models import User
+from apps.companies.models import Company
+from .catalog import SCOPE_ACTOR, SCOPE_COMPANY, invalidate_catalog
+from .models import Appointment, Block, Recurrence, RecurrenceException, Service
+from .occupancy import invalidate_actor, invalidate_days, invalidate_interval, local_days
+
+
+# Sent with `instances` after appointments are inserted with bulk_create,
+# which bypasses post_save
+appointments_bulk_created = Signal()
+
+# Sent with `instances` after the status of many appointments is changed with
+# a single update(), which also bypasses post_save
+appointments_bulk_updated = Signal()
+
+
+def _snapshot(instance):
+    """Remembers the fields that place an instance on an actor's calendar."""
+    # Read __dict__ directly so deferred fields are never loaded here
+    instance._occupancy_snapshot = (
+        instance.__dict__.get('actor_id'),
+        instance.__dict__.get('start_time'),
+        instance.__dict__.get('end_time'),
+    )
+
+
+@receiver(post_init, sender=Appointment)
+@receiver(post_init, sender=Block)
+def remember_occupancy(sender, instance, **kwargs):
+    """Keeps the loaded actor and times so a later save can invalidate them."""
+    _snapshot(instance)
+
+
+@receiver(post_save, sender=Appointment)
+@receiver(post_save, sender=Block)
+def invalidate_occupancy_on_save(sender, instance, **kwargs):
+    """
+    Drops the cached occupancy of the days an appointment or block touches.
+
+    Both the previous and the current position are invalidated, so moving an
+    appointment to another day or actor refreshes both calendars.
+    """
+    previous_actor_id, previous_start, previous_end = getattr(instance, '_occupancy_snapshot', (None, None, None))
+    invalidate_interval(previous_actor_id, previous_start, previous_end)
+    if (previous_actor_id, previous_start, previous_end) != (instance.actor_id, instance.start_time, instance.end_time):
+        invalidate_interval(instance.actor_id, instance.start_time, instance.end_time)
+    _snapshot(instance)
+
+
+@receiver(post_delete, sender=Appointment)
+@receiver(post_delete, sender=Block)
+def invalidate_occupancy_on_delete(sender, instance, **kwargs):
+    """Drops the cached occupancy of the days a deleted appointment or block touched."""
+    invalidate_interval(instance.actor_id, instance.start_time, instance.end_time)
+
+
+@receiver(appointments_bulk_created, sender=Appointment)
+@receiver(appointments_bulk_updated, sender=Appointment)
+def invalidate_occupancy_on_bulk_change(sender, instances, **kwargs):
+    """Drops the cached occupancy of every day touched by bulk-created or bulk-updated appointments."""
+    days = {}
+    for instance in instances:
+        days.setdefault(instance.actor_id, set()).update(local_days(instance.start_time, instance.end_time))
+    for actor_id, actor_days in days.items():
+        invalidate_days(actor_id, actor_days)
+
+
+@receiver(post_init, sender=RecurrenceException)
+def remember_exception_date(sender, instance, **kwargs):
+    """Keeps the loaded occurrence date so a later save can invalidate it."""
+    instance._occupancy_date = instance.__dict__.get('occurrence_date')
+
+
+@receiver(post_save, sender=RecurrenceException)
+@receiver(post_delete, sender=RecurrenceException)
+def invalidate_occupancy_on_exception_change(sender, instance, **kwargs):
+    """Drops the cached occupancy of the days whose occurrence was changed."""
+    days = {instance.occurrence_date, getattr(instance, '_occupancy_date', None)} - {None}
+    invalidate_days(instance.recurrence.actor_id, days)
+    instance._occupancy_date = instance.occurrence_date
+
+
+@receiver(post_save, sender=Recurrence)
+@receiver(post_delete, sender=Recurrence)
+def invalidate_occupancy_on_recurrence_change(sender, instance, **kwargs):
+    """Recurrences span open-ended ranges, so the whole actor cache is dropped."""
+    invalidate_actor(instance.actor_id)
+
+
+@receiver(post_init, sender=Service)
+def remember_catalog_scopes(sender, instance, **kwargs):
+    """Keeps the loaded company and actor so a later save can invalidate them."""
+    instance._catalog_snapshot = (instance.__dict__.get('company_id'), instance.__dict__.get('actor_id'))
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def invalidate_catalog_on_service_change(sender, instance, **kwargs):
+    """Drops the cached catalogs of the previous and current company and actor of a service."""
+    previous_company_id, previous_actor_id = getattr(instance, '_catalog_snapshot', (None, None))
+    for company_id in {previous_company_id, instance.company_id}:
+        invalidate_catalog(SCOPE_COMPANY, company_id)
+    for actor_id in {previous_actor_id, instance.actor_id}:
+        invalidate_catalog(SCOPE_ACTOR, actor_id)
+    instance._catalog_snapshot = (instance.company_id, instance.actor_id)
+
+
+@receiver(post_save, sender=User)
+def invalidate_catalog_on_actor_change(sender, instance, created, update_fields=None, **kwargs):
+    """Drops the catalogs that show the name or status of a user offering services."""
+    # Logins only touch last_login, which the catalog does not hold
+    if created or (update_fields is not None and set(update_fields) <= {'last_login'}):
+        return
+    company_ids = set(Service.objects.filter(actor=instance).values_list('company_id', flat=True))
+    if company_ids:
+        invalidate_catalog(SCOPE_ACTOR, instance.id)
+        for company_id in company_ids:
+            invalidate_catalog(SCOPE_COMPANY, company_id)
+
+
+@receiver(post_save, sender=Company)
+def invalidate_catalog_on_company_change(sender, instance, created, update_fields=None, **kwargs):
+    """Drops the catalog of a company whose name may have changed."""
+    if created or (update_fields is not None and 'name' not in update_fields):
+        return
+    invalidate_catalog(SCOPE_COMPANY, instance.id)
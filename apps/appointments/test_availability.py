@@ -0,0 +1,352 @@
+"""
+Tests for the appointments availability engine.
+"""
+
+from datetime import datetime, time, timedelta
+import numpy as np
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from apps.companies.models import Company
+from apps.authentication.models import User
+from .models import Service, Appointment, Recurrence, Block
+from .availability import (
+    merge_intervals,
+    subtract_intervals,
+    split_into_slots,
+    find_slot_starts,
+    get_busy_intervals,
+    get_available_slots,
+    aget_available_slots,
+    search_available_slots,
+)
+from .occupancy import combine_aware
+from .occurrences import expand_recurrence
+
+
+def _at(hour, minute=0):
+    """Returns an aware datetime on a fixed day for interval tests."""
+    return timezone.make_aware(datetime(2030, 1, 7, hour, minute))
+
+
+class IntervalArithmeticTest(TestCase):
+    """Tests for the interval helpers."""
+
+    def test_merge_intervals(self):
+        """Tests that overlapping and touching intervals are coalesced."""
+        merged = merge_intervals([
+            (_at(10), _at(11)),
+            (_at(8), _at(9)),
+            (_at(9), _at(9, 30)),
+            (_at(10, 30), _at(12)),
+        ])
+
+        self.assertEqual(merged, [(_at(8), _at(9, 30)), (_at(10), _at(12))])
+
+    def test_subtract_intervals(self):
+        """Tests that busy intervals are removed from the windows."""
+        windows = [(_at(8), _at(12)), (_at(13), _at(18))]
+        busy = [(_at(7), _at(8, 30)), (_at(10), _at(11)), (_at(11, 30), _at(14))]
+
+        free = subtract_intervals(windows, busy)
+
+        self.assertEqual(free, [
+            (_at(8, 30), _at(10)),
+            (_at(11), _at(11, 30)),
+            (_at(14), _at(18)),
+        ])
+
+    def test_split_into_slots(self):
+        """Tests slot generation inside free intervals."""
+        slots = split_into_slots(
+            [(_at(8), _at(9, 15))],
+            timedelta(minutes=30),
+            timedelta(minutes=30)
+        )
+
+        self.assertEqual(slots, [(_at(8), _at(8, 30)), (_at(8, 30), _at(9))])
+
+    def test_expand_weekly_recurrence(self):
+        """Tests that weekly recurrences only occur on their weekday."""
+        recurrence = Recurrence(
+            start_time=time(9, 0),
+            end_time=time(10, 0),
+            frequency='weekly',
+            weekday=0,
+            start_date=datetime(2030, 1, 1).date()
+        )
+
+        days = list(expand_recurrence(recurrence, datetime(2030, 1, 1).date(), datetime(2030, 1, 31).date()))
+
+        self.assertEqual([day.day for day in days], [7, 14, 21, 28])
+
+    def test_find_slot_starts(self):
+        """Tests vectorized slot detection on a free-time bitmap."""
+        free = np.array([
+            [True, True, True, True, False, True, True, True],
+            [False, True, True, True, True, True, True, False],
+        ])
+
+        starts = find_slot_starts(free, 2, 2)
+
+        self.assertEqual(np.nonzero(starts[0])[0].tolist(), [0, 2, 5])
+        self.assertEqual(np.nonzero(starts[1])[0].tolist(), [1, 3, 5])
+
+
+@override_settings(APPOINTMENT_WORKING_HOURS=('08:00', '12:00'), APPOINTMENT_SLOT_STEP_MINUTES=30)
+class AvailabilityEngineTest(TestCase):
+    """Tests for the database-backed availability engine."""
+
+    def setUp(self):
+        """Initial setup for tests."""
+        cache.clear()
+
+        self.company = Company.objects.create(
+            name="Test Barber Shop",
+            cnpj="12.345.678/0001-90"
+        )
+
+        self.actor = User.objects.create_user(
+            username="actor",
+            email="actor@example.com",
+            password="testpass123",
+            role="actor",
+            company=self.company
+        )
+
+        self.customer = User.objects.create_user(
+            username="customer",
+            email="customer@example.com",
+            password="testpass123",
+            role="user",
+            company=self.company
+        )
+
+        self.service = Service.objects.create(
+            name="Hair Cut",
+            duration_minutes=60,
+            base_price=25.00,
+            company=self.company,
+            actor=self.actor
+        )
+
+        self.day = timezone.localdate() + timedelta(days=7)
+
+    def test_empty_calendar(self):
+        """Tests that the whole working window is bookable."""
+        slots = get_available_slots(self.actor.id, self.day, self.day, 60)
+
+        starts = [timezone.localtime(start).strftime('%H:%M') for start, _ in slots]
+        self.assertEqual(starts, ['08:00', '08:30', '09:00', '09:30', '10:00', '10:30', '11:00'])
+
+    def test_appointments_blocks_and_recurrences_are_subtracted(self):
+        """Tests that every busy source is removed from the slots."""
+        Appointment.objects.create(
+            client=self.customer,
+            actor=self.actor,
+            service=self.service,
+            start_time=combine_aware(self.day, time(8, 0)),
+            end_time=combine_aware(self.day, time(9, 0)),
+            status='confirmed'
+        )
+        Appointment.objects.create(
+            client=self.customer,
+            actor=self.actor,
+            service=self.service,
+            start_time=combine_aware(self.day, time(9, 0)),
+            end_time=combine_aware(self.day, time(10, 0)),
+            status='cancelled'
+        )
+        Block.objects.create(
+            actor=self.actor,
+            title="Lunch",
+            start_time=combine_aware(self.day, time(11, 0)),
+            end_time=combine_aware(self.day, time(12, 0))
+        )
+        Recurrence.objects.create(
+            actor=self.actor,
+            start_time=time(10, 0),
+            end_time=time(10, 30),
+            frequency='daily',
+            start_date=self.day
+        )
+
+        slots = get_available_slots(self.actor.id, self.day, self.day, 30)
+
+        starts = [timezone.localtime(start).strftime('%H:%M') for start, _ in slots]
+        self.assertEqual(starts, ['09:00', '09:30', '10:30'])
+
+    def test_async_slots_match_sync_engine(self):
+        """Tests that the async engine returns the same slots."""
+        Appointment.objects.create(
+            client=self.customer,
+            actor=self.actor,
+            service=self.service,
+            start_time=combine_aware(self.day, time(9, 0)),
+            end_time=combine_aware(self.day, time(10, 0)),
+            status='confirmed'
+        )
+        Recurrence.objects.create(
+            actor=self.actor,
+            start_time=time(11, 0),
+            end_time=time(11, 30),
+            frequency='daily',
+            start_date=self.day
+        )
+        end = self.day + timedelta(days=3)
+
+        self.assertEqual(
+            async_to_sync(aget_available_slots)(self.actor.id, self.day, end, 30),
+            get_available_slots(self.actor.id, self.day, end, 30)
+        )
+
+    def test_busy_intervals_query_count(self):
+        """Tests that busy intervals use one query per table."""
+        start = combine_aware(self.day, time(0, 0))
+        end = start + timedelta(days=30)
+
+        with self.assertNumQueries(3):
+            get_busy_intervals([self.actor.id], start, end)
+
+    def test_search_matches_single_actor_engine(self):
+        """Tests that the bitmap search agrees with the interval engine."""
+        Appointment.objects.create(
+            client=self.customer,
+            actor=self.actor,
+            service=self.service,
+            start_time=combine_aware(self.day, time(8, 45)),
+            end_time=combine_aware(self.day, time(9, 30)),
+            status='pending'
+        )
+
+        expected = [(start, end, self.actor.id) for start, end in get_available_slots(self.actor.id, self.day, self.day, 60)]
+        slots = search_available_slots({self.actor.id: 60}, self.day, self.day, 100)
+
+        self.assertEqual(slots, expected)
+
+    def test_search_orders_by_time_across_actors(self):
+        """Tests that the search returns the earliest slots of every actor."""
+        other_actor = User.objects.create_user(
+            username="other_actor",
+            email="other_actor@example.com",
+            password="testpass123",
+            role="actor",
+            company=self.company
+        )
+        Block.objects.create(
+            actor=self.actor,
+            title="Morning off",
+            start_time=combine_aware(self.day, time(8, 0)),
+            end_time=combine_aware(self.day, time(9, 0))
+        )
+
+        slots = search_available_slots({self.actor.id: 60, other_actor.id: 30}, self.day, self.day, 3)
+
+        self.assertEqual(
+            [(timezone.localtime(start).strftime('%H:%M'), actor_id) for start, _, actor_id in slots],
+            [('08:00', other_actor.id), ('08:30', other_actor.id), ('09:00', self.actor.id)]
+        )
+
+
+@override_settings(APPOINTMENT_WORKING_HOURS=('08:00', '12:00'), APPOINTMENT_SLOT_STEP_MINUTES=30)
+class AvailabilityEndpointTest(APITestCase):
+    """Tests for the availability endpoint."""
+
+    def setUp(self):
+        """Initial setup for tests."""
+        cache.clear()
+
+        self.company = Company.objects.create(
+            name="Test Barber Shop",
+            cnpj="12.345.678/0001-90"
+        )
+
+        self.actor = User.objects.create_user(
+            username="actor",
+            email="actor@example.com",
+            password="testpass123",
+            role="actor",
+            company=self.company
+        )
+
+        self.service = Service.objects.create(
+            name="Hair Cut",
+            duration_minutes=90,
+            base_price=25.00,
+            company=self.company,
+            actor=self.actor
+        )
+
+        self.day = timezone.localdate() + timedelta(days=7)
+        self.client.force_authenticate(user=self.actor)
+
+    def test_availability_sized_to_service(self):
+        """Tests that slots use the service duration."""
+        url = reverse('appointment-availability')
+        response = self.client.get(url, {
+            'actor_id': self.actor.id,
+            'date': self.day.isoformat(),
+            'service_id': self.service.id
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['duration_minutes'], 90)
+        self.assertEqual(response.data['times'], ['08:00', '08:30', '09:00', '09:30', '10:00', '10:30'])
+
+    def test_availability_date_range(self):
+        """Tests availability across several days."""
+        url = reverse('appointment-availability')
+        response = self.client.get(url, {
+            'actor_id': self.actor.id,
+            'start_date': self.day.isoformat(),
+            'end_date': (self.day + timedelta(days=2)).isoformat()
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['slots']), 24)
+        self.assertNotIn('times', response.data)
+
+    def test_availability_invalid_range(self):
+        """Tests that inverted ranges are rejected."""
+        url = reverse('appointment-availability')
+        response = self.client.get(url, {
+            'actor_id': self.actor.id,
+            'start_date': self.day.isoformat(),
+            'end_date': (self.day - timedelta(days=1)).isoformat()
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_availability(self):
+        """Tests the multi-actor availability search."""
+        other_actor = User.objects.create_user(
+            username="other_actor",
+            email="other_actor@example.com",
+            password="testpass123",
+            role="actor",
+            company=self.company
+        )
+        other_service = Service.objects.create(
+            name="Hair Cut",
+            duration_minutes=30,
+            base_price=20.00,
+            company=self.company,
+            actor=other_actor
+        )
+
+        url = reverse('appointment-availability-search')
+        response = self.client.get(url, {
+            'service_id': self.service.id,
+            'start_date': self.day.isoformat(),
+            'end_date': (self.day + timedelta(days=6)).isoformat(),
+            'limit': 5
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['slots']), 5)
+        self.assertEqual(response.data['slots'][0]['actor_id'], self.actor.id)
+        self.assertEqual(response.data['slots'][1]['service_id'], other_service.id)
@@ -0,0 +1,243 @@
+"""
+Tests for bulk appointment creation and status changes.
+"""
+
+from datetime import time, timedelta
+from unittest.mock import patch
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from apps.companies.models import Company
+from apps.authentication.models import User
+from .models import Service, Appointment, Block
+from .bulk import create_appointments, update_appointment_statuses
+from .occupancy import KIND_APPOINTMENT, combine_aware, find_conflicts
+
+
+class BulkAppointmentTest(APITestCase):
+    """Tests for the bulk_create action."""
+
+    def setUp(self):
+        """Initial setup for tests."""
+        cache.clear()
+
+        self.company = Company.objects.create(
+            name="Test Barber Shop",
+            cnpj="12.345.678/0001-90"
+        )
+
+        self.actor = User.objects.create_user(
+            username="actor",
+            email="actor@example.com",
+            password="testpass123",
+            role="actor",
+            company=self.company
+        )
+
+        self.customer = User.objects.create_user(
+            username="customer",
+            email="customer@example.com",
+            password="testpass123",
+            role="user",
+            company=self.company
+        )
+
+        self.service = Service.objects.create(
+            name="Hair Cut",
+            duration_minutes=30,
+            base_price=25.00,
+            company=self.company,
+            actor=self.actor
+        )
+
+        self.day = timezone.localdate() + timedelta(days=3)
+        self.client.force_authenticate(user=self.actor)
+
+    def _row(self, hour, minute=0, duration=30, day=None):
+        start = combine_aware(day or self.day, time(hour, minute))
+        return {
+            'client': self.customer.id,
+            'actor': self.actor.id,
+            'service': self.service.id,
+            'start_time': start.isoformat(),
+            'end_time': (start + timedelta(minutes=duration)).isoformat(),
+        }
+
+    def test_bulk_create_appointments(self):
+        """Tests that a batch is created with prices and occupancy refreshed."""
+        # Warm the cache so the signal-driven invalidation is exercised
+        find_conflicts(self.actor.id, combine_aware(self.day, time(0, 0)), combine_aware(self.day, time(23, 0)))
+
+        url = reverse('appointment-bulk-create')
+        response = self.client.post(url, [self._row(9), self._row(10), self._row(11)], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['created']), 3)
+        self.assertEqual(response.data['errors'], [])
+        self.assertEqual(response.data['created'][0]['service_name'], 'Hair Cut')
+        self.assertEqual(Appointment.objects.filter(final_price=self.service.base_price).count(), 3)
+
+        conflicts = find_conflicts(self.actor.id, combine_aware(self.day, time(9, 0)), combine_aware(self.day, time(12, 0)))
+        self.assertEqual(len([kind for kind, _ in conflicts if kind == KIND_APPOINTMENT]), 3)
+
+    def test_bulk_create_reports_item_errors(self):
+        """Tests per-item errors for existing, blocked and batch conflicts."""
+        Appointment.objects.create(
+            client=self.customer,
+            actor=self.actor,
+            service=self.service,
+            start_time=combine_aware(self.day, time(9, 0)),
+            end_time=combine_aware(self.day, time(9, 30)),
+            status='confirmed'
+        )
+        Block.objects.create(
+            actor=self.actor,
+            title="Lunch",
+            start_time=combine_aware(self.day, time(12, 0)),
+            end_time=combine_aware(self.day, time(13, 0))
+        )
+
+        url = reverse('appointment-bulk-create')
+        response = self.client.post(url, {'appointments': [
+            self._row(9, 15),
+            self._row(10),
+            self._row(10, 15),
+            self._row(12, 30),
+            self._row(14, duration=-30),
+            dict(self._row(15), service=999999),
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['created']), 1)
+        errors = {error['index']: str(error['errors']) for error in response.data['errors']}
+        self.assertEqual(sorted(errors), [0, 2, 3, 4, 5])
+        self.assertIn('already an appointment', errors[0])
+        self.assertIn('item 1', errors[2])
+        self.assertIn('Lunch', errors[3])
+        self.assertIn('before the end', errors[4])
+        self.assertIn('not found', errors[5])
+
+    def test_bulk_create_rejects_other_company(self):
+        """Tests that actors cannot create appointments for other companies."""
+        other_company = Company.objects.create(
+            name="Other Shop",
+            cnpj="98.765.432/0001-10"
+        )
+        other_actor = User.objects.create_user(
+            username="other_actor",
+            email="other_actor@example.com",
+            password="testpass123",
+            role="actor",
+            company=other_company
+        )
+        self.client.force_authenticate(user=other_actor)
+
+        url = reverse('appointment-bulk-create')
+        response = self.client.post(url, [self._row(9)], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Permission denied', str(response.data['errors']))
+        self.assertFalse(Appointment.objects.exists())
+
+    def test_query_count_does_not_grow_with_batch(self):
+        """Tests that the number of queries is independent of the batch size."""
+        def count_queries(rows):
+            cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                created, errors = create_appointments(self.actor, rows)
+            self.assertEqual(errors, {})
+            return len(context.captured_queries)
+
+        small = count_queries([self._row(8 + offset) for offset in range(2)])
+        large = count_queries([
+            self._row(8 + offset % 10, day=self.day + timedelta(days=1 + offset // 10)) for offset in range(60)
+        ])
+
+        self.assertEqual(small, large)
+
+
+    def test_bulk_status_cancels_and_notifies(self):
+        """Tests that a batch is cancelled with one notification task."""
+        created, _ = create_appointments(self.actor, [self._row(9), self._row(10), self._row(11)])
+        start = combine_aware(self.day, time(0, 0))
+        end = combine_aware(self.day, time(23, 0))
+        self.assertEqual(len(find_conflicts(self.actor.id, start, end)), 3)
+
+        url = reverse('appointment-bulk-status')
+        ids = [appointment.id for appointment in created]
+        with patch('apps.notifications.tasks.high_priority_send_appointment_notifications.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(url, {'appointments': ids, 'status': 'cancelled'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(response.data['updated']), sorted(ids))
+        self.assertEqual(set(Appointment.objects.values_list('status', flat=True)), {'cancelled'})
+        self.assertEqual(find_conflicts(self.actor.id, start, end), [])
+        delay.assert_called_once()
+        self.assertEqual(sorted(delay.call_args.args[0]), sorted([appointment_id, 'cancelled'] for appointment_id in ids))
+
+    def test_bulk_status_skips_unchanged(self):
+        """Tests that appointments already in the status are not updated again."""
+        created, _ = create_appointments(self.actor, [self._row(9), self._row(10)])
+
+        self.assertEqual(len(update_appointment_statuses(created, 'confirmed')), 2)
+        self.assertEqual(update_appointment_statuses(created, 'confirmed'), [])
+
+    def test_bulk_status_validation(self):
+        """Tests the status, id list and visibility checks."""
+        created, _ = create_appointments(self.actor, [self._row(9)])
+        url = reverse('appointment-bulk-status')
+
+        response = self.client.post(url, {'appointments': [created[0].id], 'status': 'done'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(url, {'appointments': [], 'status': 'cancelled'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(url, {'appointments': [created[0].id, 999999], 'status': 'cancelled'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(Appointment.objects.get().status, 'pending')
+
+    def test_bulk_status_reactivation_conflict(self):
+        """Tests that cancelled appointments cannot come back over the actor's active ones."""
+        cancelled, _ = create_appointments(self.actor, [self._row(9), self._row(10)])
+        update_appointment_statuses(cancelled, 'cancelled')
+        created, _ = create_appointments(self.actor, [self._row(9), self._row(10, 15)])
+        update_appointment_statuses(created[1:], 'cancelled')
+        cancelled.append(created.pop())
+
+        url = reverse('appointment-bulk-status')
+        response = self.client.post(url, {'appointments': [cancelled[0].id], 'status': 'confirmed'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        # The two at 10:00 and 10:15 overlap each other
+        with self.assertRaises(ValidationError):
+            update_appointment_statuses(cancelled[1:], 'pending')
+        self.assertEqual(len(update_appointment_statuses(cancelled[1:2], 'pending')), 1)
+        self.assertEqual(
+            sorted(Appointment.objects.exclude(status='cancelled').values_list('id', flat=True)),
+            [cancelled[1].id, created[0].id]
+        )
+
+    def test_status_transitions(self):
+        """Tests that completed appointments cannot be confirmed or cancelled."""
+        created, _ = create_appointments(self.actor, [self._row(9), self._row(10)])
+        Appointment.objects.filter(id=created[0].id).update(status='completed')
+
+        url = reverse('appointment-bulk-status')
+        ids = [appointment.id for appointment in created]
+        response = self.client.post(url, {'appointments': ids, 'status': 'cancelled'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(str(created[0].id), response.data['error'])
+
+        response = self.client.post(reverse('appointment-cancel', args=[created[0].id]))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            list(Appointment.objects.order_by('start_time').values_list('status', flat=True)),
+            ['completed', 'pending']
+        )
@@ -0,0 +1,228 @@
+"""
+Tests for the columnar calendar feed.
+"""
+
+import json
+from datetime import date, time, timedelta
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from apps.companies.models import Company
+from apps.authentication.models import User
+from .models import Service, Appointment, Recurrence, RecurrenceException, Block
+from .occupancy import combine_aware
+from .serializers import AppointmentSerializer
+
+
+class CalendarFeedTest(APITestCase):
+    """Tests for the appointment calendar action."""
+
+    def setUp(self):
+        """Initial setup for tests."""
+        cache.clear()
+
+        self.company = Company.objects.create(
+            name="Test Barber Shop",
+            cnpj="12.345.678/0001-90"
+        )
+
+        self.admin = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="testpass123",
+            role="admin",
+            company=self.company
+        )
+
+        self.customer = User.objects.create_user(
+            username="customer",
+            email="customer@example.com",
+            password="testpass123",
+            first_name="Ana",
+            last_name="Souza",
+            role="user",
+            company=self.company
+        )
+
+        self.actors = []
+        self.services = []
+        for index in range(2):
+            actor = User.objects.create_user(
+                username=f"actor{index}",
+                email=f"actor{index}@example.com",
+                password="testpass123",
+                first_name=f"Actor{index}",
+                role="actor",
+                company=self.company
+            )
+            self.actors.append(actor)
+            self.services.append(Service.objects.create(
+                name="Hair Cut",
+                duration_minutes=30,
+                base_price=25.00,
+                company=self.company,
+                actor=actor
+            ))
+
+        self.day = date(2030, 1, 7)
+        self.appointment = Appointment.objects.create(
+            client=self.customer,
+            actor=self.actors[0],
+            service=self.services[0],
+            start_time=combine_aware(self.day, time(10, 0)),
+            end_time=combine_aware(self.day, time(10, 30)),
+            status='confirmed'
+        )
+
+        self.url = reverse('appointment-calendar')
+        self.client.force_authenticate(user=self.admin)
+
+    def test_appointment_columns(self):
+        """Tests that appointments are encoded through the lookup tables."""
+        response = self.client.get(self.url, {'start_date': '2030-01-01', 'end_date': '2030-01-31'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        feed = response.data
+        appointments = feed['appointments']
+        self.assertEqual(appointments['id'], [self.appointment.id])
+        self.assertEqual(appointments['start'], [int(self.appointment.start_time.timestamp())])
+        self.assertEqual(appointments['duration'], [30 * 60])
+        self.assertEqual(feed['statuses'][appointments['status'][0]], 'confirmed')
+        self.assertEqual(feed['actors']['id'][appointments['actor'][0]], self.actors[0].id)
+        self.assertEqual(feed['actors']['name'][appointments['actor'][0]], "Actor0")
+        self.assertEqual(feed['clients']['name'][appointments['client'][0]], "Ana Souza")
+        self.assertEqual(feed['services']['name'][appointments['service'][0]], "Hair Cut")
+
+    def test_blocks_and_occurrences(self):
+        """Tests that overlapping blocks and uncancelled occurrences are listed."""
+        block = Block.objects.create(
+            actor=self.actors[1],
+            title="Vacation",
+            block_type='vacation',
+            start_time=combine_aware(self.day - timedelta(days=3), time(0, 0)),
+            end_time=combine_aware(self.day + timedelta(days=3), time(0, 0))
+        )
+        recurrence = Recurrence.objects.create(
+            actor=self.actors[0],
+            start_time=time(12, 0),
+            end_time=time(13, 0),
+            frequency='daily',
+            start_date=self.day,
+            end_date=self.day + timedelta(days=2)
+        )
+        RecurrenceException.objects.create(
+            recurrence=recurrence,
+            occurrence_date=self.day + timedelta(days=1),
+            is_cancelled=True
+        )
+
+        response = self.client.get(self.url, {
+            'start_date': self.day.isoformat(),
+            'end_date': (self.day + timedelta(days=6)).isoformat(),
+        })
+
+        feed = response.data
+        self.assertEqual(feed['blocks']['id'], [block.id])
+        self.assertEqual(feed['block_types'][feed['blocks']['type'][0]], 'vacation')
+        self.assertEqual(feed['occurrences']['recurrence'], [recurrence.id, recurrence.id])
+        self.assertEqual(feed['occurrences']['start'], [
+            int(combine_aware(self.day, time(12, 0)).timestamp()),
+            int(combine_aware(self.day + timedelta(days=2), time(12, 0)).timestamp()),
+        ])
+
+    def test_materialized_occurrences_are_listed_once(self):
+        """Tests that an occurrence booked as an appointment is only listed as the appointment."""
+        recurrence = Recurrence.objects.create(
+            actor=self.actors[1],
+            start_time=time(12, 0),
+            end_time=time(12, 30),
+            frequency='daily',
+            start_date=self.day,
+            end_date=self.day + timedelta(days=1)
+        )
+        booked = Appointment.objects.create(
+            client=self.customer,
+            actor=self.actors[1],
+            service=self.services[1],
+            start_time=combine_aware(self.day, time(12, 0)),
+            end_time=combine_aware(self.day, time(12, 30)),
+            status='confirmed',
+            recurrence=recurrence,
+            occurrence_date=self.day
+        )
+
+        response = self.client.get(self.url, {
+            'start_date': self.day.isoformat(),
+            'end_date': (self.day + timedelta(days=1)).isoformat(),
+        })
+
+        feed = response.data
+        self.assertEqual(feed['appointments']['id'], [self.appointment.id, booked.id])
+        self.assertEqual(feed['occurrences']['start'], [
+            int(combine_aware(self.day + timedelta(days=1), time(12, 0)).timestamp()),
+        ])
+
+    def test_actor_ids_filter(self):
+        """Tests narrowing the feed to some actors."""
+        response = self.client.get(self.url, {
+            'start_date': self.day.isoformat(),
+            'actor_ids': str(self.actors[1].id),
+        })
+
+        self.assertEqual(response.data['appointments']['id'], [])
+
+    def test_actor_only_sees_own_calendar(self):
+        """Tests that actors only get their own rows."""
+        self.client.force_authenticate(user=self.actors[1])
+
+        response = self.client.get(self.url, {'start_date': self.day.isoformat()})
+
+        self.assertEqual(response.data['appointments']['id'], [])
+
+    def test_invalid_parameters(self):
+        """Tests the parameter validation."""
+        for params in (
+            {},
+            {'start_date': '07/01/2030'},
+            {'start_date': '2030-01-07', 'end_date': '2030-01-06'},
+            {'start_date': '2030-01-01', 'end_date': '2030-03-01'},
+            {'start_date': '2030-01-07', 'actor_ids': '1,x'},
+        ):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_payload_is_compact(self):
+        """Tests that a busy month is far smaller than the serializer output."""
+        actors = User.objects.bulk_create([
+            User(
+                username=f"busy{index}",
+                email=f"busy{index}@example.com",
+                first_name="Busy",
+                last_name=f"Professional {index}",
+                role="actor",
+                company=self.company
+            )
+            for index in range(50)
+        ])
+        appointments = []
+        for actor in actors:
+            for offset in range(20):
+                day = self.day + timedelta(days=offset)
+                appointments.append(Appointment(
+                    client=self.customer,
+                    actor=actor,
+                    service=self.services[0],
+                    start_time=combine_aware(day, time(9, 0)),
+                    end_time=combine_aware(day, time(9, 30)),
+                    status='confirmed'
+                ))
+        Appointment.objects.bulk_create(appointments)
+
+        response = self.client.get(self.url, {'start_date': '2030-01-01', 'end_date': '2030-01-31'})
+
+        serialized = json.dumps(AppointmentSerializer(
+            Appointment.objects.select_related('client', 'actor', 'service'), many=True
+        ).data, separators=(',', ':'))
+        self.assertEqual(len(response.data['appointments']['id']), 1001)
+        self.assertLess(len(response.content) * 10, len(serialized))
@@ -0,0 +1,205 @@
+"""
+Tests for the cached service catalog.
+"""
+
+from datetime import time, timedelta
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from apps.companies.models import Company
+from apps.authentication.models import User
+from .models import Service
+from .serializers import AppointmentCreateSerializer, ServiceSerializer
+from .catalog import (
+    aget_actor_service,
+    get_actor_service,
+    get_actor_services,
+    get_company_services,
+    service_row,
+)
+from .occupancy import combine_aware
+
+
+class ServiceCatalogTest(TestCase):
+    """Tests for the per-company and per-actor service catalog."""
+
+    def setUp(self):
+        """Initial setup for tests."""
+        cache.clear()
+
+        self.company = Company.objects.create(
+            name="Test Barber Shop",
+            cnpj="12.345.678/0001-90"
+        )
+
+        self.actor = User.objects.create_user(
+            username="actor",
+            email="actor@example.com",
+            password="testpass123",
+            first_name="Ana",
+            last_name="Silva",
+            role="actor",
+            company=self.company
+        )
+
+        self.customer = User.objects.create_user(
+            username="customer",
+            email="customer@example.com",
+            password="testpass123",
+            role="user",
+            company=self.company
+        )
+
+        self.service = Service.objects.create(
+            name="Hair Cut",
+            duration_minutes=30,
+            base_price=25.00,
+            company=self.company,
+            actor=self.actor
+        )
+        self.inactive = Service.objects.create(
+            name="Beard",
+            duration_minutes=15,
+            base_price=10.00,
+            company=self.company,
+            actor=self.actor,
+            is_active=False
+        )
+
+    def test_holds_active_services(self):
+        """Tests the catalog entries and their serializer representation."""
+        entries = get_actor_services(self.actor.id)
+
+        self.assertEqual([entry['id'] for entry in entries], [self.service.id])
+        self.assertEqual(entries[0]['duration_minutes'], 30)
+        self.assertEqual(get_company_services(self.company.id), entries)
+
+        service = Service.objects.get(pk=self.service.pk)
+        self.assertEqual(service_row(entries[0]), ServiceSerializer(service).data)
+
+    def test_cached_reads(self):
+        """Tests that a warm catalog is read without queries."""
+        get_actor_services(self.actor.id)
+
+        with self.assertNumQueries(0):
+            get_actor_services(self.actor.id)
+            self.assertIsNotNone(get_actor_service(self.actor.id, self.service.id))
+            self.assertIsNotNone(async_to_sync(aget_actor_service)(self.actor.id, self.service.id))
+
+    def test_service_changes_invalidate(self):
+        """Tests that saving and deleting services refreshes the catalog."""
+        get_actor_services(self.actor.id)
+        get_company_services(self.company.id)
+
+        self.service.duration_minutes = 45
+        self.service.save()
+        self.assertEqual(get_actor_services(self.actor.id)[0]['duration_minutes'], 45)
+
+        self.inactive.is_active = True
+        self.inactive.save()
+        self.assertEqual(len(get_company_services(self.company.id)), 2)
+
+        self.inactive.delete()
+        self.assertEqual(len(get_company_services(self.company.id)), 1)
+
+    def test_service_move_invalidates_both_actors(self):
+        """Tests that moving a service to another actor refreshes both catalogs."""
+        other = User.objects.create_user(
+            username="other",
+            email="other@example.com",
+            password="testpass123",
+            role="actor",
+            company=self.company
+        )
+        get_actor_services(self.actor.id)
+        get_actor_services(other.id)
+
+        self.service.actor = other
+        self.service.save()
+
+        self.assertEqual(get_actor_services(self.actor.id), [])
+        self.assertEqual([entry['id'] for entry in get_actor_services(other.id)], [self.service.id])
+
+    def test_actor_and_company_changes_invalidate(self):
+        """Tests that renamed actors and companies refresh the catalog."""
+        get_company_services(self.company.id)
+
+        self.actor.first_name = "Beatriz"
+        self.actor.save()
+        self.assertEqual(get_company_services(self.company.id)[0]['actor_name'], "Beatriz Silva")
+
+        self.company.name = "New Name"
+        self.company.save()
+        self.assertEqual(get_company_services(self.company.id)[0]['company_name'], "New Name")
+
+    def test_booking_rejects_inactive_service(self):
+        """Tests that booking validation only accepts catalog services."""
+        day = timezone.localdate() + timedelta(days=3)
+        data = {
+            'client': self.customer.id,
+            'actor': self.actor.id,
+            'service': self.inactive.id,
+            'start_time': combine_aware(day, time(10, 0)),
+            'end_time': combine_aware(day, time(10, 15)),
+        }
+
+        serializer = AppointmentCreateSerializer(data=data)
+
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("The selected service is not available.", str(serializer.errors))
+
+        serializer = AppointmentCreateSerializer(data=dict(data, service=self.service.id))
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+
+class ServiceCatalogViewTest(APITestCase):
+    """Tests for the endpoints served from the service catalog."""
+
+    def setUp(self):
+        """Initial setup for tests."""
+        cache.clear()
+
+        self.company = Company.objects.create(
+            name="Test Barber Shop",
+            cnpj="12.345.678/0001-90"
+        )
+
+        self.actor = User.objects.create_user(
+            username="actor",
+            email="actor@example.com",
+            password="testpass123",
+            role="actor",
+            company=self.company
+        )
+
+        self.service = Service.objects.create(
+            name="Hair Cut",
+            duration_minutes=30,
+            base_price=25.00,
+            company=self.company,
+            actor=self.actor
+        )
+
+    def test_by_actor_query_count(self):
+        """Tests that a warm catalog answers by_actor without service queries."""
+        self.client.force_authenticate(user=self.actor)
+        url = reverse('service-by-actor')
+        self.client.get(url, {'actor_id': self.actor.id})
+
+        # The remaining queries come from the localization middleware
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'actor_id': self.actor.id})
+
+        self.assertEqual([row['id'] for row in response.data], [self.service.id])
+
+    def test_by_actor_invalid_id(self):
+        """Tests that a malformed actor_id is rejected."""
+        self.client.force_authenticate(user=self.actor)
+
+        response = self.client.get(reverse('service-by-actor'), {'actor_id': 'abc'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,169 @@
+"""
+Tests for the streaming appointment export.
+"""
+
+import csv
+import io
+import json
+from datetime import date, time, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import AsyncClient
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from apps.companies.models import Company
+from apps.authentication.models import User
+from secretariaVirtual.exports import StreamingExportMixin
+from .models import Service, Appointment
+from .occupancy import combine_aware
+
+
+class AppointmentExportTest(APITestCase):
+    """Tests for the appointment export action."""
+
+    def setUp(self):
+        """Initial setup for tests."""
+        cache.clear()
+
+        self.company = Company.objects.create(
+            name="Test Barber Shop",
+            cnpj="12.345.678/0001-90"
+        )
+
+        self.admin = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="testpass123",
+            role="admin",
+            company=self.company
+        )
+
+        self.customer = User.objects.create_user(
+            username="customer",
+            email="customer@example.com",
+            password="testpass123",
+            first_name="Ana",
+            last_name="Souza",
+            role="user",
+            company=self.company
+        )
+
+        self.actor = User.objects.create_user(
+            username="actor",
+            email="actor@example.com",
+            password="testpass123",
+            role="actor",
+            company=self.company
+        )
+
+        self.service = Service.objects.create(
+            name="Hair Cut",
+            duration_minutes=30,
+            base_price=25.00,
+            company=self.company,
+            actor=self.actor
+        )
+
+        self.day = date(2030, 1, 1)
+        Appointment.objects.bulk_create([
+            Appointment(
+                client=self.customer,
+                actor=self.actor,
+                service=self.service,
+                start_time=combine_aware(self.day + timedelta(days=offset), time(10, 0)),
+                end_time=combine_aware(self.day + timedelta(days=offset), time(10, 30)),
+                status='completed',
+                final_price=Decimal('25.00')
+            )
+            for offset in range(30)
+        ])
+
+        self.url = reverse('appointment-export')
+        self.client.force_authenticate(user=self.admin)
+
+    def test_ndjson(self):
+        """Tests the default NDJSON export."""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertIn('appointments.ndjson', response['Content-Disposition'])
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), 30)
+        self.assertEqual(rows[0]['client_first_name'], "Ana")
+        self.assertEqual(rows[0]['final_price'], '25.00')
+        self.assertLess(rows[0]['start_time'], rows[1]['start_time'])
+
+    def test_csv(self):
+        """Tests the CSV export."""
+        response = self.client.get(self.url, {'export_format': 'csv'})
+
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 30)
+        self.assertEqual(rows[0]['service_name'], "Hair Cut")
+        self.assertEqual(rows[0]['status'], 'completed')
+
+    def test_date_range(self):
+        """Tests that the list date filters apply to the export."""
+        response = self.client.get(self.url, {
+            'start_date': '2030-01-10',
+            'end_date': '2030-01-14',
+        })
+
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 5)
+
+    def test_scoped_to_user(self):
+        """Tests that clients only export their own appointments."""
+        other = User.objects.create_user(
+            username="other",
+            email="other@example.com",
+            password="testpass123",
+            role="user",
+            company=self.company
+        )
+        self.client.force_authenticate(user=other)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(b''.join(response.streaming_content), b'')
+
+    def test_invalid_format(self):
+        """Tests that unknown formats are rejected."""
+        response = self.client.get(self.url, {'export_format': 'xlsx'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_asgi_export_is_streamed_incrementally(self):
+        """Tests that under ASGI each chunk is produced only when the previous one was consumed."""
+        chunks_made = []
+        make_chunks = StreamingExportMixin._chunks
+
+        def record_chunks(view, lines):
+            for chunk in make_chunks(view, lines):
+                chunks_made.append(chunk)
+                yield chunk
+
+        client = AsyncClient()
+        client.force_login(self.admin)
+
+        async def first_chunks():
+            response = await client.get(self.url)
+            received = []
+            async for chunk in response.streaming_content:
+                received.append(chunk)
+                self.assertEqual(len(chunks_made), len(received))
+            return response, received
+
+        with patch('secretariaVirtual.exports.EXPORT_CHUNK_SIZE', 10), \
+                patch.object(StreamingExportMixin, '_chunks', record_chunks):
+            response, received = async_to_sync(first_chunks)()
+
+        self.assertTrue(response.is_async)
+        self.assertEqual(len(received), 3)
+        self.assertEqual(len(b''.join(received).splitlines()), 30)
@@ -0,0 +1,133 @@
+"""
+Tests for the values() fast path of the list endpoints.
+"""
+
+from datetime import date, time, timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from apps.companies.models import Company
+from apps.authentication.models import User
+from .models import Service, Appointment
+from .occupancy import combine_aware
+
+
+class FastListMixin:
+    """Helpers to compare the fast list path with the serializer output."""
+
+    def assertFastListMatches(self, url, params=None):
+        """Lists url with and without ?fast=true and compares the payloads."""
+        params = dict(params or {})
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with CaptureQueriesContext(connection) as context:
+            fast_response = self.client.get(url, {**params, 'fast': 'true'})
+        self.assertEqual(fast_response.status_code, status.HTTP_200_OK)
+        # Page links differ only by the fast parameter they carry along
+        self.assertEqual(fast_response.json()['results'], response.json()['results'])
+        if response.json()['next']:
+            self.assertIn('fast=true', fast_response.json()['next'])
+        return fast_response, len(context.captured_queries)
+
+
+class AppointmentFastListTest(FastListMixin, APITestCase):
+    """Tests for the appointment fast list."""
+
+    def setUp(self):
+        """Initial setup for tests."""
+        cache.clear()
+
+        self.company = Company.objects.create(
+            name="Test Barber Shop",
+            cnpj="12.345.678/0001-90"
+        )
+
+        self.admin = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="testpass123",
+            role="admin",
+            company=self.company
+        )
+
+        self.customer = User.objects.create_user(
+            username="customer",
+            email="customer@example.com",
+            password="testpass123",
+            first_name="Ana",
+            last_name="Souza",
+            role="user",
+            company=self.company
+        )
+
+        self.actor = User.objects.create_user(
+            username="actor",
+            email="actor@example.com",
+            password="testpass123",
+            first_name="Bruno",
+            role="actor",
+            company=self.company
+        )
+
+        self.service = Service.objects.create(
+            name="Hair Cut",
+            duration_minutes=30,
+            base_price=25.00,
+            company=self.company,
+            actor=self.actor
+        )
+
+        day = date(2030, 1, 7)
+        Appointment.objects.bulk_create([
+            Appointment(
+                client=self.customer,
+                actor=self.actor,
+                service=self.service,
+                start_time=combine_aware(day + timedelta(days=offset), time(10, 0)),
+                end_time=combine_aware(day + timedelta(days=offset), time(10, 30)),
+                status='confirmed' if offset % 2 else 'pending',
+                notes="Bring a photo" if offset % 3 else "",
+                final_price=Decimal('22.5') if offset % 2 else None
+            )
+            for offset in range(30)
+        ])
+
+        self.url = reverse('appointment-list')
+        self.client.force_authenticate(user=self.admin)
+
+    def test_matches_serializer(self):
+        """Tests that the fast rows equal the serializer rows."""
+        response, _ = self.assertFastListMatches(self.url, {'page_size': 100})
+
+        self.assertEqual(len(response.json()['results']), 30)
+
+    def test_cursor_pages_match(self):
+        """Tests that the fast path follows the same cursor pages."""
+        response, _ = self.assertFastListMatches(self.url, {'page_size': 7})
+
+        self.assertEqual(len(response.json()['results']), 7)
+        next_page = self.client.get(response.json()['next'])
+        self.assertEqual(next_page.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(next_page.json()['results']), 7)
+
+    def test_filters_apply(self):
+        """Tests that the list filters apply to the fast path."""
+        response, _ = self.assertFastListMatches(self.url, {
+            'start_date': '2030-01-10',
+            'end_date': '2030-01-12',
+        })
+
+        self.assertEqual(len(response.json()['results']), 3)
+
+    def test_single_list_query(self):
+        """Tests that the fast path reads the page in one query."""
+        _, queries = self.assertFastListMatches(self.url, {'page_size': 100})
+
+        # Two localization lookups from the feature flag middleware, the
+        # conditional GET validator and the list
+        self.assertLessEqual(queries, 4)
@@ -0,0 +1,79 @@
+"""
+Query plan tests for the scheduling indexes.
+
+The planner picks sequential scans on tiny tables no matter what, so sequential
+scans are disabled for each test. Avoiding a "Seq Scan" proves little, since the
+foreign key indexes on actor_id and client_id already do that, so each test
+checks that the plan uses its scheduling index by name.
+"""
+
+import re
+import unittest
+from datetime import timedelta
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from .models import Appointment, Block, Recurrence
+from .occupancy import ACTIVE_STATUSES
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', "Query plans are checked on PostgreSQL only")
+class SchedulingIndexPlanTest(TestCase):
+    """Checks that the hot scheduling queries are served by indexes."""
+
+    def setUp(self):
+        """Disables sequential scans for the test transaction."""
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        self.start = timezone.now()
+        self.end = self.start + timedelta(days=1)
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        pattern = rf'(Index Scan using|Index Only Scan using|Bitmap Index Scan on) {index_name}\b'
+        self.assertRegex(plan, re.compile(pattern), plan)
+
+    def test_active_appointments_in_range(self):
+        """Tests the occupancy and conflict lookup of appointments."""
+        queryset = Appointment.objects.filter(
+            actor_id__in=[1, 2],
+            status__in=ACTIVE_STATUSES,
+            start_time__lt=self.end,
+            end_time__gt=self.start
+        ).values_list('actor_id', 'id', 'start_time', 'end_time', 'recurrence_id', 'occurrence_date')
+
+        self.assertUsesIndex(queryset, 'appt_actor_active_range_idx')
+
+    def test_appointments_by_actor_and_status(self):
+        """Tests the listing of an actor's appointments filtered by status."""
+        queryset = Appointment.objects.filter(actor_id=1, status='completed').order_by('start_time')
+
+        self.assertUsesIndex(queryset, 'appt_actor_status_start_idx')
+
+    def test_appointments_by_client(self):
+        """Tests the listing of a client's appointments."""
+        queryset = Appointment.objects.filter(client_id=1).order_by('start_time')
+
+        self.assertUsesIndex(queryset, 'appt_client_start_idx')
+
+    def test_active_blocks_in_range(self):
+        """Tests the occupancy and conflict lookup of blocks."""
+        queryset = Block.objects.filter(
+            actor_id__in=[1, 2],
+            is_active=True,
+            start_time__lt=self.end,
+            end_time__gt=self.start
+        ).values_list('actor_id', 'id', 'start_time', 'end_time')
+
+        self.assertUsesIndex(queryset, 'block_actor_active_range_idx')
+
+    def test_active_recurrences(self):
+        """Tests the recurrence lookup of the occupancy loader."""
+        today = self.start.date()
+        queryset = Recurrence.objects.filter(
+            actor_id__in=[1, 2],
+            is_active=True,
+            start_date__lte=today
+        ).exclude(end_date__lt=today)
+
+        self.assertUsesIndex(queryset, 'recurrence_actor_active_idx')
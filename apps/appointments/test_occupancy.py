@@ -0,0 +1,181 @@
+"""
+Tests for the appointments occupancy cache.
+"""
+
+from datetime import time, timedelta
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from apps.companies.models import Company
+from apps.authentication.models import User
+from .models import Service, Appointment, Recurrence, Block
+from .serializers import AppointmentCreateSerializer
+from .occupancy import (
+    _cache_timeout,
+    _cache_values,
+    _get_versions,
+    KIND_APPOINTMENT,
+    KIND_BLOCK,
+    KIND_RECURRENCE,
+    combine_aware,
+    find_conflicts,
+    get_busy_entries,
+    get_day_entries,
+)
+
+
+class OccupancyCacheTest(TestCase):
+    """Tests for the per-actor day occupancy cache."""
+
+    def setUp(self):
+        """Initial setup for tests."""
+        cache.clear()
+
+        self.company = Company.objects.create(
+            name="Test Barber Shop",
+            cnpj="12.345.678/0001-90"
+        )
+
+        self.actor = User.objects.create_user(
+            username="actor",
+            email="actor@example.com",
+            password="testpass123",
+            role="actor",
+            company=self.company
+        )
+
+        self.customer = User.objects.create_user(
+            username="customer",
+            email="customer@example.com",
+            password="testpass123",
+            role="user",
+            company=self.company
+        )
+
+        self.service = Service.objects.create(
+            name="Hair Cut",
+            duration_minutes=30,
+            base_price=25.00,
+            company=self.company,
+            actor=self.actor
+        )
+
+        self.day = timezone.localdate() + timedelta(days=3)
+        self.appointment = Appointment.objects.create(
+            client=self.customer,
+            actor=self.actor,
+            service=self.service,
+            start_time=combine_aware(self.day, time(10, 0)),
+            end_time=combine_aware(self.day, time(10, 30)),
+            status='pending'
+        )
+
+    def _kinds(self, day):
+        start = combine_aware(day, time(0, 0))
+        entries = get_busy_entries([self.actor.id], start, start + timedelta(days=1))[self.actor.id]
+        return [(kind, object_id) for _, _, kind, object_id in entries]
+
+    def test_cached_day_needs_no_queries(self):
+        """Tests that a second read is served from the cache."""
+        self.assertEqual(self._kinds(self.day), [(KIND_APPOINTMENT, self.appointment.id)])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self._kinds(self.day), [(KIND_APPOINTMENT, self.appointment.id)])
+
+    def test_missing_days_are_loaded_together(self):
+        """Tests that several actors and days are loaded with one query per table."""
+        days = [self.day + timedelta(days=offset) for offset in range(7)]
+
+        with self.assertNumQueries(3):
+            entries = get_day_entries([self.actor.id, self.customer.id], days)
+
+        self.assertEqual(len(entries), 14)
+
+    def test_status_change_invalidates_day(self):
+        """Tests that cancelling an appointment frees its day."""
+        self._kinds(self.day)
+
+        self.appointment.status = 'cancelled'
+        self.appointment.save()
+
+        self.assertEqual(self._kinds(self.day), [])
+
+    def test_late_reader_write_is_never_read(self):
+        """Tests that a reader writing pre-commit rows after the commit cannot keep them cached."""
+        # The reader takes the day version and loads the rows before the booking commits
+        versions = _get_versions([self.actor.id], [self.day])
+        stale = {(self.actor.id, self.day): []}
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.appointment.status = 'confirmed'
+            self.appointment.start_time = combine_aware(self.day, time(11, 0))
+            self.appointment.end_time = combine_aware(self.day, time(11, 30))
+            self.appointment.save()
+
+        # ...and writes them back after the commit
+        cache.set_many(_cache_values(stale, [(self.actor.id, self.day)], versions), _cache_timeout())
+
+        self.assertEqual(self._kinds(self.day), [(KIND_APPOINTMENT, self.appointment.id)])
+
+    def test_moving_appointment_invalidates_both_days(self):
+        """Tests that the previous and new days are both refreshed."""
+        next_day = self.day + timedelta(days=1)
+        self._kinds(self.day)
+        self._kinds(next_day)
+
+        self.appointment.start_time = combine_aware(next_day, time(10, 0))
+        self.appointment.end_time = combine_aware(next_day, time(10, 30))
+        self.appointment.save()
+
+        self.assertEqual(self._kinds(self.day), [])
+        self.assertEqual(self._kinds(next_day), [(KIND_APPOINTMENT, self.appointment.id)])
+
+    def test_block_delete_invalidates_day(self):
+        """Tests that deleting a block frees its day."""
+        block = Block.objects.create(
+            actor=self.actor,
+            title="Maintenance",
+            start_time=combine_aware(self.day, time(14, 0)),
+            end_time=combine_aware(self.day, time(15, 0))
+        )
+        self.assertIn((KIND_BLOCK, block.id), self._kinds(self.day))
+
+        block.delete()
+
+        self.assertNotIn((KIND_BLOCK, block.id), self._kinds(self.day))
+
+    def test_recurrence_change_invalidates_actor(self):
+        """Tests that recurrences invalidate every cached day of the actor."""
+        self._kinds(self.day)
+
+        recurrence = Recurrence.objects.create(
+            actor=self.actor,
+            start_time=time(8, 0),
+            end_time=time(9, 0),
+            frequency='daily',
+            start_date=timezone.localdate()
+        )
+
+        self.assertIn((KIND_RECURRENCE, recurrence.id), self._kinds(self.day))
+
+    def test_find_conflicts_excludes_appointment(self):
+        """Tests conflict lookup against the cache."""
+        start = self.appointment.start_time
+        end = self.appointment.end_time
+
+        self.assertEqual(find_conflicts(self.actor.id, start, end), [(KIND_APPOINTMENT, self.appointment.id)])
+        self.assertEqual(find_conflicts(self.actor.id, start, end, exclude_appointment_id=self.appointment.id), [])
+        self.assertEqual(find_conflicts(self.actor.id, end, end + timedelta(minutes=30)), [])
+
+    def test_serializer_rejects_cached_conflict(self):
+        """Tests that booking validation uses the cached occupancy."""
+        serializer = AppointmentCreateSerializer(data={
+            'client': self.customer.id,
+            'actor': self.actor.id,
+            'service': self.service.id,
+            'start_time': combine_aware(self.day, time(10, 15)).isoformat(),
+            'end_time': combine_aware(self.day, time(10, 45)).isoformat(),
+        })
+
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('already an appointment', str(serializer.errors))
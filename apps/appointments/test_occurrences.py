@@ -0,0 +1,172 @@
+"""
+Tests for virtual recurrence occurrences.
+"""
+
+from datetime import time, timedelta
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from apps.companies.models import Company
+from apps.authentication.models import User
+from .models import Service, Appointment, Recurrence, RecurrenceException
+from .occupancy import KIND_RECURRENCE, find_conflicts
+from .occurrences import combine_aware, iter_occurrences, load_exceptions
+from .serializers import RECURRENCE_CONFLICT_MESSAGE
+
+
+class OccurrenceTest(APITestCase):
+    """Tests for on-the-fly recurrence expansion."""
+
+    def setUp(self):
+        """Initial setup for tests."""
+        cache.clear()
+
+        self.company = Company.objects.create(
+            name="Test Barber Shop",
+            cnpj="12.345.678/0001-90"
+        )
+
+        self.actor = User.objects.create_user(
+            username="actor",
+            email="actor@example.com",
+            password="testpass123",
+            role="actor",
+            company=self.company
+        )
+
+        self.customer = User.objects.create_user(
+            username="customer",
+            email="customer@example.com",
+            password="testpass123",
+            role="user",
+            company=self.company
+        )
+
+        self.service = Service.objects.create(
+            name="Hair Cut",
+            duration_minutes=30,
+            base_price=25.00,
+            company=self.company,
+            actor=self.actor
+        )
+
+        self.today = timezone.localdate()
+        self.recurrence = Recurrence.objects.create(
+            actor=self.actor,
+            start_time=time(12, 0),
+            end_time=time(13, 0),
+            frequency='daily',
+            start_date=self.today
+        )
+        self.client.force_authenticate(user=self.actor)
+
+    def test_exceptions_cancel_and_reschedule(self):
+        """Tests that exceptions drop or move single occurrences."""
+        tomorrow = self.today + timedelta(days=1)
+        RecurrenceException.objects.create(
+            recurrence=self.recurrence,
+            occurrence_date=self.today,
+            is_cancelled=True
+        )
+        RecurrenceException.objects.create(
+            recurrence=self.recurrence,
+            occurrence_date=tomorrow,
+            start_time=time(15, 0),
+            end_time=time(16, 0)
+        )
+        end_date = self.today + timedelta(days=2)
+
+        occurrences = list(iter_occurrences(
+            [self.recurrence], self.today, end_date,
+            load_exceptions([self.recurrence.id], self.today, end_date)
+        ))
+
+        self.assertEqual([occurrence.date for occurrence in occurrences], [tomorrow, end_date])
+        self.assertTrue(occurrences[0].is_exception)
+        self.assertEqual(occurrences[0].start, combine_aware(tomorrow, time(15, 0)))
+        self.assertFalse(occurrences[1].is_exception)
+
+    def test_no_rows_are_materialized(self):
+        """Tests that occurrences are not stored as appointments by default."""
+        from .tasks import low_priority_generate_recurring_appointments
+
+        low_priority_generate_recurring_appointments()
+
+        self.assertFalse(Appointment.objects.exists())
+
+    def test_occupancy_follows_exceptions(self):
+        """Tests that the cached occupancy is invalidated by a cancellation."""
+        day = self.today + timedelta(days=2)
+        start = combine_aware(day, time(12, 0))
+        end = combine_aware(day, time(13, 0))
+
+        conflicts = find_conflicts(self.actor.id, start, end)
+        self.assertEqual(conflicts, [(KIND_RECURRENCE, self.recurrence.id)])
+
+        RecurrenceException.objects.create(
+            recurrence=self.recurrence,
+            occurrence_date=day,
+            is_cancelled=True
+        )
+
+        self.assertEqual(find_conflicts(self.actor.id, start, end), [])
+
+    def test_create_rejects_recurrence_time(self):
+        """Tests that bookings cannot overlap a virtual occurrence."""
+        day = self.today + timedelta(days=2)
+        url = reverse('appointment-list')
+
+        response = self.client.post(url, {
+            'client': self.customer.id,
+            'actor': self.actor.id,
+            'service': self.service.id,
+            'start_time': combine_aware(day, time(12, 30)).isoformat(),
+            'end_time': combine_aware(day, time(13, 0)).isoformat(),
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(RECURRENCE_CONFLICT_MESSAGE, str(response.data))
+
+    def test_occurrences_endpoint(self):
+        """Tests the calendar read of a recurrence window."""
+        RecurrenceException.objects.create(
+            recurrence=self.recurrence,
+            occurrence_date=self.today + timedelta(days=1),
+            is_cancelled=True
+        )
+        url = reverse('recurrence-occurrences')
+
+        response = self.client.get(url, {
+            'start_date': self.today.isoformat(),
+            'end_date': (self.today + timedelta(days=6)).isoformat(),
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 6)
+        self.assertEqual(response.data[0]['recurrence_id'], self.recurrence.id)
+        self.assertEqual(response.data[0]['date'], self.today.isoformat())
+
+    def test_occurrences_endpoint_limits_range(self):
+        """Tests that overly long windows are rejected."""
+        url = reverse('recurrence-occurrences')
+
+        response = self.client.get(url, {
+            'start_date': self.today.isoformat(),
+            'end_date': (self.today + timedelta(days=400)).isoformat(),
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_exception_must_match_an_occurrence(self):
+        """Tests that exceptions are only accepted on occurrence dates."""
+        url = reverse('recurrenceexception-list')
+
+        response = self.client.post(url, {
+            'recurrence': self.recurrence.id,
+            'occurrence_date': (self.today - timedelta(days=1)).isoformat(),
+            'is_cancelled': True,
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,139 @@
+"""
+Tests for appointment listing pagination and filters.
+"""
+
+from datetime import time, timedelta
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from apps.companies.models import Company
+from apps.authentication.models import User
+from .models import Service, Appointment
+from .occupancy import combine_aware
+
+
+class AppointmentListingTest(APITestCase):
+    """Tests for the keyset-paginated appointment list."""
+
+    def setUp(self):
+        """Initial setup for tests."""
+        cache.clear()
+
+        self.company = Company.objects.create(
+            name="Test Barber Shop",
+            cnpj="12.345.678/0001-90"
+        )
+
+        self.admin = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="testpass123",
+            role="admin",
+            company=self.company
+        )
+
+        self.customer = User.objects.create_user(
+            username="customer",
+            email="customer@example.com",
+            password="testpass123",
+            role="user",
+            company=self.company
+        )
+
+        self.actors = []
+        self.services = []
+        for index in range(2):
+            actor = User.objects.create_user(
+                username=f"actor{index}",
+                email=f"actor{index}@example.com",
+                password="testpass123",
+                role="actor",
+                company=self.company
+            )
+            self.actors.append(actor)
+            self.services.append(Service.objects.create(
+                name="Hair Cut",
+                duration_minutes=30,
+                base_price=25.00,
+                company=self.company,
+                actor=actor
+            ))
+
+        # Both actors share the same start times, so ties on start_time are
+        # broken by id
+        self.first_day = timezone.localdate() + timedelta(days=1)
+        appointments = []
+        for offset in range(12):
+            day = self.first_day + timedelta(days=offset)
+            for actor, service in zip(self.actors, self.services):
+                appointments.append(Appointment(
+                    client=self.customer,
+                    actor=actor,
+                    service=service,
+                    start_time=combine_aware(day, time(10, 0)),
+                    end_time=combine_aware(day, time(10, 30)),
+                    status='pending'
+                ))
+        Appointment.objects.bulk_create(appointments)
+
+        self.url = reverse('appointment-list')
+        self.client.force_authenticate(user=self.admin)
+
+    def _walk(self, params):
+        """Follows the next links and returns the ids and the queries of each page."""
+        ids = []
+        queries = []
+        response = self.client.get(self.url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            ids.extend(item['id'] for item in response.data['results'])
+            if not response.data['next']:
+                return ids, queries
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(response.data['next'])
+            queries.append(len(context.captured_queries))
+
+    def test_cursor_walks_every_appointment_once(self):
+        """Tests that following the cursors returns each row once, in order."""
+        ids, _ = self._walk({'page_size': 5})
+
+        expected = list(
+            Appointment.objects.order_by('-start_time', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(ids, expected)
+
+    def test_deep_pages_cost_the_same(self):
+        """Tests that every full page after the first runs the same queries."""
+        _, queries = self._walk({'page_size': 5})
+
+        # The last page is shorter, so only the full pages are compared
+        self.assertEqual(len(set(queries[:-1])), 1)
+
+    def test_date_range_filter(self):
+        """Tests the start_date/end_date filters."""
+        ids, _ = self._walk({
+            'start_date': (self.first_day + timedelta(days=2)).isoformat(),
+            'end_date': (self.first_day + timedelta(days=4)).isoformat(),
+        })
+
+        self.assertEqual(len(ids), 6)
+
+    def test_actor_filter(self):
+        """Tests the actor_id filter."""
+        ids, _ = self._walk({'actor_id': self.actors[0].id})
+
+        self.assertEqual(
+            set(ids),
+            set(Appointment.objects.filter(actor=self.actors[0]).values_list('id', flat=True))
+        )
+
+    def test_invalid_date(self):
+        """Tests that malformed dates are rejected."""
+        response = self.client.get(self.url, {'start_date': '31/12/2030'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
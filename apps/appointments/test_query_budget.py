@@ -0,0 +1,177 @@
+"""
+Query budget tests for the appointments list endpoints.
+
+Each endpoint is listed with 1, 20 and 100 rows and must stay within the same
+fixed number of queries, so a serializer that starts following a relation
+row by row fails here. Budgets include the two localization lookups the
+feature flag middleware runs on every request, and the validator query of
+the endpoints that answer conditional GETs.
+"""
+
+from datetime import date, time, timedelta
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from apps.companies.models import Company
+from apps.authentication.models import User
+from .models import Service, Appointment, Recurrence, RecurrenceException, Block
+from .occupancy import combine_aware
+
+ROW_COUNTS = (1, 20, 100)
+
+
+class QueryBudgetMixin:
+    """Helpers to measure list endpoints at growing sizes."""
+
+    def assertListBudget(self, url, create_rows, budget, params=None):
+        """Lists url after create_rows(first, last) grows it to each size in ROW_COUNTS."""
+        created = 0
+        for rows in ROW_COUNTS:
+            create_rows(created, rows)
+            created = rows
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(
+                len(context.captured_queries), budget,
+                f"{url} ran {len(context.captured_queries)} queries with {rows} rows"
+            )
+
+
+class AppointmentsQueryBudgetTest(QueryBudgetMixin, APITestCase):
+    """Query budgets for the appointments app."""
+
+    def setUp(self):
+        """Initial setup for tests."""
+        cache.clear()
+
+        self.company = Company.objects.create(
+            name="Test Barber Shop",
+            cnpj="12.345.678/0001-90"
+        )
+
+        self.admin = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="testpass123",
+            role="admin",
+            company=self.company
+        )
+
+        self.customer = User.objects.create_user(
+            username="customer",
+            email="customer@example.com",
+            password="testpass123",
+            role="user",
+            company=self.company
+        )
+
+        self.actors = User.objects.bulk_create([
+            User(
+                username=f"actor{index}",
+                email=f"actor{index}@example.com",
+                role="actor",
+                company=self.company
+            )
+            for index in range(max(ROW_COUNTS))
+        ])
+
+        self.service = Service.objects.create(
+            name="Hair Cut",
+            duration_minutes=30,
+            base_price=25.00,
+            company=self.company,
+            actor=self.actors[0]
+        )
+
+        self.day = date(2030, 1, 7)
+        self.client.force_authenticate(user=self.admin)
+
+    def test_services(self):
+        """Tests the service list."""
+        def create_rows(first, last):
+            Service.objects.bulk_create([
+                Service(
+                    name=f"Service {index}",
+                    duration_minutes=30,
+                    base_price=25.00,
+                    company=self.company,
+                    actor=self.actors[index]
+                )
+                for index in range(first, last)
+            ])
+
+        self.assertListBudget(reverse('service-list'), create_rows, 5)
+
+    def test_appointments(self):
+        """Tests the appointment list."""
+        def create_rows(first, last):
+            Appointment.objects.bulk_create([
+                Appointment(
+                    client=self.customer,
+                    actor=self.actors[index],
+                    service=self.service,
+                    start_time=combine_aware(self.day, time(10, 0)),
+                    end_time=combine_aware(self.day, time(10, 30)),
+                    status='pending'
+                )
+                for index in range(first, last)
+            ])
+
+        self.assertListBudget(reverse('appointment-list'), create_rows, 4, {'page_size': 100})
+
+    def test_recurrences(self):
+        """Tests the recurrence list."""
+        def create_rows(first, last):
+            Recurrence.objects.bulk_create([
+                Recurrence(
+                    actor=self.actors[index],
+                    start_time=time(12, 0),
+                    end_time=time(13, 0),
+                    frequency='daily',
+                    start_date=self.day
+                )
+                for index in range(first, last)
+            ])
+
+        self.assertListBudget(reverse('recurrence-list'), create_rows, 4)
+
+    def test_recurrence_exceptions(self):
+        """Tests the recurrence exception list."""
+        recurrence = Recurrence.objects.create(
+            actor=self.actors[0],
+            start_time=time(12, 0),
+            end_time=time(13, 0),
+            frequency='daily',
+            start_date=self.day
+        )
+
+        def create_rows(first, last):
+            RecurrenceException.objects.bulk_create([
+                RecurrenceException(
+                    recurrence=recurrence,
+                    occurrence_date=self.day + timedelta(days=index),
+                    is_cancelled=True
+                )
+                for index in range(first, last)
+            ])
+
+        self.assertListBudget(reverse('recurrenceexception-list'), create_rows, 4)
+
+    def test_blocks(self):
+        """Tests the block list."""
+        def create_rows(first, last):
+            Block.objects.bulk_create([
+                Block(
+                    actor=self.actors[index],
+                    title="Lunch",
+                    start_time=combine_aware(self.day, time(12, 0)),
+                    end_time=combine_aware(self.day, time(13, 0))
+                )
+                for index in range(first, last)
+            ])
+
+        self.assertListBudget(reverse('block-list'), create_rows, 4)
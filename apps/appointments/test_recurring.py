@@ -0,0 +1,207 @@
+"""
+Tests for recurring appointment generation.
+"""
+
+from datetime import datetime, time, timedelta
+from django.core.cache import cache
+from django.db import connection, transaction, IntegrityError
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from apps.companies.models import Company
+from apps.authentication.models import User
+from .models import Service, Appointment, Recurrence, Block
+from .occupancy import combine_aware
+from .recurring import filter_occurrences, generate_recurring_appointments, shard_size_for
+
+
+def _at(hour, minute=0):
+    """Returns an aware datetime on a fixed day for sweep tests."""
+    return timezone.make_aware(datetime(2030, 1, 7, hour, minute))
+
+
+@override_settings(APPOINTMENT_MATERIALIZE_RECURRENCES=True)
+class RecurringGenerationTest(TestCase):
+    """Tests for the set-based recurrence pipeline."""
+
+    def setUp(self):
+        """Initial setup for tests."""
+        cache.clear()
+
+        self.company = Company.objects.create(
+            name="Test Barber Shop",
+            cnpj="12.345.678/0001-90"
+        )
+
+        self.actor = User.objects.create_user(
+            username="actor",
+            email="actor@example.com",
+            password="testpass123",
+            role="actor",
+            company=self.company
+        )
+
+        self.customer = User.objects.create_user(
+            username="customer",
+            email="customer@example.com",
+            password="testpass123",
+            role="user",
+            company=self.company
+        )
+
+        self.service = Service.objects.create(
+            name="Hair Cut",
+            duration_minutes=30,
+            base_price=25.00,
+            company=self.company,
+            actor=self.actor
+        )
+
+        self.today = timezone.localdate()
+
+    def _daily(self, actor, start_hour=12, end_hour=13):
+        return Recurrence.objects.create(
+            actor=actor,
+            start_time=time(start_hour, 0),
+            end_time=time(end_hour, 0),
+            frequency='daily',
+            start_date=self.today
+        )
+
+    def test_filter_occurrences(self):
+        """Tests the sweep against busy time and other occurrences."""
+        occurrences = [
+            (_at(8), _at(9), 'a'),
+            (_at(9), _at(10), 'b'),
+            (_at(9, 30), _at(10, 30), 'c'),
+            (_at(11), _at(12), 'd'),
+            (_at(13), _at(14), 'e'),
+        ]
+        busy = [(_at(11, 30), _at(12, 30)), (_at(7), _at(8))]
+
+        accepted = filter_occurrences(occurrences, busy)
+
+        self.assertEqual([label for _, _, label in accepted], ['a', 'b', 'e'])
+
+    @override_settings(
+        APPOINTMENT_RECURRENCE_WORKERS=4,
+        APPOINTMENT_RECURRENCE_MIN_SHARD_SIZE=50,
+        APPOINTMENT_RECURRENCE_SHARD_SIZE=500
+    )
+    def test_shard_size_follows_workers(self):
+        """Tests that actors are spread over the workers within the shard size bounds."""
+        self.assertEqual(shard_size_for(0), 50)
+        self.assertEqual(shard_size_for(120), 50)
+        self.assertEqual(shard_size_for(1000), 250)
+        self.assertEqual(shard_size_for(1001), 251)
+        self.assertEqual(shard_size_for(10000), 500)
+
+    def test_generation_skips_blocks_and_appointments(self):
+        """Tests that occupied days are left out."""
+        self._daily(self.actor)
+        tomorrow = self.today + timedelta(days=1)
+        Block.objects.create(
+            actor=self.actor,
+            title="Day off",
+            start_time=combine_aware(tomorrow, time(0, 0)),
+            end_time=combine_aware(tomorrow, time(23, 59))
+        )
+        Appointment.objects.create(
+            client=self.customer,
+            actor=self.actor,
+            service=self.service,
+            start_time=combine_aware(tomorrow + timedelta(days=1), time(12, 30)),
+            end_time=combine_aware(tomorrow + timedelta(days=1), time(13, 30)),
+            status='pending'
+        )
+
+        created = generate_recurring_appointments(self.today)
+
+        self.assertEqual(created, 31 - 2)
+        generated = Appointment.objects.filter(notes__contains='Recurring')
+        self.assertEqual(generated.count(), created)
+        self.assertFalse(generated.filter(start_time__date=tomorrow).exists())
+        self.assertTrue(all(appointment.client_id == self.actor.id for appointment in generated))
+
+    def test_rerun_does_not_duplicate(self):
+        """Tests that a rerun skips recurrences already at their horizon."""
+        recurrence = self._daily(self.actor)
+
+        first = generate_recurring_appointments(self.today)
+        with self.assertNumQueries(1):
+            second = generate_recurring_appointments(self.today)
+
+        self.assertEqual(first, 31)
+        self.assertEqual(second, 0)
+        recurrence.refresh_from_db()
+        self.assertEqual(recurrence.materialized_until, self.today + timedelta(days=30))
+
+    def test_next_run_only_expands_new_dates(self):
+        """Tests that the watermark limits the next run to the new days."""
+        recurrence = self._daily(self.actor)
+        generate_recurring_appointments(self.today)
+
+        created = generate_recurring_appointments(self.today + timedelta(days=1))
+
+        self.assertEqual(created, 1)
+        self.assertEqual(
+            Appointment.objects.filter(recurrence=recurrence, occurrence_date=self.today + timedelta(days=31)).count(),
+            1
+        )
+
+    def test_occurrence_is_unique(self):
+        """Tests the (recurrence, occurrence_date) uniqueness key."""
+        recurrence = self._daily(self.actor)
+        generate_recurring_appointments(self.today)
+        existing = Appointment.objects.get(recurrence=recurrence, occurrence_date=self.today)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Appointment.objects.bulk_create([Appointment(
+                client=self.actor,
+                actor=self.actor,
+                service=self.service,
+                start_time=existing.start_time + timedelta(hours=2),
+                end_time=existing.end_time + timedelta(hours=2),
+                status='confirmed',
+                recurrence=recurrence,
+                occurrence_date=self.today
+            )])
+
+    def test_query_count_does_not_grow_with_actors(self):
+        """Tests that a chunk of actors costs a fixed number of queries."""
+        def count_queries(actors):
+            Appointment.objects.all().delete()
+            Recurrence.objects.all().delete()
+            for actor in actors:
+                # Weekly keeps the insert within one statement on every backend
+                Recurrence.objects.create(
+                    actor=actor,
+                    start_time=time(12, 0),
+                    end_time=time(13, 0),
+                    frequency='weekly',
+                    weekday=self.today.weekday(),
+                    start_date=self.today
+                )
+            with CaptureQueriesContext(connection) as context:
+                generate_recurring_appointments(self.today)
+            return len(context.captured_queries)
+
+        actors = []
+        for index in range(5):
+            actor = User.objects.create_user(
+                username=f"actor{index}",
+                email=f"actor{index}@example.com",
+                password="testpass123",
+                role="actor",
+                company=self.company
+            )
+            Service.objects.create(
+                name="Hair Cut",
+                duration_minutes=30,
+                base_price=25.00,
+                company=self.company,
+                actor=actor
+            )
+            actors.append(actor)
+
+        self.assertEqual(count_queries(actors[:1]), count_queries(actors))
@@ -2,8 +2,11 @@
 Tests for the appointments app.
 """
 
+from importlib import import_module
+from unittest import skipUnless
 from django.test import TestCase
 from django.core.exceptions import ValidationError
+from django.db import connection, transaction, IntegrityError
 from django.utils import timezone
 from datetime import datetime, timedelta
 from apps.companies.models import Company
@@ -154,6 +157,88 @@ class AppointmentModelTest(TestCase):
         
         # Price should be calculated automatically
         self.assertEqual(appointment.final_price, self.service.base_price)
+    
+    def test_appointment_save_rejects_overlap(self):
+        """Tests that an overlapping appointment cannot be saved."""
+        with self.assertRaises(ValidationError):
+            Appointment.objects.create(
+                client=self.client,
+                actor=self.actor,
+                service=self.service,
+                start_time=self.appointment.start_time + timedelta(minutes=15),
+                end_time=self.appointment.end_time + timedelta(minutes=15),
+                status='pending'
+            )
+        
+        # The surrounding transaction is still usable after the conflict
+        self.assertEqual(Appointment.objects.filter(actor=self.actor).count(), 1)
+    
+    def test_appointment_save_allows_overlap_with_cancelled(self):
+        """Tests that cancelled appointments do not block the slot."""
+        self.appointment.status = 'cancelled'
+        self.appointment.save()
+        
+        appointment = Appointment.objects.create(
+            client=self.client,
+            actor=self.actor,
+            service=self.service,
+            start_time=self.appointment.start_time,
+            end_time=self.appointment.end_time,
+            status='pending'
+        )
+        
+        self.assertIsNotNone(appointment.id)
+    
+    @skipUnless(connection.vendor == 'postgresql', 'Requires the PostgreSQL exclusion constraint')
+    def test_overlap_constraint_rejects_unvalidated_insert(self):
+        """Tests that the database rejects overlaps that skip model validation."""
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Appointment.objects.bulk_create([
+                Appointment(
+                    client=self.client,
+                    actor=self.actor,
+                    service=self.service,
+                    start_time=self.appointment.start_time,
+                    end_time=self.appointment.end_time,
+                    status='confirmed'
+                )
+            ])
+
+    @skipUnless(connection.vendor != 'postgresql', 'The exclusion constraint forbids the overlapping rows')
+    def test_overlap_migration_lists_existing_overlaps(self):
+        """Tests the lookup that stops the constraint migration on overlapping data."""
+        migration = import_module('apps.appointments.migrations.0002_appointment_no_overlap')
+        overlapping, adjacent, cancelled = Appointment.objects.bulk_create([
+            Appointment(
+                client=self.client,
+                actor=self.actor,
+                service=self.service,
+                start_time=self.appointment.start_time + timedelta(minutes=15),
+                end_time=self.appointment.end_time + timedelta(minutes=15),
+                status='pending'
+            ),
+            Appointment(
+                client=self.client,
+                actor=self.actor,
+                service=self.service,
+                start_time=self.appointment.end_time + timedelta(minutes=15),
+                end_time=self.appointment.end_time + timedelta(minutes=45),
+                status='confirmed'
+            ),
+            Appointment(
+                client=self.client,
+                actor=self.actor,
+                service=self.service,
+                start_time=self.appointment.start_time,
+                end_time=self.appointment.end_time,
+                status='cancelled'
+            ),
+        ])
+
+        # Touching appointments and cancelled ones are not overlaps
+        self.assertEqual(migration.find_overlaps(connection), [
+            (self.actor.id, self.appointment.id, overlapping.id),
+        ])
 
 
 class RecurrenceModelTest(TestCase):
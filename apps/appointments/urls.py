@@ -4,14 +4,20 @@ URLs for the appointments app.
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ServiceViewSet, AppointmentViewSet, RecurrenceViewSet, BlockViewSet
+from .views import (
+    ServiceViewSet, AppointmentViewSet, AppointmentAvailabilityView,
+    RecurrenceViewSet, RecurrenceExceptionViewSet, BlockViewSet
+)
 
 router = DefaultRouter()
 router.register(r'services', ServiceViewSet)
 router.register(r'appointments', AppointmentViewSet)
 router.register(r'recurrences', RecurrenceViewSet)
+router.register(r'recurrence-exceptions', RecurrenceExceptionViewSet)
 router.register(r'blocks', BlockViewSet)
 
+# Async views come first, so the router detail routes do not shadow them
 urlpatterns = [
+    path('appointments/availability/', AppointmentAvailabilityView.as_view(), name='appointment-availability'),
     path('', include(router.urls)),
 ]
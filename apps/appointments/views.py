@@ -4,38 +4,78 @@ Views for the appointments app.
 
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError
 from rest_framework.response import Response
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, Max
 from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from datetime import datetime, timedelta
-from .models import Service, Appointment, Recurrence, Block
+from secretariaVirtual.async_api import AsyncAPIView
+from secretariaVirtual.conditional import ConditionalGetMixin
+from secretariaVirtual.exports import StreamingExportMixin
+from .models import Service, Appointment, Recurrence, RecurrenceException, Block
+from .availability import DEFAULT_SLOT_STEP_MINUTES, aget_available_slots, search_available_slots
+from .bulk import BULK_STATUSES, MAX_BULK_APPOINTMENTS, create_appointments, update_appointment_statuses
+from .calendar_feed import build_calendar_feed
+from .catalog import aget_actor_service, get_actor_services, get_company_services, service_row
+from .fastpath import ValuesListMixin, appointment_row, appointment_values
+from .occupancy import day_start
+from .occurrences import iter_occurrences, load_exceptions
+from .pagination import AppointmentCursorPagination
 from .serializers import (
     ServiceSerializer, AppointmentSerializer, AppointmentCreateSerializer,
-    RecurrenceSerializer, BlockSerializer
+    RecurrenceSerializer, RecurrenceExceptionSerializer, BlockSerializer
 )
 
 
-class ServiceViewSet(viewsets.ModelViewSet):
+# Upper bound, in days, for a single availability query
+MAX_AVAILABILITY_DAYS = 31
+
+# Upper bounds for the multi-actor availability search
+MAX_SEARCH_DAYS = 62
+MAX_SEARCH_RESULTS = 100
+
+# Upper bound, in days, for a single recurrence occurrences query
+MAX_OCCURRENCE_DAYS = 93
+
+# Upper bound, in days, for a calendar feed (six weeks fill a month grid)
+MAX_CALENDAR_DAYS = 42
+
+
+class ServiceViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for managing services."""
     
     queryset = Service.objects.all()
     serializer_class = ServiceSerializer
     permission_classes = [permissions.IsAuthenticated]
     
+    def get_validator_aggregates(self):
+        """Services also show their actor and company names."""
+        return {
+            'rows': Count('pk'),
+            'last_id': Max('pk'),
+            'updated_at': Max('updated_at'),
+            'actor_updated_at': Max('actor__updated_at'),
+            'company_updated_at': Max('company__updated_at'),
+        }
+    
     def get_queryset(self):
         """Filters services based on the logged-in user."""
         user = self.request.user
+        queryset = Service.objects.select_related('actor', 'company')
         
         if user.is_superadmin:
-            return Service.objects.all()
+            return queryset
         elif user.is_admin:
-            return Service.objects.filter(company=user.company)
+            return queryset.filter(company=user.company)
         else:
-            return Service.objects.filter(actor=user)
+            return queryset.filter(actor=user)
     
     @action(detail=False, methods=['get'])
     def by_actor(self, request):
-        """Returns services for a specific actor."""
+        """Returns the active services of a specific actor, from the service catalog."""
         actor_id = request.query_params.get('actor_id')
         if not actor_id:
             return Response(
@@ -43,12 +83,16 @@ class ServiceViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        services = Service.objects.filter(actor_id=actor_id, is_active=True)
-        serializer = self.get_serializer(services, many=True)
-        return Response(serializer.data)
+        if not actor_id.isdigit():
+            return Response(
+                {'error': 'Invalid actor_id'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response([service_row(entry) for entry in get_actor_services(int(actor_id))])
 
 
-class AppointmentViewSet(viewsets.ModelViewSet):
+class AppointmentViewSet(ConditionalGetMixin, ValuesListMixin, StreamingExportMixin, viewsets.ModelViewSet):
     """ViewSet for managing appointments."""
     
     queryset = Appointment.objects.all()
@@ -57,7 +101,47 @@ class AppointmentViewSet(viewsets.ModelViewSet):
     filterset_fields = ['status', 'actor', 'client', 'service', 'start_time', 'end_time']
     search_fields = ['notes', 'service__name', 'actor__username', 'client__username']
     ordering_fields = ['start_time', 'end_time', 'created_at']
-    ordering = ['-start_time']
+    ordering = ['-start_time', '-id']
+    pagination_class = AppointmentCursorPagination
+    fast_values = appointment_values()
+    # get_queryset already bounds start_time by start_date/end_date
+    export_fields = (
+        ('id', 'id'),
+        ('start_time', 'start_time'),
+        ('end_time', 'end_time'),
+        ('status', 'status'),
+        ('service_id', 'service_id'),
+        ('service_name', 'service__name'),
+        ('actor_id', 'actor_id'),
+        ('actor_first_name', 'actor__first_name'),
+        ('actor_last_name', 'actor__last_name'),
+        ('client_id', 'client_id'),
+        ('client_first_name', 'client__first_name'),
+        ('client_last_name', 'client__last_name'),
+        ('final_price', 'final_price'),
+        ('created_at', 'created_at'),
+    )
+    export_ordering = ('start_time', 'id')
+    export_filename = 'appointments'
+    
+    def fast_row(self, values):
+        """Builds an AppointmentSerializer row for the fast list path."""
+        return appointment_row(values)
+    
+    def get_validator_fields(self):
+        """Appointments also show their client, actor and service names."""
+        return ('pk', 'updated_at', 'client__updated_at', 'actor__updated_at', 'service__updated_at')
+    
+    def get_validator_aggregates(self):
+        """Appointments also show their client, actor and service names."""
+        return {
+            'rows': Count('pk'),
+            'last_id': Max('pk'),
+            'updated_at': Max('updated_at'),
+            'client_updated_at': Max('client__updated_at'),
+            'actor_updated_at': Max('actor__updated_at'),
+            'service_updated_at': Max('service__updated_at'),
+        }
     
     def get_serializer_class(self):
         """Returns the appropriate serializer based on the action."""
@@ -68,32 +152,85 @@ class AppointmentViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Filters appointments based on the logged-in user."""
         user = self.request.user
-        queryset = Appointment.objects.all()
+        queryset = Appointment.objects.select_related('client', 'actor', 'service')
         
         if user.is_superadmin:
-            return queryset
+            pass
         elif user.is_admin:
-            return queryset.filter(service__company=user.company)
+            queryset = queryset.filter(service__company=user.company)
         elif user.is_actor:
-            return queryset.filter(actor=user)
+            queryset = queryset.filter(actor=user)
         else:
-            return queryset.filter(client=user)
+            queryset = queryset.filter(client=user)
         
         # Additional filters by URL parameters
         actor_id = self.request.query_params.get('actor_id')
         if actor_id:
-            queryset = queryset.filter(actor_id=actor_id)
+            if not actor_id.isdigit():
+                raise ParseError('Invalid actor_id')
+            queryset = queryset.filter(actor_id=int(actor_id))
         
-        start_date = self.request.query_params.get('start_date')
+        # Dates are turned into start_time bounds so the range can use the
+        # start_time indexes instead of a per-row date conversion
+        start_date = self._date_param('start_date')
         if start_date:
-            queryset = queryset.filter(start_time__date__gte=start_date)
+            queryset = queryset.filter(start_time__gte=day_start(start_date))
         
-        end_date = self.request.query_params.get('end_date')
+        end_date = self._date_param('end_date')
         if end_date:
-            queryset = queryset.filter(start_time__date__lte=end_date)
+            queryset = queryset.filter(start_time__lt=day_start(end_date + timedelta(days=1)))
         
         return queryset
     
+    def _date_param(self, name):
+        """Parses a YYYY-MM-DD query parameter."""
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise ParseError('Invalid date format. Use YYYY-MM-DD')
+    
+    @action(detail=False, methods=['post'])
+    def bulk_create(self, request):
+        """
+        Creates many appointments in one request.
+
+        Accepts a list of appointments (or {"appointments": [...]}). Valid
+        items are created even when others fail; errors are reported per item
+        with its index in the request.
+        """
+        rows = request.data.get('appointments') if isinstance(request.data, dict) else request.data
+        
+        if not isinstance(rows, list) or not rows:
+            return Response(
+                {'error': 'A non-empty list of appointments is required'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if len(rows) > MAX_BULK_APPOINTMENTS:
+            return Response(
+                {'error': f'At most {MAX_BULK_APPOINTMENTS} appointments can be created at once'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            created, errors = create_appointments(request.user, rows)
+        except ValidationError as exc:
+            return Response(
+                {'error': exc.messages[0]}, 
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        return Response(
+            {
+                'created': AppointmentSerializer(created, many=True).data,
+                'errors': [{'index': index, 'errors': errors[index]} for index in sorted(errors)],
+            },
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST
+        )
+    
     @action(detail=True, methods=['post'])
     def confirm(self, request, pk=None):
         """Confirms an appointment."""
@@ -105,11 +242,17 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
+        if not appointment.can_change_status('confirmed'):
+            return Response(
+                {'error': f'A {appointment.status} appointment cannot be confirmed'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
         appointment.status = 'confirmed'
         appointment.save()
         
         # Send notification
-        from apps.notificacoes.tasks import high_priority_send_appointment_notification
+        from apps.notifications.tasks import high_priority_send_appointment_notification
         high_priority_send_appointment_notification.delay(appointment.id, 'confirmed')
         
         return Response({'status': 'Appointment confirmed'})
@@ -125,42 +268,323 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
+        if not appointment.can_change_status('cancelled'):
+            return Response(
+                {'error': f'A {appointment.status} appointment cannot be cancelled'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
         appointment.status = 'cancelled'
         appointment.save()
         
         # Send notification
-        from apps.notificacoes.tasks import high_priority_send_appointment_notification
+        from apps.notifications.tasks import high_priority_send_appointment_notification
         high_priority_send_appointment_notification.delay(appointment.id, 'cancelled')
         
         return Response({'status': 'Appointment cancelled'})
     
+    @action(detail=False, methods=['post'])
+    def bulk_status(self, request):
+        """
+        Confirms or cancels many appointments in one request.
+
+        Takes {"appointments": [ids], "status": "confirmed" | "cancelled"}. The
+        appointments are updated with one query and their notifications are
+        sent as a single batch.
+        """
+        ids = request.data.get('appointments')
+        new_status = request.data.get('status')
+        
+        if new_status not in BULK_STATUSES:
+            return Response(
+                {'error': f'status must be one of: {", ".join(BULK_STATUSES)}'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if not isinstance(ids, list) or not ids or not all(isinstance(value, int) for value in ids):
+            return Response(
+                {'error': 'A non-empty list of appointment ids is required'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if len(ids) > MAX_BULK_APPOINTMENTS:
+            return Response(
+                {'error': f'At most {MAX_BULK_APPOINTMENTS} appointments can be updated at once'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        appointments = list(self.get_queryset().select_related('service__company').filter(id__in=ids))
+        
+        missing = set(ids) - {appointment.id for appointment in appointments}
+        if missing:
+            return Response(
+                {'error': f'Appointments not found: {", ".join(map(str, sorted(missing)))}'}, 
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        if not all(request.user.can_create_appointments(appointment.service.company) for appointment in appointments):
+            return Response(
+                {'error': 'Permission denied'}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        invalid = sorted(appointment.id for appointment in appointments if not appointment.can_change_status(new_status))
+        if invalid:
+            return Response(
+                {'error': f'Appointments cannot be {new_status}: {", ".join(map(str, invalid))}'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            updated = update_appointment_statuses(appointments, new_status)
+        except ValidationError as exc:
+            return Response(
+                {'error': exc.messages[0]}, 
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        if updated:
+            from apps.notifications.tasks import high_priority_send_appointment_notifications
+            events = [[appointment.id, new_status] for appointment in updated]
+            transaction.on_commit(lambda: high_priority_send_appointment_notifications.delay(events))
+        
+        return Response({
+            'status': f'{len(updated)} appointments {new_status}',
+            'updated': [appointment.id for appointment in updated],
+        })
+    
+    @action(detail=False, methods=['get'], url_path='availability/search', url_name='availability-search')
+    def search_availability(self, request):
+        """
+        Returns the first free slots for a service across every actor of its company.
+
+        Every actor offering an active service with the same name is searched,
+        each with the duration of their own service.
+        """
+        service_id = request.query_params.get('service_id')
+        start_date = request.query_params.get('start_date')
+        end_date = request.query_params.get('end_date', start_date)
+        limit = request.query_params.get('limit', '10')
+        
+        if not service_id or not start_date:
+            return Response(
+                {'error': 'service_id and start_date are required'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
+            end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
+        except ValueError:
+            return Response(
+                {'error': 'Invalid date format. Use YYYY-MM-DD'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if end_date_obj < start_date_obj:
+            return Response(
+                {'error': 'end_date must not be before start_date'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if (end_date_obj - start_date_obj).days >= MAX_SEARCH_DAYS:
+            return Response(
+                {'error': f'The date range cannot exceed {MAX_SEARCH_DAYS} days'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if not limit.isdigit() or not 0 < int(limit) <= MAX_SEARCH_RESULTS:
+            return Response(
+                {'error': f'limit must be between 1 and {MAX_SEARCH_RESULTS}'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            service = Service.objects.get(id=service_id, is_active=True)
+        except (Service.DoesNotExist, ValueError):
+            return Response(
+                {'error': 'Service not found'}, 
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        if not request.user.is_superadmin and request.user.company_id != service.company_id:
+            return Response(
+                {'error': 'Permission denied'}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        actor_services = {}
+        actor_durations = {}
+        offers = sorted(
+            (entry for entry in get_company_services(service.company_id)
+             if entry['name'] == service.name and entry['actor_is_active']),
+            key=lambda entry: entry['id']
+        )
+        for entry in offers:
+            if entry['actor'] not in actor_services:
+                actor_services[entry['actor']] = entry['id']
+                actor_durations[entry['actor']] = entry['duration_minutes']
+        
+        slots = search_available_slots(actor_durations, start_date_obj, end_date_obj, int(limit))
+        
+        return Response({
+            'slots': [
+                {
+                    'actor_id': actor_id,
+                    'service_id': actor_services[actor_id],
+                    'start': slot_start.isoformat(),
+                    'end': slot_end.isoformat(),
+                }
+                for slot_start, slot_end, actor_id in slots
+            ],
+        })
+    
     @action(detail=False, methods=['get'])
-    def availability(self, request):
-        """Returns available time slots for an actor on a specific date."""
+    def calendar(self, request):
+        """
+        Returns appointments, blocks and recurrence occurrences as a columnar feed.
+
+        Meant for month and week views over many actors; `actor_ids` takes a
+        comma-separated list to narrow the actors.
+        """
+        start_date = request.query_params.get('start_date')
+        end_date = request.query_params.get('end_date', start_date)
+        
+        if not start_date:
+            return Response(
+                {'error': 'start_date is required'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
+            end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
+        except ValueError:
+            return Response(
+                {'error': 'Invalid date format. Use YYYY-MM-DD'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if end_date_obj < start_date_obj:
+            return Response(
+                {'error': 'end_date must not be before start_date'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if (end_date_obj - start_date_obj).days >= MAX_CALENDAR_DAYS:
+            return Response(
+                {'error': f'The date range cannot exceed {MAX_CALENDAR_DAYS} days'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Blocks and recurrences follow the same visibility as their viewsets
+        user = request.user
+        blocks = Block.objects.all()
+        recurrences = Recurrence.objects.all()
+        if not user.is_superadmin:
+            if user.is_admin:
+                blocks = blocks.filter(actor__company=user.company)
+                recurrences = recurrences.filter(actor__company=user.company)
+            else:
+                blocks = blocks.filter(actor=user)
+                recurrences = recurrences.filter(actor=user)
+        appointments = self.get_queryset()
+        
+        actor_ids = request.query_params.get('actor_ids')
+        if actor_ids:
+            actor_ids = actor_ids.split(',')
+            if not all(actor_id.isdigit() for actor_id in actor_ids):
+                return Response(
+                    {'error': 'Invalid actor_ids'}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            actor_ids = [int(actor_id) for actor_id in actor_ids]
+            appointments = appointments.filter(actor_id__in=actor_ids)
+            blocks = blocks.filter(actor_id__in=actor_ids)
+            recurrences = recurrences.filter(actor_id__in=actor_ids)
+        
+        return Response(build_calendar_feed(
+            appointments, blocks, recurrences, start_date_obj, end_date_obj
+        ))
+
+
+class AppointmentAvailabilityView(AsyncAPIView):
+    """Available time slots of an actor, served as an async view."""
+    
+    permission_classes = [permissions.IsAuthenticated]
+    
+    async def get(self, request):
+        """
+        Returns available time slots for an actor.
+
+        Accepts either a single `date` or a `start_date`/`end_date` range. When
+        `service_id` is given, slots are sized to the service duration.
+        """
         actor_id = request.query_params.get('actor_id')
         date = request.query_params.get('date')
+        start_date = request.query_params.get('start_date', date)
+        end_date = request.query_params.get('end_date', start_date)
         
-        if not actor_id or not date:
+        if not actor_id or not start_date:
             return Response(
                 {'error': 'actor_id and date are required'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        if not actor_id.isdigit():
+            return Response(
+                {'error': 'Invalid actor_id'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        actor_id = int(actor_id)
+        
         try:
-            date_obj = datetime.strptime(date, '%Y-%m-%d').date()
+            start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
+            end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
         except ValueError:
             return Response(
                 {'error': 'Invalid date format. Use YYYY-MM-DD'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Implement availability logic
-        # For now, returns basic time slots
-        available_times = []
-        for hour in range(8, 18):  # 8am to 5pm
-            available_times.append(f"{hour:02d}:00")
+        if end_date_obj < start_date_obj:
+            return Response(
+                {'error': 'end_date must not be before start_date'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        return Response({'times': available_times})
+        if (end_date_obj - start_date_obj).days >= MAX_AVAILABILITY_DAYS:
+            return Response(
+                {'error': f'The date range cannot exceed {MAX_AVAILABILITY_DAYS} days'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        duration_minutes = DEFAULT_SLOT_STEP_MINUTES
+        service_id = request.query_params.get('service_id')
+        if service_id:
+            service = await aget_actor_service(actor_id, int(service_id)) if service_id.isdigit() else None
+            if service is None:
+                return Response(
+                    {'error': 'Service not found for this actor'}, 
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            duration_minutes = service['duration_minutes']
+        
+        slots = await aget_available_slots(actor_id, start_date_obj, end_date_obj, duration_minutes)
+        
+        data = {
+            'slots': [
+                {'start': slot_start.isoformat(), 'end': slot_end.isoformat()}
+                for slot_start, slot_end in slots
+            ],
+            'duration_minutes': duration_minutes,
+        }
+        
+        # Single-day queries keep the plain list of start times
+        if start_date_obj == end_date_obj:
+            data['times'] = [timezone.localtime(slot_start).strftime('%H:%M') for slot_start, _ in slots]
+        
+        return Response(data)
 
 
 class RecurrenceViewSet(viewsets.ModelViewSet):
@@ -173,13 +597,109 @@ class RecurrenceViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Filters recurrences based on the logged-in user."""
         user = self.request.user
+        queryset = Recurrence.objects.select_related('actor')
+        
+        if user.is_superadmin:
+            return queryset
+        elif user.is_admin:
+            return queryset.filter(actor__company=user.company)
+        else:
+            return queryset.filter(actor=user)
+    
+    @action(detail=False, methods=['get'])
+    def occurrences(self, request):
+        """
+        Returns the occurrences of the visible recurrences in a date range.
+
+        Occurrences are expanded on the fly and follow their exceptions;
+        `actor_id` narrows the result to a single actor.
+        """
+        start_date = request.query_params.get('start_date')
+        end_date = request.query_params.get('end_date', start_date)
+        
+        if not start_date:
+            return Response(
+                {'error': 'start_date is required'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
+            end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
+        except ValueError:
+            return Response(
+                {'error': 'Invalid date format. Use YYYY-MM-DD'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if end_date_obj < start_date_obj:
+            return Response(
+                {'error': 'end_date must not be before start_date'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if (end_date_obj - start_date_obj).days >= MAX_OCCURRENCE_DAYS:
+            return Response(
+                {'error': f'The date range cannot exceed {MAX_OCCURRENCE_DAYS} days'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        recurrences = self.get_queryset().filter(
+            is_active=True,
+            start_date__lte=end_date_obj
+        ).exclude(end_date__lt=start_date_obj)
+        
+        actor_id = request.query_params.get('actor_id')
+        if actor_id:
+            if not actor_id.isdigit():
+                return Response(
+                    {'error': 'Invalid actor_id'}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            recurrences = recurrences.filter(actor_id=int(actor_id))
+        
+        recurrences = list(recurrences)
+        exceptions = {}
+        if recurrences:
+            exceptions = load_exceptions(
+                [recurrence.id for recurrence in recurrences], start_date_obj, end_date_obj
+            )
+        
+        occurrences = sorted(
+            iter_occurrences(recurrences, start_date_obj, end_date_obj, exceptions),
+            key=lambda occurrence: (occurrence.start, occurrence.recurrence.id)
+        )
+        
+        return Response([
+            {
+                'recurrence_id': occurrence.recurrence.id,
+                'actor_id': occurrence.actor_id,
+                'date': occurrence.date.isoformat(),
+                'start': occurrence.start.isoformat(),
+                'end': occurrence.end.isoformat(),
+                'is_exception': occurrence.is_exception,
+            }
+            for occurrence in occurrences
+        ])
+
+
+class RecurrenceExceptionViewSet(viewsets.ModelViewSet):
+    """ViewSet for managing cancelled or rescheduled recurrence occurrences."""
+    
+    queryset = RecurrenceException.objects.all()
+    serializer_class = RecurrenceExceptionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        """Filters exceptions based on the logged-in user."""
+        user = self.request.user
         
         if user.is_superadmin:
-            return Recurrence.objects.all()
+            return RecurrenceException.objects.all()
         elif user.is_admin:
-            return Recurrence.objects.filter(actor__company=user.company)
+            return RecurrenceException.objects.filter(recurrence__actor__company=user.company)
         else:
-            return Recurrence.objects.filter(actor=user)
+            return RecurrenceException.objects.filter(recurrence__actor=user)
 
 
 class BlockViewSet(viewsets.ModelViewSet):
@@ -192,10 +712,11 @@ class BlockViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Filters blocks based on the logged-in user."""
         user = self.request.user
+        queryset = Block.objects.select_related('actor')
         
         if user.is_superadmin:
-            return Block.objects.all()
+            return queryset
         elif user.is_admin:
-            return Block.objects.filter(actor__company=user.company)
+            return queryset.filter(actor__company=user.company)
         else:
-            return Block.objects.filter(actor=user)
+            return queryset.filter(actor=user)
@@ -3,9 +3,48 @@ Models for the companies app.
 """
 
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 
+def _count_subquery(queryset, field):
+    """Counts the rows of queryset per value of field, for use as a subquery."""
+    return Coalesce(
+        Subquery(queryset.order_by().values(field).annotate(total=Count('pk')).values('total')),
+        0
+    )
+
+
+class CompanyQuerySet(models.QuerySet):
+    """QuerySet for companies."""
+    
+    def with_totals(self):
+        """Annotates the totals shown by the API, so listings avoid one count per row."""
+        from apps.authentication.models import User
+        from apps.appointments.models import Appointment
+        return self.annotate(
+            users_count=_count_subquery(User.objects.filter(company=OuterRef('pk')), 'company'),
+            appointments_today_count=_count_subquery(
+                Appointment.objects.filter(
+                    service__company=OuterRef('pk'),
+                    start_time__date=timezone.now().date(),
+                    status__in=['pending', 'confirmed']
+                ),
+                'service__company'
+            ),
+        )
+
+    def for_user(self, user):
+        """Returns the companies the user may see."""
+        if user.role == 'superadmin':
+            return self
+        elif user.role in ['admin', 'manager']:
+            return self.filter(id=user.company_id)
+        else:
+            return self.none()
+
+
 class Company(models.Model):
     """Model to represent a company."""
     
@@ -46,6 +85,8 @@ class Company(models.Model):
         verbose_name='Updated at'
     )
 
+    objects = CompanyQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Company'
         verbose_name_plural = 'Companies'
@@ -57,11 +98,15 @@ class Company(models.Model):
     @property
     def total_users(self):
         """Returns the total number of users in the company."""
+        if 'users_count' in self.__dict__:
+            return self.users_count
         return self.users.count()
 
     @property
     def total_appointments_today(self):
         """Returns the total number of appointments for today."""
+        if 'appointments_today_count' in self.__dict__:
+            return self.appointments_today_count
         today = timezone.now().date()
         from apps.appointments.models import Appointment
         return Appointment.objects.filter(
@@ -0,0 +1,33 @@
+"""
+Query budget tests for the companies list endpoint.
+"""
+
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from apps.authentication.models import User
+from apps.appointments.test_query_budget import QueryBudgetMixin
+from .models import Company
+
+
+class CompaniesQueryBudgetTest(QueryBudgetMixin, APITestCase):
+    """Query budgets for the companies app."""
+
+    def setUp(self):
+        """Initial setup for tests."""
+        self.superadmin = User.objects.create_user(
+            username="superadmin",
+            email="superadmin@example.com",
+            password="testpass123",
+            role="superadmin"
+        )
+        self.client.force_authenticate(user=self.superadmin)
+
+    def test_companies(self):
+        """Tests that the company totals are annotated instead of counted per row."""
+        def create_rows(first, last):
+            Company.objects.bulk_create([
+                Company(name=f"Company {index}", cnpj=f"{index:02d}.345.678/0001-90")
+                for index in range(first, last)
+            ])
+
+        self.assertListBudget(reverse('company-list'), create_rows, 5)
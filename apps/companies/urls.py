@@ -4,11 +4,12 @@ URLs for the companies app.
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CompanyViewSet
+from .views import CompanyViewSet, CompanyStatisticsView
 
 router = DefaultRouter()
 router.register(r'', CompanyViewSet)
 
 urlpatterns = [
+    path('<int:pk>/statistics/', CompanyStatisticsView.as_view(), name='company-statistics'),
     path('', include(router.urls)),
 ]
@@ -2,35 +2,49 @@
 Views for the companies app.
 """
 
+from django.db.models import Count, Max, Sum
+from django.http import Http404
 from rest_framework import viewsets, permissions
-from rest_framework.decorators import action
 from rest_framework.response import Response
+from secretariaVirtual.async_api import AsyncAPIView
+from secretariaVirtual.conditional import ConditionalGetMixin
 from .models import Company
 from .serializers import CompanySerializer
 
 
-class CompanyViewSet(viewsets.ModelViewSet):
+class CompanyViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for managing companies."""
     
     queryset = Company.objects.all()
     serializer_class = CompanySerializer
     permission_classes = [permissions.IsAuthenticated]
     
+    def get_validator_aggregates(self):
+        """Companies also show their user and appointment totals."""
+        return {
+            'rows': Count('pk'),
+            'last_id': Max('pk'),
+            'updated_at': Max('updated_at'),
+            'users': Sum('users_count'),
+            'appointments_today': Sum('appointments_today_count'),
+        }
+    
     def get_queryset(self):
         """Filters companies based on the logged-in user."""
-        user = self.request.user
-        
-        if user.role == 'superadmin':
-            return Company.objects.all()
-        elif user.role in ['admin', 'manager']:
-            return Company.objects.filter(id=user.company_id)
-        else:
-            return Company.objects.none()
+        return Company.objects.with_totals().for_user(self.request.user)
+
+
+class CompanyStatisticsView(AsyncAPIView):
+    """Returns company statistics, served as an async view."""
+    
+    permission_classes = [permissions.IsAuthenticated]
     
-    @action(detail=True, methods=['get'])
-    def statistics(self, request, pk=None):
+    async def get(self, request, pk):
         """Returns company statistics."""
-        company = self.get_object()
+        try:
+            company = await Company.objects.with_totals().for_user(request.user).aget(pk=pk)
+        except Company.DoesNotExist:
+            raise Http404
         
         stats = {
             'total_users': company.total_users,
@@ -2,6 +2,7 @@ from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.conf import settings
 from apps.appointments.models import Appointment
+from apps.appointments.signals import appointments_bulk_created, appointments_bulk_updated
 from .models import GoogleCalendarIntegration
 from .tasks import (
     sync_appointment_to_google_calendar,
@@ -36,6 +37,27 @@ def sync_appointment_to_google(sender, instance, created, **kwargs):
     sync_appointment_to_google_calendar.delay(instance.id)
 
 
+@receiver(appointments_bulk_created, sender=Appointment)
+@receiver(appointments_bulk_updated, sender=Appointment)
+def sync_bulk_changed_appointments_to_google(sender, instances, **kwargs):
+    """
+    Synchronizes bulk-created or bulk-updated appointments with Google Calendar.
+    """
+    if not getattr(settings, 'GOOGLE_CALENDAR_AUTO_SYNC', True):
+        return
+    
+    # One query finds every actor with an active integration
+    synced_actor_ids = set(GoogleCalendarIntegration.objects.filter(
+        user_id__in={instance.actor_id for instance in instances},
+        sync_enabled=True,
+        sync_direction__in=['bidirectional', 'to_google']
+    ).values_list('user_id', flat=True))
+    
+    for instance in instances:
+        if instance.actor_id in synced_actor_ids and instance.status in ['pending', 'confirmed']:
+            sync_appointment_to_google_calendar.delay(instance.id)
+
+
 @receiver(post_delete, sender=Appointment)
 def remove_appointment_from_google(sender, instance, **kwargs):
     """
@@ -0,0 +1,114 @@
+"""
+Query budget tests for the Google Calendar list endpoints.
+"""
+
+from datetime import date, time, timedelta
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from apps.companies.models import Company
+from apps.authentication.models import User
+from apps.appointments.models import Service, Appointment
+from apps.appointments.occupancy import combine_aware
+from apps.appointments.test_query_budget import QueryBudgetMixin, ROW_COUNTS
+from .models import GoogleCalendarIntegration, GoogleCalendarEvent, GoogleCalendarSyncLog
+
+
+class GoogleCalendarQueryBudgetTest(QueryBudgetMixin, APITestCase):
+    """Query budgets for the google_calendar app."""
+
+    def setUp(self):
+        """Initial setup for tests."""
+        self.company = Company.objects.create(
+            name="Test Barber Shop",
+            cnpj="12.345.678/0001-90"
+        )
+
+        self.admin = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="testpass123",
+            role="admin",
+            company=self.company
+        )
+
+        self.actors = User.objects.bulk_create([
+            User(
+                username=f"actor{index}",
+                email=f"actor{index}@example.com",
+                role="actor",
+                company=self.company
+            )
+            for index in range(max(ROW_COUNTS))
+        ])
+
+        service = Service.objects.create(
+            name="Hair Cut",
+            duration_minutes=30,
+            base_price=25.00,
+            company=self.company,
+            actor=self.actors[0]
+        )
+
+        day = date(2030, 1, 7)
+        self.appointments = Appointment.objects.bulk_create([
+            Appointment(
+                client=self.admin,
+                actor=actor,
+                service=service,
+                start_time=combine_aware(day, time(10, 0)),
+                end_time=combine_aware(day, time(10, 30)),
+                status='confirmed'
+            )
+            for actor in self.actors
+        ])
+        self.client.force_authenticate(user=self.admin)
+
+    def _integration(self, user):
+        return GoogleCalendarIntegration(
+            user=user,
+            access_token="access",
+            refresh_token="refresh",
+            token_expires_at=timezone.now() + timedelta(hours=1)
+        )
+
+    def test_integrations(self):
+        """Tests the integration list."""
+        def create_rows(first, last):
+            GoogleCalendarIntegration.objects.bulk_create([
+                self._integration(self.actors[index]) for index in range(first, last)
+            ])
+
+        self.assertListBudget(reverse('googlecalendar-integration-list'), create_rows, 4)
+
+    def test_events(self):
+        """Tests the event list with its nested appointment."""
+        def create_rows(first, last):
+            GoogleCalendarEvent.objects.bulk_create([
+                GoogleCalendarEvent(
+                    appointment=self.appointments[index],
+                    google_event_id=f"event{index}",
+                    google_calendar_id="primary"
+                )
+                for index in range(first, last)
+            ])
+
+        self.assertListBudget(reverse('googlecalendar-event-list'), create_rows, 4)
+
+    def test_sync_logs(self):
+        """Tests the sync log list."""
+        integration = self._integration(self.actors[0])
+        integration.save()
+
+        def create_rows(first, last):
+            GoogleCalendarSyncLog.objects.bulk_create([
+                GoogleCalendarSyncLog(
+                    integration=integration,
+                    sync_type='automatic',
+                    status='success',
+                    started_at=timezone.now()
+                )
+                for index in range(first, last)
+            ])
+
+        self.assertListBudget(reverse('googlecalendar-synclog-list'), create_rows, 4)
@@ -34,15 +34,16 @@ class GoogleCalendarIntegrationViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Filters integrations based on user."""
         user = self.request.user
+        queryset = GoogleCalendarIntegration.objects.select_related('user')
         
         if user.is_superadmin:
-            return GoogleCalendarIntegration.objects.all()
+            return queryset
         elif user.is_admin:
-            return GoogleCalendarIntegration.objects.filter(
+            return queryset.filter(
                 user__company=user.company
             )
         else:
-            return GoogleCalendarIntegration.objects.filter(user=user)
+            return queryset.filter(user=user)
     
     def get_serializer_class(self):
         """Returns the appropriate serializer."""
@@ -158,15 +159,18 @@ class GoogleCalendarEventViewSet(viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         """Filters events based on user."""
         user = self.request.user
+        queryset = GoogleCalendarEvent.objects.select_related(
+            'appointment__client', 'appointment__actor', 'appointment__service'
+        )
         
         if user.is_superadmin:
-            return GoogleCalendarEvent.objects.all()
+            return queryset
         elif user.is_admin:
-            return GoogleCalendarEvent.objects.filter(
+            return queryset.filter(
                 appointment__actor__company=user.company
             )
         else:
-            return GoogleCalendarEvent.objects.filter(
+            return queryset.filter(
                 Q(appointment__actor=user) | Q(appointment__client=user)
             )
     
@@ -220,15 +224,16 @@ class GoogleCalendarSyncLogViewSet(viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         """Filters logs based on user."""
         user = self.request.user
+        queryset = GoogleCalendarSyncLog.objects.select_related('integration__user')
         
         if user.is_superadmin:
-            return GoogleCalendarSyncLog.objects.all()
+            return queryset
         elif user.is_admin:
-            return GoogleCalendarSyncLog.objects.filter(
+            return queryset.filter(
                 integration__user__company=user.company
             )
         else:
-            return GoogleCalendarSyncLog.objects.filter(
+            return queryset.filter(
                 integration__user=user
             )
     
@@ -0,0 +1,115 @@
+"""
+Cached unread-notification counters for the notifications app.
+
+Every user has an unread counter in the cache, so the counter endpoint does
+not run a COUNT query on each poll. Creating a notification increments it,
+and marking one as read or deleting it decrements it, with atomic
+INCRBY/DECRBY calls once the transaction commits. A missing counter is
+counted from the database on first read. The periodic reconciliation task
+corrects drift caused by writes that bypass these hooks, such as raw SQL.
+"""
+
+from itertools import islice
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from .models import Notification
+
+
+CACHE_PREFIX = 'notifications:unread'
+
+# Users whose counters are checked per reconciliation query
+RECONCILE_BATCH_SIZE = 1000
+
+
+def _counter_key(user_id):
+    return f'{CACHE_PREFIX}:{user_id}'
+
+
+def _unread_queryset(user_id):
+    return Notification.objects.filter(user_id=user_id, read=False)
+
+
+def get_unread_count(user_id):
+    """Returns the unread notifications of a user, counting them only when the counter is missing."""
+    key = _counter_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = _unread_queryset(user_id).count()
+        # A counter created meanwhile by a concurrent reader or writer wins
+        cache.add(key, count, None)
+    return count
+
+
+async def aget_unread_count(user_id):
+    """Async version of get_unread_count."""
+    key = _counter_key(user_id)
+    count = await cache.aget(key)
+    if count is None:
+        count = await _unread_queryset(user_id).acount()
+        await cache.aadd(key, count, None)
+    return count
+
+
+def _apply(deltas):
+    for user_id, delta in deltas.items():
+        key = _counter_key(user_id)
+        try:
+            count = cache.incr(key, delta)
+        except ValueError:
+            # Missing counters are counted from the database on next read
+            continue
+        if count < 0:
+            cache.delete(key)
+
+
+def adjust_unread_counts(deltas):
+    """
+    Adds {user_id: delta} to the unread counters once the transaction commits.
+
+    Rolled back changes never touch the counters.
+    """
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if deltas:
+        transaction.on_commit(lambda: _apply(deltas))
+
+
+def count_by_user(notifications, sign=1):
+    """Returns {user_id: sign * count} for a list of notifications."""
+    deltas = {}
+    for notification in notifications:
+        deltas[notification.user_id] = deltas.get(notification.user_id, 0) + sign
+    return deltas
+
+
+def reconcile_unread_counts(user_ids):
+    """
+    Rewrites the cached counters of user_ids that disagree with the database.
+
+    Only existing counters are corrected; missing ones are still counted on
+    first read. Returns the number of corrected counters.
+    """
+    corrected = 0
+    user_ids = iter(user_ids)
+    while True:
+        batch = list(islice(user_ids, RECONCILE_BATCH_SIZE))
+        if not batch:
+            break
+        keys = {_counter_key(user_id): user_id for user_id in batch}
+        cached = cache.get_many(list(keys))
+        if not cached:
+            continue
+
+        counts = dict(
+            Notification.objects.filter(user_id__in=[keys[key] for key in cached], read=False)
+            .order_by().values('user_id').annotate(unread=Count('id')).values_list('user_id', 'unread')
+        )
+        stale = {
+            key: counts.get(keys[key], 0)
+            for key, count in cached.items()
+            if count != counts.get(keys[key], 0)
+        }
+        if stale:
+            cache.set_many(stale, None)
+            corrected += len(stale)
+    return corrected
@@ -0,0 +1,154 @@
+"""
+Batched notification dispatch and real-time push for the notifications app.
+
+Appointment events are handled in batches. The appointments of every
+(appointment_id, event) pair and their recipients are loaded with one
+joined query. Every Notification row is written with bulk_create.
+
+New and updated notifications are pushed to their users' WebSocket groups
+once the surrounding transaction commits: one group message per user, all
+sent in a single event loop pass. Rows saved one at a time are published
+by the post_save handler in signals.py. The consumer coalesces bursts into
+one frame per user per short window.
+"""
+
+import asyncio
+import logging
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from apps.appointments.fastpath import format_datetime
+from apps.appointments.models import Appointment
+from .counters import adjust_unread_counts, count_by_user
+from .models import Notification
+
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_BATCH_SIZE = 500
+
+PUSH_CREATED = 'created'
+PUSH_UPDATED = 'updated'
+
+
+def notification_group(user_id):
+    """Returns the channel group the notification consumer of a user listens on."""
+    return f'notifications_{user_id}'
+
+
+def appointment_notifications(appointment, event):
+    """Builds the unsaved client and actor notifications of an appointment event."""
+    title = f"Appointment {event}"
+    notification_type = f'appointment_{event}'
+    return [
+        Notification(
+            user_id=appointment.client_id,
+            title=title,
+            message=f"Your appointment for {appointment.service.name} was {event}.",
+            type=notification_type,
+            priority='high',
+            appointment=appointment
+        ),
+        Notification(
+            user_id=appointment.actor_id,
+            title=title,
+            message=f"Appointment with {appointment.client.get_full_name()} was {event}.",
+            type=notification_type,
+            priority='high',
+            appointment=appointment
+        ),
+    ]
+
+
+def dispatch_appointment_events(events):
+    """
+    Creates and delivers the notifications of many appointment events.
+
+    events holds (appointment_id, event) pairs, where event is the new status,
+    such as 'confirmed' or 'cancelled'. Missing appointments are skipped.
+    Returns the created notifications.
+    """
+    events = [(int(appointment_id), event) for appointment_id, event in events]
+    appointments = Appointment.objects.select_related('client', 'service').in_bulk(
+        {appointment_id for appointment_id, _ in events}
+    )
+
+    notifications = []
+    for appointment_id, event in events:
+        appointment = appointments.get(appointment_id)
+        if appointment is not None:
+            notifications.extend(appointment_notifications(appointment, event))
+
+    return create_notifications(notifications)
+
+
+def create_notifications(notifications):
+    """
+    Inserts unsaved notifications with bulk_create and returns them.
+
+    bulk_create skips post_save, so the unread counters and the push are
+    updated here.
+    """
+    if not notifications:
+        return []
+
+    created = Notification.objects.bulk_create(notifications, batch_size=NOTIFICATION_BATCH_SIZE)
+    adjust_unread_counts(count_by_user(created))
+    publish_notifications(created, PUSH_CREATED)
+    return created
+
+
+def notification_payload(notification):
+    """Builds the WebSocket message data of a notification."""
+    return {
+        'id': notification.id,
+        'user': notification.user_id,
+        'title': notification.title,
+        'message': notification.message,
+        'type': notification.type,
+        'priority': notification.priority,
+        'read': notification.read,
+        'appointment': notification.appointment_id,
+        'sent_at': format_datetime(notification.sent_at),
+        'read_at': format_datetime(notification.read_at),
+    }
+
+
+async def _group_send_all(channel_layer, messages):
+    await asyncio.gather(*(
+        channel_layer.group_send(notification_group(user_id), message)
+        for user_id, message in messages.items()
+    ))
+
+
+def push_notifications(notifications, event):
+    """
+    Sends notifications to their users' WebSocket groups in one step.
+
+    The rows are already stored, so a channel layer failure is logged and
+    the notifications stay available through the API.
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None or not notifications:
+        return
+
+    messages = {}
+    for notification in notifications:
+        message = messages.setdefault(notification.user_id, {
+            'type': 'notifications.push',
+            'event': event,
+            'notifications': [],
+        })
+        message['notifications'].append(notification_payload(notification))
+
+    try:
+        async_to_sync(_group_send_all)(channel_layer, messages)
+    except Exception:
+        logger.exception("Could not push %d notifications to the channel layer", len(notifications))
+
+
+def publish_notifications(notifications, event=PUSH_CREATED):
+    """Pushes new or updated notifications once the current transaction commits."""
+    notifications = list(notifications)
+    if notifications:
+        transaction.on_commit(lambda: push_notifications(notifications, event))
@@ -0,0 +1,74 @@
+from datetime import timedelta
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+
+# Frozen copies of the reminder rules, so later code changes do not alter this migration
+ACTIVE_STATUSES = ('pending', 'confirmed')
+DEFAULT_REMINDER_HOURS = 24
+DEFAULT_WHATSAPP_REMINDERS = True
+CHUNK_SIZE = 1000
+
+
+def schedule_existing_reminders(apps, schema_editor):
+    """Schedules the reminders of the upcoming active appointments, like reminders.schedule_reminders."""
+    Appointment = apps.get_model("appointments", "Appointment")
+    NotificationConfig = apps.get_model("notifications", "NotificationConfig")
+    ReminderSchedule = apps.get_model("notifications", "ReminderSchedule")
+
+    now = timezone.now()
+    settings = {
+        user_id: (hours, enabled)
+        for user_id, hours, enabled in NotificationConfig.objects.values_list(
+            "user_id", "reminder_before_hours", "whatsapp_reminders"
+        ).iterator(chunk_size=CHUNK_SIZE)
+    }
+    appointments = Appointment.objects.filter(
+        status__in=ACTIVE_STATUSES, start_time__gt=now
+    ).values_list("id", "client_id", "start_time")
+
+    schedules = []
+    for appointment_id, client_id, start_time in appointments.iterator(chunk_size=CHUNK_SIZE):
+        hours, enabled = settings.get(client_id, (DEFAULT_REMINDER_HOURS, DEFAULT_WHATSAPP_REMINDERS))
+        if enabled:
+            due_at = max(start_time - timedelta(hours=hours), now)
+            schedules.append(ReminderSchedule(appointment_id=appointment_id, due_at=due_at))
+        if len(schedules) == CHUNK_SIZE:
+            ReminderSchedule.objects.bulk_create(schedules, ignore_conflicts=True)
+            schedules = []
+    ReminderSchedule.objects.bulk_create(schedules, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments", "0006_service_updated_at"),
+        ("notifications", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReminderSchedule",
+            fields=[
+                (
+                    "appointment",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="reminder_schedule",
+                        serialize=False,
+                        to="appointments.appointment",
+                        verbose_name="Appointment",
+                    ),
+                ),
+                ("due_at", models.DateTimeField(db_index=True, verbose_name="Due at")),
+                ("claimed_at", models.DateTimeField(blank=True, null=True, verbose_name="Claimed at")),
+            ],
+            options={
+                "verbose_name": "Reminder Schedule",
+                "verbose_name_plural": "Reminder Schedules",
+            },
+        ),
+        migrations.RunPython(schedule_existing_reminders, migrations.RunPython.noop),
+    ]
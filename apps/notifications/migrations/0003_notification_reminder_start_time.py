@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0002_reminder_schedule"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="reminder_start_time",
+            field=models.DateTimeField(blank=True, null=True, verbose_name="Reminded start time"),
+        ),
+    ]
@@ -63,6 +63,11 @@ class Notification(models.Model):
         blank=True,
         verbose_name='Related Appointment'
     )
+    reminder_start_time = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Reminded start time'
+    )
     sent_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Sent at'
@@ -135,6 +140,34 @@ class NotificationConfig(models.Model):
         return f"Configuration - {self.user.username}"
 
 
+class ReminderSchedule(models.Model):
+    """Due time of the pending reminder of an appointment."""
+
+    appointment = models.OneToOneField(
+        Appointment,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="reminder_schedule",
+        verbose_name='Appointment'
+    )
+    due_at = models.DateTimeField(
+        db_index=True,
+        verbose_name='Due at'
+    )
+    claimed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Claimed at'
+    )
+
+    class Meta:
+        verbose_name = 'Reminder Schedule'
+        verbose_name_plural = 'Reminder Schedules'
+
+    def __str__(self):
+        return f"Reminder - {self.appointment_id} at {self.due_at.strftime('%d/%m/%Y %H:%M')}"
+
+
 class NotificationTemplate(models.Model):
     """Model for notification templates."""
     
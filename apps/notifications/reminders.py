@@ -0,0 +1,196 @@
+"""
+Reminder scheduling for the notifications app.
+
+Every upcoming active appointment has a ReminderSchedule row holding the
+time its reminder is due: start_time minus the client's
+reminder_before_hours. The rows are kept in step with the appointments by
+the handlers in signals.py, so reschedules move a reminder and
+cancellations drop it before any work is done. A beat task claims the due
+rows every minute and queues their reminders in chunks. A row is deleted in
+the transaction that creates its reminder, so a chunk lost between the claim
+and the send is claimed again once REMINDER_CLAIM_TIMEOUT passes.
+"""
+
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from apps.appointments.models import Appointment
+from .dispatch import create_notifications
+from .models import Notification, NotificationConfig, ReminderSchedule
+
+
+ACTIVE_STATUSES = ('pending', 'confirmed')
+
+# Appointments per reminder query, write and task
+REMINDER_CHUNK_SIZE = 1000
+
+# Claimed reminders not sent within this time are claimed again
+REMINDER_CLAIM_TIMEOUT = timedelta(minutes=10)
+
+DEFAULT_REMINDER_HOURS = NotificationConfig._meta.get_field('reminder_before_hours').default
+DEFAULT_WHATSAPP_REMINDERS = NotificationConfig._meta.get_field('whatsapp_reminders').default
+
+
+def reminder_settings(user_ids):
+    """
+    Returns {user_id: (reminder_before_hours, whatsapp_reminders)} in one query.
+
+    Users without a config get the config defaults.
+    """
+    settings = {user_id: (DEFAULT_REMINDER_HOURS, DEFAULT_WHATSAPP_REMINDERS) for user_id in user_ids}
+    rows = NotificationConfig.objects.filter(user_id__in=settings).values_list(
+        'user_id', 'reminder_before_hours', 'whatsapp_reminders'
+    )
+    for user_id, hours, enabled in rows:
+        settings[user_id] = (hours, enabled)
+    return settings
+
+
+def schedule_reminders(appointments, now=None):
+    """
+    Brings the reminder schedule of the given appointments up to date.
+
+    Active appointments that have not started get their due time inserted
+    or moved with one upsert. The others lose theirs with one delete. An
+    appointment booked inside its reminder lead time is due right away, so
+    the next pop reminds it.
+    """
+    appointments = list(appointments)
+    if not appointments:
+        return
+
+    now = now or timezone.now()
+    settings = reminder_settings({appointment.client_id for appointment in appointments})
+
+    schedules = []
+    unscheduled = []
+    for appointment in appointments:
+        hours, enabled = settings[appointment.client_id]
+        if appointment.status in ACTIVE_STATUSES and enabled and appointment.start_time > now:
+            due_at = max(appointment.start_time - timedelta(hours=hours), now)
+            schedules.append(ReminderSchedule(appointment_id=appointment.id, due_at=due_at, claimed_at=None))
+        else:
+            unscheduled.append(appointment.id)
+
+    if unscheduled:
+        ReminderSchedule.objects.filter(appointment_id__in=unscheduled).delete()
+    if schedules:
+        ReminderSchedule.objects.bulk_create(
+            schedules,
+            batch_size=REMINDER_CHUNK_SIZE,
+            update_conflicts=True,
+            unique_fields=['appointment'],
+            update_fields=['due_at', 'claimed_at']
+        )
+
+
+def schedule_reminders_on_commit(appointments):
+    """Runs schedule_reminders once the current transaction commits."""
+    appointments = list(appointments)
+    if appointments:
+        transaction.on_commit(lambda: schedule_reminders(appointments))
+
+
+def schedule_upcoming_reminders(user_ids=None, now=None):
+    """
+    Schedules the reminders of every upcoming active appointment.
+
+    Used when a client changes their reminder settings and by the manual
+    rebuild task. Returns the number of appointments checked.
+    """
+    now = now or timezone.now()
+    appointments = Appointment.objects.filter(
+        status__in=ACTIVE_STATUSES, start_time__gt=now
+    ).only('id', 'client_id', 'start_time', 'status')
+    if user_ids is not None:
+        appointments = appointments.filter(client_id__in=user_ids)
+
+    checked = 0
+    batch = []
+    for appointment in appointments.iterator(chunk_size=REMINDER_CHUNK_SIZE):
+        batch.append(appointment)
+        if len(batch) == REMINDER_CHUNK_SIZE:
+            schedule_reminders(batch, now)
+            checked += len(batch)
+            batch = []
+    schedule_reminders(batch, now)
+    return checked + len(batch)
+
+
+def claim_due_reminders(now=None, limit=REMINDER_CHUNK_SIZE):
+    """
+    Claims up to limit due reminders and returns their appointment ids.
+
+    Unclaimed rows and rows whose claim expired are eligible. Rows locked by a
+    concurrent claim are skipped, so each reminder is claimed once. The rows
+    stay in the schedule until send_reminders creates their reminders.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        appointment_ids = list(
+            ReminderSchedule.objects.select_for_update(skip_locked=True)
+            .filter(due_at__lte=now)
+            .filter(Q(claimed_at__isnull=True) | Q(claimed_at__lte=now - REMINDER_CLAIM_TIMEOUT))
+            .order_by('due_at')
+            .values_list('appointment_id', flat=True)[:limit]
+        )
+        if appointment_ids:
+            ReminderSchedule.objects.filter(appointment_id__in=appointment_ids).update(claimed_at=now)
+    return appointment_ids
+
+
+def reminder_message(start_time, today=None):
+    """Builds the reminder text for an appointment starting at start_time."""
+    start = timezone.localtime(start_time)
+    today = today or timezone.localdate()
+    if start.date() == today:
+        day = "today"
+    elif start.date() == today + timedelta(days=1):
+        day = "tomorrow"
+    else:
+        day = f"on {start.strftime('%d/%m')}"
+    return f"Reminder: You have an appointment {day} at {start.strftime('%H:%M')}."
+
+
+def reminder_notification(appointment_id, client_id, start_time):
+    """Builds the unsaved reminder notification of an appointment starting at start_time."""
+    return Notification(
+        user_id=client_id,
+        title="Appointment Reminder",
+        message=reminder_message(start_time),
+        type='reminder',
+        priority='medium',
+        appointment_id=appointment_id,
+        reminder_start_time=start_time
+    )
+
+
+def send_reminders(appointment_ids):
+    """
+    Creates the reminders of many appointments with one bulk_create.
+
+    Appointments that are no longer active or already started are skipped,
+    and so are those already reminded of their current start time, so a
+    chunk can be retried safely while a rescheduled appointment is reminded
+    again. Their claimed schedule rows are deleted in the same transaction.
+    Returns the created notifications.
+    """
+    rows = Appointment.objects.filter(
+        id__in=appointment_ids, status__in=ACTIVE_STATUSES, start_time__gt=timezone.now()
+    ).values_list('id', 'client_id', 'start_time')
+    reminded = set(Notification.objects.filter(
+        appointment_id__in=appointment_ids, type='reminder', reminder_start_time__isnull=False
+    ).values_list('appointment_id', 'reminder_start_time'))
+
+    with transaction.atomic():
+        created = create_notifications([
+            reminder_notification(appointment_id, client_id, start_time)
+            for appointment_id, client_id, start_time in rows
+            if (appointment_id, start_time) not in reminded
+        ])
+        # Rows moved by a reschedule after the claim are unclaimed and stay
+        ReminderSchedule.objects.filter(
+            appointment_id__in=appointment_ids, claimed_at__isnull=False
+        ).delete()
+    return created
@@ -0,0 +1,100 @@
+"""
+Signal handlers for the notifications app.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from apps.appointments.models import Appointment
+from apps.appointments.signals import appointments_bulk_created, appointments_bulk_updated
+from .counters import adjust_unread_counts
+from .dispatch import PUSH_CREATED, PUSH_UPDATED, publish_notifications
+from .models import Notification, NotificationConfig
+from .reminders import (
+    DEFAULT_REMINDER_HOURS,
+    DEFAULT_WHATSAPP_REMINDERS,
+    schedule_reminders_on_commit,
+    schedule_upcoming_reminders,
+)
+
+
+@receiver(post_init, sender=Notification)
+def remember_read_state(sender, instance, **kwargs):
+    """Keeps the loaded read flag so a later save can adjust the unread counter."""
+    # Read __dict__ directly so a deferred field is never loaded here
+    instance._unread_snapshot = instance.__dict__.get('read') is False
+
+
+@receiver(post_save, sender=Notification)
+def adjust_unread_count_on_save(sender, instance, created, **kwargs):
+    """Counts a new unread notification, or one whose read flag changed."""
+    was_unread = False if created else instance._unread_snapshot
+    is_unread = not instance.read
+    if was_unread != is_unread:
+        adjust_unread_counts({instance.user_id: 1 if is_unread else -1})
+    instance._unread_snapshot = is_unread
+
+
+@receiver(post_delete, sender=Notification)
+def adjust_unread_count_on_delete(sender, instance, **kwargs):
+    """Takes a deleted unread notification, including cascaded deletes, out of the counter."""
+    if instance._unread_snapshot:
+        adjust_unread_counts({instance.user_id: -1})
+
+
+@receiver(post_save, sender=Notification)
+def publish_notification_on_save(sender, instance, created, **kwargs):
+    """Pushes a saved notification to its user once the transaction commits."""
+    publish_notifications([instance], PUSH_CREATED if created else PUSH_UPDATED)
+
+
+def _reminder_snapshot(instance):
+    """Remembers the fields that decide when an appointment's reminder is due."""
+    # Read __dict__ directly so deferred fields are never loaded here
+    instance._reminder_snapshot = (
+        instance.__dict__.get('client_id'),
+        instance.__dict__.get('start_time'),
+        instance.__dict__.get('status'),
+    )
+
+
+@receiver(post_init, sender=Appointment)
+def remember_reminder_fields(sender, instance, **kwargs):
+    """Keeps the loaded client, start time and status so a later save can reschedule the reminder."""
+    _reminder_snapshot(instance)
+
+
+@receiver(post_save, sender=Appointment)
+def schedule_reminder_on_save(sender, instance, created, **kwargs):
+    """Schedules, moves or drops the reminder of a created, rescheduled or cancelled appointment."""
+    current = (instance.client_id, instance.start_time, instance.status)
+    if created or instance._reminder_snapshot != current:
+        schedule_reminders_on_commit([instance])
+    _reminder_snapshot(instance)
+
+
+@receiver(appointments_bulk_created, sender=Appointment)
+@receiver(appointments_bulk_updated, sender=Appointment)
+def schedule_reminders_on_bulk_change(sender, instances, **kwargs):
+    """Schedules the reminders of bulk-created or bulk-updated appointments."""
+    schedule_reminders_on_commit(instances)
+
+
+@receiver(post_init, sender=NotificationConfig)
+def remember_reminder_settings(sender, instance, **kwargs):
+    """Keeps the loaded reminder settings so a later save can reschedule the user's reminders."""
+    instance._reminder_settings = (
+        instance.__dict__.get('reminder_before_hours'),
+        instance.__dict__.get('whatsapp_reminders'),
+    )
+
+
+@receiver(post_save, sender=NotificationConfig)
+def reschedule_reminders_on_config_save(sender, instance, created, **kwargs):
+    """Reschedules the upcoming reminders of a user whose reminder settings changed."""
+    previous = (DEFAULT_REMINDER_HOURS, DEFAULT_WHATSAPP_REMINDERS) if created else instance._reminder_settings
+    current = (instance.reminder_before_hours, instance.whatsapp_reminders)
+    if previous != current:
+        user_id = instance.user_id
+        transaction.on_commit(lambda: schedule_upcoming_reminders([user_id]))
+    instance._reminder_settings = current
@@ -3,10 +3,13 @@ Celery tasks for the notifications app.
 """
 
 from celery import shared_task
+from django.db import transaction
 from django.utils import timezone
 from datetime import timedelta
-from .models import Notification, NotificationConfig, NotificationTemplate
-from apps.appointments.models import Appointment
+from .counters import reconcile_unread_counts
+from .dispatch import dispatch_appointment_events
+from .reminders import REMINDER_CHUNK_SIZE, claim_due_reminders, schedule_upcoming_reminders, send_reminders
+from .models import Notification, NotificationTemplate
 from apps.authentication.models import User
 
 
@@ -15,33 +18,22 @@ def high_priority_send_appointment_notification(appointment_id, notification_typ
     """
     Sends high priority notification for appointments.
     """
-    try:
-        appointment = Appointment.objects.get(id=appointment_id)
-        
-        # Create notification for client
-        Notification.objects.create(
-            user=appointment.client,
-            title=f"Appointment {notification_type}",
-            message=f"Your appointment for {appointment.service.name} was {notification_type}.",
-            type=f'appointment_{notification_type}',
-            priority='high',
-            appointment=appointment
-        )
-        
-        # Create notification for actor
-        Notification.objects.create(
-            user=appointment.actor,
-            title=f"Appointment {notification_type}",   
-            message=f"Appointment with {appointment.client.get_full_name()} was {notification_type}.",
-            type=f'appointment_{notification_type}',
-            priority='high',
-            appointment=appointment
-        )
-        
-        return f"Notifications sent for appointment {appointment_id}"
-        
-    except Appointment.DoesNotExist:
+    if not dispatch_appointment_events([(appointment_id, notification_type)]):
         return f"Appointment {appointment_id} not found"
+    
+    return f"Notifications sent for appointment {appointment_id}"
+
+
+@shared_task(queue='high')
+def high_priority_send_appointment_notifications(events):
+    """
+    Sends high priority notifications for a batch of appointment events.
+
+    events is a list of [appointment_id, notification_type] pairs.
+    """
+    notifications = dispatch_appointment_events(events)
+    
+    return f"Sent {len(notifications)} notifications for {len(events)} appointment events"
 
 
 @shared_task(queue='low')
@@ -49,54 +41,60 @@ def low_priority_send_appointment_reminder(appointment_id):
     """
     Sends appointment reminder (low priority).
     """
-    try:
-        appointment = Appointment.objects.get(id=appointment_id)
-        
-        # Check if appointment is still active
-        if appointment.status not in ['pending', 'confirmed']:
-            return f"Appointment {appointment_id} is not active"
-        
-        # Create reminder notification
-        Notification.objects.create(
-            user=appointment.client,
-            title="Appointment Reminder",
-            message=f"Reminder: You have an appointment tomorrow at {appointment.start_time.strftime('%H:%M')}.",
-            type='reminder',
-            priority='medium',
-            appointment=appointment
-        )
-        
-        return f"Reminder sent for appointment {appointment_id}"
-        
-    except Appointment.DoesNotExist:
-        return f"Appointment {appointment_id} not found"
+    if not send_reminders([appointment_id]):
+        return f"No reminder sent for appointment {appointment_id}"
+    
+    return f"Reminder sent for appointment {appointment_id}"
 
 
 @shared_task(queue='low')
-def low_priority_process_daily_reminders():
+def low_priority_send_appointment_reminders(appointment_ids):
     """
-    Processes daily reminders for next day appointments.
+    Sends the reminders of a chunk of appointments (low priority).
     """
-    tomorrow = timezone.now().date() + timedelta(days=1)
+    notifications = send_reminders(appointment_ids)
     
-    appointments = Appointment.objects.filter(
-        start_time__date=tomorrow,
-        status__in=['pending', 'confirmed']
-    )
-    
-    notifications_created = 0
+    return f"Sent {len(notifications)} reminders for {len(appointment_ids)} appointments"
+
+
+@shared_task(queue='low')
+def low_priority_send_due_reminders():
+    """
+    Claims the reminders due by now and queues them in chunks (runs every minute).
+
+    Each chunk is queued once its claim commits. A chunk that never reaches
+    the worker is claimed again after REMINDER_CLAIM_TIMEOUT.
+    """
+    chunks = 0
+    reminders = 0
+    while True:
+        with transaction.atomic():
+            appointment_ids = claim_due_reminders(limit=REMINDER_CHUNK_SIZE)
+            if appointment_ids:
+                transaction.on_commit(
+                    lambda appointment_ids=appointment_ids: low_priority_send_appointment_reminders.delay(appointment_ids)
+                )
+        if not appointment_ids:
+            break
+        chunks += 1
+        reminders += len(appointment_ids)
+        if len(appointment_ids) < REMINDER_CHUNK_SIZE:
+            break
     
-    for appointment in appointments:
-        # Check user configuration
-        config, created = NotificationConfig.objects.get_or_create(   
-            user=appointment.client
-        )
-        
-        if config.whatsapp_reminders:
-            low_priority_process_daily_reminders.delay(appointment.id)
-            notifications_created += 1
+    return f"Queued {reminders} due reminders in {chunks} chunks"
+
+
+@shared_task(queue='low')
+def low_priority_schedule_upcoming_reminders():
+    """
+    Rebuilds the reminder schedule of every upcoming active appointment.
+
+    The migration creating the schedule fills it and signals keep it current,
+    so this is only needed after writes that bypass them, such as raw SQL.
+    """
+    checked = schedule_upcoming_reminders()
     
-    return f"Processed {notifications_created} reminders for {tomorrow}"
+    return f"Scheduled reminders for {checked} upcoming appointments"
 
 
 @shared_task(queue='high')
@@ -146,3 +144,14 @@ def low_priority_clean_old_notifications():
     ).delete()[0]
     
     return f"Removed {notifications_removed} old notifications"
+
+
+@shared_task(queue='low')
+def low_priority_reconcile_unread_counters():
+    """
+    Corrects cached unread counters that drifted from the database.
+    """
+    user_ids = User.objects.values_list('id', flat=True).iterator()
+    corrected = reconcile_unread_counts(user_ids)
+    
+    return f"Corrected {corrected} unread counters"
@@ -0,0 +1,136 @@
+"""
+Tests for the cached unread-notification counters.
+"""
+
+from datetime import timedelta
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from apps.companies.models import Company
+from apps.authentication.models import User
+from apps.appointments.models import Service, Appointment
+from .counters import get_unread_count, reconcile_unread_counts
+from .dispatch import dispatch_appointment_events
+from .models import Notification
+from .tasks import low_priority_reconcile_unread_counters
+
+
+class UnreadCounterTest(APITestCase):
+    """Tests for the per-user unread counter."""
+
+    def setUp(self):
+        """Initial setup for tests."""
+        cache.clear()
+
+        self.company = Company.objects.create(
+            name="Test Barber Shop",
+            cnpj="12.345.678/0001-90"
+        )
+
+        self.user = User.objects.create_user(
+            username="customer",
+            email="customer@example.com",
+            password="testpass123",
+            role="user",
+            company=self.company
+        )
+
+        self.client.force_authenticate(user=self.user)
+
+    def _notify(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Notification.objects.create(
+                user=self.user,
+                title="Notice",
+                message="Message",
+                type='system',
+                **kwargs
+            )
+
+    def test_counter_follows_creates_and_reads(self):
+        """Tests that creating and reading notifications move the counter."""
+        self.assertEqual(get_unread_count(self.user.id), 0)
+
+        first = self._notify()
+        self._notify()
+        self._notify(read=True)
+        self.assertEqual(get_unread_count(self.user.id), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.mark_as_read()
+        self.assertEqual(get_unread_count(self.user.id), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('notification-mark-all-as-read'))
+        self.assertEqual(get_unread_count(self.user.id), 0)
+
+    def test_counter_endpoint_skips_database(self):
+        """Tests that a warm counter is served without counting rows."""
+        self._notify()
+        self.assertEqual(get_unread_count(self.user.id), 1)
+
+        # The remaining queries come from the localization middleware
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('notification-counter'))
+
+        self.assertEqual(response.data, {'count': 1})
+
+    def test_bulk_dispatch_and_delete(self):
+        """Tests the counter for bulk-created and deleted notifications."""
+        actor = User.objects.create_user(
+            username="actor",
+            email="actor@example.com",
+            password="testpass123",
+            role="actor",
+            company=self.company
+        )
+        service = Service.objects.create(
+            name="Hair Cut",
+            duration_minutes=30,
+            base_price=25.00,
+            company=self.company,
+            actor=actor
+        )
+        start = timezone.now() + timedelta(days=1)
+        appointments = Appointment.objects.bulk_create([
+            Appointment(
+                client=self.user,
+                actor=actor,
+                service=service,
+                start_time=start + timedelta(hours=index),
+                end_time=start + timedelta(hours=index, minutes=30),
+                status='confirmed'
+            )
+            for index in range(3)
+        ])
+        self.assertEqual(get_unread_count(self.user.id), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            created = dispatch_appointment_events([(appointment.id, 'cancelled') for appointment in appointments])
+        self.assertEqual(get_unread_count(self.user.id), 3)
+        self.assertEqual(get_unread_count(actor.id), 3)
+
+        notification = next(row for row in created if row.user_id == self.user.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse('notification-detail', args=[notification.id]))
+        self.assertEqual(get_unread_count(self.user.id), 2)
+
+        # Deleting an appointment cascades to its notifications
+        with self.captureOnCommitCallbacks(execute=True):
+            appointments[1].delete()
+        self.assertEqual(get_unread_count(self.user.id), 1)
+        self.assertEqual(get_unread_count(actor.id), 2)
+
+    def test_reconciliation(self):
+        """Tests that drifted counters are rewritten from the database."""
+        self._notify()
+        self.assertEqual(get_unread_count(self.user.id), 1)
+
+        # update() bypasses the hooks, like raw SQL does
+        Notification.objects.filter(user=self.user).update(read=True)
+        self.assertEqual(get_unread_count(self.user.id), 1)
+
+        self.assertEqual(reconcile_unread_counts([self.user.id]), 1)
+        self.assertEqual(get_unread_count(self.user.id), 0)
+        self.assertEqual(low_priority_reconcile_unread_counters(), "Corrected 0 unread counters")
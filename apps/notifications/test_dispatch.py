@@ -0,0 +1,179 @@
+"""
+Tests for the batched notification dispatch and real-time push.
+"""
+
+import json
+from datetime import timedelta
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from apps.companies.models import Company
+from apps.authentication.models import User
+from apps.appointments.consumers import NotificationConsumer
+from apps.appointments.models import Service, Appointment
+from .dispatch import dispatch_appointment_events, notification_group
+from .models import Notification
+from .tasks import high_priority_send_appointment_notification
+
+
+class NotificationDispatchTest(TestCase):
+    """Tests for dispatch_appointment_events."""
+
+    def setUp(self):
+        """Initial setup for tests."""
+        self.company = Company.objects.create(
+            name="Test Barber Shop",
+            cnpj="12.345.678/0001-90"
+        )
+
+        self.actor = User.objects.create_user(
+            username="actor",
+            email="actor@example.com",
+            password="testpass123",
+            role="actor",
+            company=self.company
+        )
+
+        self.customer = User.objects.create_user(
+            username="customer",
+            email="customer@example.com",
+            password="testpass123",
+            first_name="Carla",
+            last_name="Souza",
+            role="user",
+            company=self.company
+        )
+
+        self.service = Service.objects.create(
+            name="Hair Cut",
+            duration_minutes=30,
+            base_price=25.00,
+            company=self.company,
+            actor=self.actor
+        )
+
+    def _appointments(self, count):
+        start = timezone.now() + timedelta(days=1)
+        return Appointment.objects.bulk_create([
+            Appointment(
+                client=self.customer,
+                actor=self.actor,
+                service=self.service,
+                start_time=start + timedelta(hours=index),
+                end_time=start + timedelta(hours=index, minutes=30),
+                status='confirmed'
+            )
+            for index in range(count)
+        ])
+
+    def test_creates_client_and_actor_notifications(self):
+        """Tests the rows created for one event."""
+        appointment = self._appointments(1)[0]
+
+        dispatch_appointment_events([(appointment.id, 'confirmed')])
+
+        client_notification = Notification.objects.get(user=self.customer)
+        actor_notification = Notification.objects.get(user=self.actor)
+        self.assertEqual(client_notification.type, 'appointment_confirmed')
+        self.assertEqual(client_notification.priority, 'high')
+        self.assertEqual(client_notification.message, "Your appointment for Hair Cut was confirmed.")
+        self.assertEqual(actor_notification.message, "Appointment with Carla Souza was confirmed.")
+        self.assertEqual(actor_notification.appointment, appointment)
+
+    def test_query_count_does_not_grow_with_batch(self):
+        """Tests that a batch is one joined read and one insert."""
+        # Small enough for one insert under SQLite's 999 parameter limit
+        appointments = self._appointments(40)
+
+        with self.assertNumQueries(2):
+            created = dispatch_appointment_events(
+                [(appointment.id, 'cancelled') for appointment in appointments]
+            )
+
+        self.assertEqual(len(created), 80)
+        self.assertEqual(Notification.objects.filter(type='appointment_cancelled').count(), 80)
+
+    def test_missing_appointments_are_skipped(self):
+        """Tests that unknown ids create nothing."""
+        self.assertEqual(dispatch_appointment_events([(999999, 'confirmed')]), [])
+        self.assertEqual(
+            high_priority_send_appointment_notification(999999, 'confirmed'),
+            "Appointment 999999 not found"
+        )
+        self.assertFalse(Notification.objects.exists())
+
+    @override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+    def test_delivers_after_commit(self):
+        """Tests that the new rows are pushed to the users' groups on commit."""
+        appointment = self._appointments(1)[0]
+        channel_layer = get_channel_layer()
+        channel = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(notification_group(self.customer.id), channel)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            created = dispatch_appointment_events([(appointment.id, 'confirmed')])
+
+        message = async_to_sync(channel_layer.receive)(channel)
+        client_notification = next(row for row in created if row.user_id == self.customer.id)
+        self.assertEqual(message['type'], 'notifications.push')
+        self.assertEqual(message['event'], 'created')
+        self.assertEqual([row['id'] for row in message['notifications']], [client_notification.id])
+        self.assertEqual(message['notifications'][0]['appointment'], appointment.id)
+
+    @override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+    def test_saved_notifications_are_published(self):
+        """Tests that single saves are pushed as created and then updated."""
+        channel_layer = get_channel_layer()
+        channel = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(notification_group(self.customer.id), channel)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            notification = Notification.objects.create(
+                user=self.customer,
+                title="Welcome",
+                message="Message",
+                type='system'
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            notification.mark_as_read()
+
+        created = async_to_sync(channel_layer.receive)(channel)
+        updated = async_to_sync(channel_layer.receive)(channel)
+        self.assertEqual(created['event'], 'created')
+        self.assertEqual(updated['event'], 'updated')
+        self.assertTrue(updated['notifications'][0]['read'])
+
+    @override_settings(NOTIFICATION_PUSH_WINDOW_MS=50)
+    def test_consumer_coalesces_bursts(self):
+        """Tests that pushes within the window reach the client as one frame."""
+        frames = []
+
+        async def send(text_data):
+            frames.append(json.loads(text_data))
+
+        async def run():
+            consumer = NotificationConsumer()
+            consumer.pending = {}
+            consumer.flush_task = None
+            consumer.send = send
+            for event, notification_id, read in (('created', 1, False), ('created', 2, False), ('updated', 1, True)):
+                await consumer.notifications_push({
+                    'type': 'notifications.push',
+                    'event': event,
+                    'notifications': [{'id': notification_id, 'read': read}],
+                })
+            await consumer.flush_task
+            await consumer.notifications_push({
+                'type': 'notifications.push',
+                'event': 'updated',
+                'notifications': [{'id': 2, 'read': True}],
+            })
+            await consumer.flush_task
+
+        async_to_sync(run)()
+
+        self.assertEqual(frames, [
+            {'type': 'notifications', 'created': [{'id': 1, 'read': True}, {'id': 2, 'read': False}], 'updated': []},
+            {'type': 'notifications', 'created': [], 'updated': [{'id': 2, 'read': True}]},
+        ])
@@ -0,0 +1,66 @@
+"""
+Tests for the streaming notification export.
+"""
+
+import json
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from apps.companies.models import Company
+from apps.authentication.models import User
+from .models import Notification
+
+
+class NotificationExportTest(APITestCase):
+    """Tests for the notification export action."""
+
+    def setUp(self):
+        """Initial setup for tests."""
+        self.company = Company.objects.create(
+            name="Test Barber Shop",
+            cnpj="12.345.678/0001-90"
+        )
+
+        self.user = User.objects.create_user(
+            username="customer",
+            email="customer@example.com",
+            password="testpass123",
+            role="user",
+            company=self.company
+        )
+
+        self.other = User.objects.create_user(
+            username="other",
+            email="other@example.com",
+            password="testpass123",
+            role="user",
+            company=self.company
+        )
+
+        Notification.objects.bulk_create([
+            Notification(
+                user=user,
+                title="Welcome",
+                message="Welcome to the system.",
+                type='system'
+            )
+            for user in (self.user, self.user, self.other)
+        ])
+
+        self.client.force_authenticate(user=self.user)
+
+    def test_exports_own_notifications(self):
+        """Tests that only the user's notifications are exported."""
+        response = self.client.get(reverse('notification-export'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['title'], "Welcome")
+        self.assertFalse(rows[0]['read'])
+
+    def test_invalid_date(self):
+        """Tests that malformed dates are rejected."""
+        response = self.client.get(reverse('notification-export'), {'start_date': '01/01/2030'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
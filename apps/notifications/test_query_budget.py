@@ -0,0 +1,107 @@
+"""
+Query budget tests for the notifications list endpoints.
+"""
+
+from datetime import date, time
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from apps.companies.models import Company
+from apps.authentication.models import User
+from apps.appointments.models import Service, Appointment
+from apps.appointments.occupancy import combine_aware
+from apps.appointments.test_fastpath import FastListMixin
+from apps.appointments.test_query_budget import QueryBudgetMixin, ROW_COUNTS
+from .models import Notification
+
+
+class NotificationsQueryBudgetTest(QueryBudgetMixin, FastListMixin, APITestCase):
+    """Query budgets for the notifications app."""
+
+    def setUp(self):
+        """Initial setup for tests."""
+        self.company = Company.objects.create(
+            name="Test Barber Shop",
+            cnpj="12.345.678/0001-90"
+        )
+
+        self.user = User.objects.create_user(
+            username="customer",
+            email="customer@example.com",
+            password="testpass123",
+            role="user",
+            company=self.company
+        )
+
+        actors = User.objects.bulk_create([
+            User(
+                username=f"actor{index}",
+                email=f"actor{index}@example.com",
+                role="actor",
+                company=self.company
+            )
+            for index in range(max(ROW_COUNTS))
+        ])
+
+        service = Service.objects.create(
+            name="Hair Cut",
+            duration_minutes=30,
+            base_price=25.00,
+            company=self.company,
+            actor=actors[0]
+        )
+
+        day = date(2030, 1, 7)
+        self.appointments = Appointment.objects.bulk_create([
+            Appointment(
+                client=self.user,
+                actor=actor,
+                service=service,
+                start_time=combine_aware(day, time(10, 0)),
+                end_time=combine_aware(day, time(10, 30)),
+                status='confirmed'
+            )
+            for actor in actors
+        ])
+        self.client.force_authenticate(user=self.user)
+
+    def test_notifications(self):
+        """Tests the notification list with its nested appointment."""
+        def create_rows(first, last):
+            Notification.objects.bulk_create([
+                Notification(
+                    user=self.user,
+                    title="Appointment confirmed",
+                    message="Your appointment was confirmed.",
+                    type='appointment_confirmed',
+                    appointment=self.appointments[index]
+                )
+                for index in range(first, last)
+            ])
+
+        self.assertListBudget(reverse('notification-list'), create_rows, 5)
+
+    def test_notifications_fast_list(self):
+        """Tests that the fast notification list matches the serializer output."""
+        Notification.objects.bulk_create([
+            Notification(
+                user=self.user,
+                title="Appointment confirmed",
+                message="Your appointment was confirmed.",
+                type='appointment_confirmed',
+                appointment=appointment
+            )
+            for appointment in self.appointments[:15]
+        ] + [
+            Notification(
+                user=self.user,
+                title="Welcome",
+                message="Welcome to the system.",
+                type='system'
+            )
+        ])
+
+        response, queries = self.assertFastListMatches(reverse('notification-list'))
+
+        self.assertEqual(len(response.json()['results']), 16)
+        # Page number pagination adds a COUNT query, conditional GET a validator query
+        self.assertLessEqual(queries, 5)
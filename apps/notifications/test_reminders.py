@@ -0,0 +1,246 @@
+"""
+Tests for the reminder scheduler.
+"""
+
+from datetime import time, timedelta
+from unittest.mock import patch
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from apps.companies.models import Company
+from apps.authentication.models import User
+from apps.appointments.bulk import update_appointment_statuses
+from apps.appointments.models import Service, Appointment
+from apps.appointments.occupancy import combine_aware
+from .models import Notification, NotificationConfig, ReminderSchedule
+from .reminders import (
+    REMINDER_CLAIM_TIMEOUT,
+    claim_due_reminders,
+    reminder_message,
+    schedule_upcoming_reminders,
+    send_reminders,
+)
+from .tasks import low_priority_send_appointment_reminders, low_priority_send_due_reminders
+
+
+class ReminderSchedulerTest(TestCase):
+    """Tests for scheduling, popping and sending appointment reminders."""
+
+    def setUp(self):
+        """Initial setup for tests."""
+        cache.clear()
+
+        self.company = Company.objects.create(
+            name="Test Barber Shop",
+            cnpj="12.345.678/0001-90"
+        )
+
+        self.actor = User.objects.create_user(
+            username="actor",
+            email="actor@example.com",
+            password="testpass123",
+            role="actor",
+            company=self.company
+        )
+
+        self.customer = User.objects.create_user(
+            username="customer",
+            email="customer@example.com",
+            password="testpass123",
+            role="user",
+            company=self.company
+        )
+
+        self.service = Service.objects.create(
+            name="Hair Cut",
+            duration_minutes=30,
+            base_price=25.00,
+            company=self.company,
+            actor=self.actor
+        )
+
+        self.start = (timezone.now() + timedelta(days=3)).replace(microsecond=0)
+
+    def _appointment(self, start, status='confirmed'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Appointment.objects.create(
+                client=self.customer,
+                actor=self.actor,
+                service=self.service,
+                start_time=start,
+                end_time=start + timedelta(minutes=30),
+                status=status
+            )
+
+    def _due_at(self, appointment):
+        return ReminderSchedule.objects.get(appointment=appointment).due_at
+
+    def test_booking_schedules_reminder(self):
+        """Tests that a new active appointment is due reminder_before_hours before it starts."""
+        appointment = self._appointment(self.start)
+        pending = self._appointment(self.start + timedelta(hours=2), status='pending')
+        self._appointment(self.start + timedelta(hours=4), status='cancelled')
+        # Booked inside the 24 hour lead time
+        before = timezone.now()
+        soon = self._appointment(before + timedelta(hours=1))
+        # Already started
+        self._appointment(before - timedelta(minutes=10))
+
+        self.assertEqual(self._due_at(appointment), self.start - timedelta(hours=24))
+        self.assertEqual(self._due_at(pending), self.start - timedelta(hours=22))
+        self.assertTrue(before <= self._due_at(soon) <= timezone.now())
+        self.assertEqual(ReminderSchedule.objects.count(), 3)
+
+    def test_reschedule_and_cancel(self):
+        """Tests that moving an appointment moves its reminder and cancelling drops it."""
+        appointment = self._appointment(self.start)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.start_time += timedelta(days=1)
+            appointment.end_time += timedelta(days=1)
+            appointment.save()
+        self.assertEqual(self._due_at(appointment), self.start)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.status = 'cancelled'
+            appointment.save()
+        self.assertFalse(ReminderSchedule.objects.filter(appointment=appointment).exists())
+
+    def test_bulk_status_update(self):
+        """Tests that bulk cancellations drop their reminders."""
+        appointments = [self._appointment(self.start + timedelta(hours=index)) for index in range(3)]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            update_appointment_statuses(appointments[:2], 'cancelled')
+
+        self.assertEqual(
+            list(ReminderSchedule.objects.values_list('appointment_id', flat=True)), [appointments[2].id]
+        )
+
+    def test_config_changes_reschedule(self):
+        """Tests that changing reminder settings moves or drops the user's reminders."""
+        appointment = self._appointment(self.start)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            config = NotificationConfig.objects.create(user=self.customer, reminder_before_hours=2)
+        self.assertEqual(self._due_at(appointment), self.start - timedelta(hours=2))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            config.whatsapp_reminders = False
+            config.save()
+        self.assertFalse(ReminderSchedule.objects.exists())
+
+    def test_backfill(self):
+        """Tests that the backfill schedules appointments created without signals."""
+        Appointment.objects.bulk_create([
+            Appointment(
+                client=self.customer,
+                actor=self.actor,
+                service=self.service,
+                start_time=self.start + timedelta(hours=index),
+                end_time=self.start + timedelta(hours=index, minutes=30),
+                status='confirmed'
+            )
+            for index in range(3)
+        ])
+
+        self.assertEqual(schedule_upcoming_reminders(), 3)
+        self.assertEqual(ReminderSchedule.objects.count(), 3)
+
+    def test_claim_due_reminders(self):
+        """Tests that only due reminders are claimed, and again only once their claim expires."""
+        due = self._appointment(self.start)
+        later = self._appointment(self.start + timedelta(hours=1))
+        now = self.start - timedelta(hours=24)
+
+        # One select and one update inside a savepoint
+        with self.assertNumQueries(4):
+            self.assertEqual(claim_due_reminders(now), [due.id])
+        self.assertEqual(claim_due_reminders(now), [])
+        self.assertEqual(claim_due_reminders(now + REMINDER_CLAIM_TIMEOUT), [due.id])
+        self.assertEqual(ReminderSchedule.objects.count(), 2)
+
+        send_reminders([due.id])
+        self.assertEqual(
+            list(ReminderSchedule.objects.values_list('appointment_id', flat=True)), [later.id]
+        )
+
+    def test_reschedule_releases_claim(self):
+        """Tests that a reschedule after the claim keeps the moved row."""
+        appointment = self._appointment(self.start)
+        claim_due_reminders(self.start)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.start_time += timedelta(days=1)
+            appointment.end_time += timedelta(days=1)
+            appointment.save()
+        send_reminders([appointment.id])
+
+        self.assertEqual(self._due_at(appointment), self.start)
+        self.assertIsNone(ReminderSchedule.objects.get(appointment=appointment).claimed_at)
+
+    def test_rescheduled_appointment_is_reminded_again(self):
+        """Tests that a reminder sent before a reschedule does not block the reminder of the new time."""
+        appointment = self._appointment(self.start)
+        self.assertEqual(claim_due_reminders(self.start - timedelta(hours=24)), [appointment.id])
+        self.assertEqual(len(send_reminders([appointment.id])), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.start_time += timedelta(days=7)
+            appointment.end_time += timedelta(days=7)
+            appointment.save()
+        self.assertEqual(self._due_at(appointment), self.start + timedelta(days=6))
+
+        self.assertEqual(claim_due_reminders(self.start + timedelta(days=6)), [appointment.id])
+        created = send_reminders([appointment.id])
+
+        self.assertEqual([notification.reminder_start_time for notification in created], [appointment.start_time])
+        self.assertEqual(Notification.objects.filter(appointment=appointment, type='reminder').count(), 2)
+        self.assertFalse(ReminderSchedule.objects.exists())
+
+    def test_beat_task_sends_chunks(self):
+        """Tests that the beat task queues due reminders in chunks once their claims commit."""
+        appointments = [self._appointment(self.start + timedelta(hours=index)) for index in range(3)]
+        ReminderSchedule.objects.update(due_at=timezone.now() - timedelta(minutes=1))
+
+        with patch('apps.notifications.tasks.REMINDER_CHUNK_SIZE', 2), \
+                patch.object(low_priority_send_appointment_reminders, 'delay') as delay:
+            with self.captureOnCommitCallbacks() as callbacks:
+                result = low_priority_send_due_reminders()
+            delay.assert_not_called()
+            for callback in callbacks:
+                callback()
+
+        self.assertEqual(result, "Queued 3 due reminders in 2 chunks")
+        self.assertEqual(
+            sorted(sum((call.args[0] for call in delay.call_args_list), [])),
+            [appointment.id for appointment in appointments]
+        )
+        # Rows stay claimed until their reminders are created
+        self.assertEqual(ReminderSchedule.objects.filter(claimed_at__isnull=False).count(), 3)
+
+    def test_send_reminders_skips_sent_and_inactive(self):
+        """Tests that sending a chunk is idempotent and skips inactive appointments."""
+        start = combine_aware(timezone.localdate() + timedelta(days=1), time(14, 30))
+        active = self._appointment(start)
+        cancelled = self._appointment(start + timedelta(hours=1), status='cancelled')
+
+        created = send_reminders([active.id, cancelled.id])
+        self.assertEqual(send_reminders([active.id, cancelled.id]), [])
+
+        self.assertEqual([notification.appointment_id for notification in created], [active.id])
+        self.assertEqual(created[0].message, "Reminder: You have an appointment tomorrow at 14:30.")
+        self.assertEqual(Notification.objects.filter(type='reminder').count(), 1)
+
+    def test_reminder_message_day(self):
+        """Tests the day label of the reminder text."""
+        today = timezone.localdate()
+
+        self.assertEqual(
+            reminder_message(combine_aware(today, time(9, 0)), today),
+            "Reminder: You have an appointment today at 09:00."
+        )
+        self.assertEqual(
+            reminder_message(combine_aware(today + timedelta(days=3), time(9, 0)), today),
+            f"Reminder: You have an appointment on {(today + timedelta(days=3)).strftime('%d/%m')} at 09:00."
+        )
@@ -9,14 +9,15 @@ from unittest.mock import patch, MagicMock
 from apps.companies.models import Company
 from apps.authentication.models import User
 from apps.appointments.models import Service, Appointment
-from .models import Notification, NotificationConfig
+from .models import Notification, ReminderSchedule
 from .tasks import (
     high_priority_send_appointment_notification,
     low_priority_send_appointment_reminder,
-    low_priority_process_daily_reminders,
+    low_priority_send_appointment_reminders,
+    low_priority_send_due_reminders,
     high_priority_send_whatsapp,
     low_priority_send_email,
-    low_priority_cleanup_old_notifications
+    low_priority_clean_old_notifications
 )
 
 
@@ -65,7 +66,7 @@ class NotificationTasksTest(TestCase):
     
     def test_send_appointment_notification_success(self):
         """Tests appointment notification sending with success."""
-        result = high_priority_send_appointment_notification.delay(
+        result = high_priority_send_appointment_notification(
             self.appointment.id, 'confirmed'
         )
         
@@ -84,7 +85,7 @@ class NotificationTasksTest(TestCase):
     
     def test_send_appointment_notification_not_found(self):
         """Tests notification sending for non-existent appointment."""
-        result = high_priority_send_appointment_notification.delay(999, 'confirmed')
+        result = high_priority_send_appointment_notification(999, 'confirmed')
         
         # Verifies no notifications were created
         notifications = Notification.objects.all()
@@ -92,7 +93,12 @@ class NotificationTasksTest(TestCase):
     
     def test_send_appointment_reminder_success(self):
         """Tests appointment reminder sending with success."""
-        result = low_priority_send_appointment_reminder.delay(self.appointment.id)
+        # Moves the appointment to tomorrow
+        self.appointment.start_time = timezone.now() + timedelta(days=1)
+        self.appointment.end_time = self.appointment.start_time + timedelta(minutes=30)
+        self.appointment.save()
+        
+        result = low_priority_send_appointment_reminder(self.appointment.id)
         
         # Verifies if reminder notification was created
         notifications = Notification.objects.filter(
@@ -109,7 +115,7 @@ class NotificationTasksTest(TestCase):
         self.appointment.status = 'cancelled'
         self.appointment.save()
         
-        result = low_priority_send_appointment_reminder.delay(self.appointment.id)
+        result = low_priority_send_appointment_reminder(self.appointment.id)
         
         # Verifies no notifications were created
         notifications = Notification.objects.filter(
@@ -119,25 +125,29 @@ class NotificationTasksTest(TestCase):
         
         self.assertEqual(notifications.count(), 0)
     
-    def test_process_daily_reminders(self):
-        """Tests daily reminders processing."""
-        # Creates appointment for tomorrow
-        tomorrow_appointment = Appointment.objects.create(
-            client=self.client,
-            actor=self.actor,
-            service=self.service,
-            start_time=timezone.now() + timedelta(days=1),
-            end_time=timezone.now() + timedelta(days=1, minutes=30),
-            status='confirmed'
-        )
-        
-        # Creates notification configuration
-        NotificationConfig.objects.create(
-            user=self.client,
-            whatsapp_reminders=True
-        )
-        
-        result = low_priority_process_daily_reminders.delay()
+    def test_send_due_reminders(self):
+        """Tests sending the reminders that became due."""
+        # Creates appointment in two days, scheduling its reminder
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment = Appointment.objects.create(
+                client=self.client,
+                actor=self.actor,
+                service=self.service,
+                start_time=timezone.now() + timedelta(days=2),
+                end_time=timezone.now() + timedelta(days=2, minutes=30),
+                status='confirmed'
+            )
+        
+        # Makes the reminder due
+        ReminderSchedule.objects.filter(appointment=appointment).update(
+            due_at=timezone.now() - timedelta(minutes=1)
+        )
+        
+        # Runs the queued chunk in place of the broker
+        with patch.object(
+            low_priority_send_appointment_reminders, 'delay', side_effect=low_priority_send_appointment_reminders
+        ), self.captureOnCommitCallbacks(execute=True):
+            result = low_priority_send_due_reminders()
         
         # Verifies if reminder was sent
         notifications = Notification.objects.filter(
@@ -146,6 +156,7 @@ class NotificationTasksTest(TestCase):
         )
         
         self.assertGreater(notifications.count(), 0)
+        self.assertFalse(ReminderSchedule.objects.filter(appointment=appointment).exists())
     
     @patch('apps.notifications.tasks.print')
     def test_send_whatsapp(self, mock_print):
@@ -153,7 +164,7 @@ class NotificationTasksTest(TestCase):
         phone = "11999999999"
         message = "Test message"
         
-        result = high_priority_send_whatsapp.delay(phone, message)
+        result = high_priority_send_whatsapp(phone, message)
         
         # Verifies if function was called
         mock_print.assert_called_with(f"Sending WhatsApp to {phone}: {message}")
@@ -165,7 +176,7 @@ class NotificationTasksTest(TestCase):
         subject = "Test"
         body = "Email body"
         
-        result = low_priority_send_email.delay(recipient, subject, body)
+        result = low_priority_send_email(recipient, subject, body)
         
         # Verifies if function was called
         mock_print.assert_called_with(f"Sending email to {recipient}: {subject}")
@@ -178,7 +189,10 @@ class NotificationTasksTest(TestCase):
             title="Old Notification",
             message="Old message",
             type="system",
-            read=True,
+            read=True
+        )
+        # sent_at is set on insert, so it is backdated afterwards
+        Notification.objects.filter(id=old_notification.id).update(
             sent_at=timezone.now() - timedelta(days=35)
         )
         
@@ -188,11 +202,10 @@ class NotificationTasksTest(TestCase):
             title="Recent Notification",
             message="Recent message",
             type="system",
-            read=False,
-            sent_at=timezone.now() - timedelta(days=5)
+            read=False
         )
         
-        result = low_priority_clean_old_notifications.delay()
+        result = low_priority_clean_old_notifications()
         
         # Verifies only old notification was removed
         self.assertFalse(Notification.objects.filter(id=old_notification.id).exists())
@@ -206,11 +219,13 @@ class NotificationTasksTest(TestCase):
             title="Old Unread Notification",
             message="Old unread message",
             type="system",
-            read=False,
+            read=False
+        )
+        Notification.objects.filter(id=old_unread_notification.id).update(
             sent_at=timezone.now() - timedelta(days=35)
         )
         
-        result = low_priority_cleanup_old_notifications.delay()
+        result = low_priority_clean_old_notifications()
         
         # Verifies that the notification was not removed
         self.assertTrue(Notification.objects.filter(id=old_unread_notification.id).exists())
@@ -6,7 +6,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     NotificationViewSet, NotificationConfigViewSet, 
-    NotificationTemplateViewSet
+    NotificationTemplateViewSet, UnreadNotificationsView, NotificationCounterView
 )
 
 router = DefaultRouter()
@@ -14,6 +14,9 @@ router.register(r'notifications', NotificationViewSet)
 router.register(r'configs', NotificationConfigViewSet)
 router.register(r'templates', NotificationTemplateViewSet)
 
+# Async views come first, so the router detail routes do not shadow them
 urlpatterns = [
+    path('notifications/unread/', UnreadNotificationsView.as_view(), name='notification-unread'),
+    path('notifications/counter/', NotificationCounterView.as_view(), name='notification-counter'),
     path('', include(router.urls)),
 ]
@@ -2,10 +2,20 @@
 Views for the notifications app.
 """
 
+from asgiref.sync import sync_to_async
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db.models import Count, Max
 from django.utils import timezone
+from secretariaVirtual.async_api import AsyncAPIView
+from secretariaVirtual.conditional import ConditionalGetMixin
+from secretariaVirtual.exports import StreamingExportMixin
+from apps.appointments.fastpath import (
+    ValuesListMixin, appointment_row, appointment_values, format_datetime, full_name
+)
+from .counters import adjust_unread_counts, aget_unread_count
+from .dispatch import PUSH_UPDATED, publish_notifications
 from .models import Notification, NotificationConfig, NotificationTemplate
 from .serializers import (
     NotificationSerializer, NotificationConfigSerializer,
@@ -13,16 +23,69 @@ from .serializers import (
 )
 
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(ConditionalGetMixin, ValuesListMixin, StreamingExportMixin, viewsets.ModelViewSet):
     """ViewSet for managing notifications."""
     
     queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    fast_values = (
+        'id', 'user', 'title', 'message', 'type', 'priority', 'read',
+        'appointment', 'sent_at', 'read_at', 'user__first_name', 'user__last_name'
+    ) + appointment_values('appointment__')
+    export_fields = (
+        ('id', 'id'),
+        ('type', 'type'),
+        ('priority', 'priority'),
+        ('title', 'title'),
+        ('message', 'message'),
+        ('read', 'read'),
+        ('appointment_id', 'appointment_id'),
+        ('sent_at', 'sent_at'),
+        ('read_at', 'read_at'),
+    )
+    export_date_field = 'sent_at'
+    export_ordering = ('sent_at', 'id')
+    export_filename = 'notifications'
+    
+    def fast_row(self, values):
+        """Builds a NotificationSerializer row for the fast list path."""
+        return {
+            'id': values['id'],
+            'user': values['user'],
+            'title': values['title'],
+            'message': values['message'],
+            'type': values['type'],
+            'priority': values['priority'],
+            'read': values['read'],
+            'appointment': values['appointment'],
+            'sent_at': format_datetime(values['sent_at']),
+            'read_at': format_datetime(values['read_at']),
+            'user_name': full_name(values['user__first_name'], values['user__last_name']),
+            'appointment_info': (
+                appointment_row(values, 'appointment__') if values['appointment'] else None
+            ),
+        }
+    
+    def get_validator_aggregates(self):
+        """Notifications change when read and show their user and appointment."""
+        return {
+            'rows': Count('pk'),
+            'last_id': Max('pk'),
+            'read_rows': Count('read_at'),
+            'read_at': Max('read_at'),
+            'user_updated_at': Max('user__updated_at'),
+            'appointment_updated_at': Max('appointment__updated_at'),
+            'appointment_client_updated_at': Max('appointment__client__updated_at'),
+            'appointment_actor_updated_at': Max('appointment__actor__updated_at'),
+            'appointment_service_updated_at': Max('appointment__service__updated_at'),
+        }
     
     def get_queryset(self):
         """Filters notifications based on logged user."""
-        return Notification.objects.filter(user=self.request.user)
+        return Notification.objects.select_related(
+            'user', 'appointment__client', 'appointment__actor', 'appointment__service'
+        ).filter(user=self.request.user)
     
     @action(detail=True, methods=['post'])
     def mark_as_read(self, request, pk=None):
@@ -34,21 +97,45 @@ class NotificationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def mark_all_as_read(self, request):
         """Marks all user notifications as read."""
-        notifications = self.get_queryset().filter(read=False)
-        notifications.update(read=True, read_at=timezone.now())
+        notifications = list(self.get_queryset().filter(read=False))
+        now = timezone.now()
+        # Rows marked as read concurrently are not updated, nor counted, twice
+        updated = Notification.objects.filter(
+            id__in=[notification.id for notification in notifications], read=False
+        ).update(read=True, read_at=now)
+        for notification in notifications:
+            notification.read = True
+            notification.read_at = now
+        # update() skips post_save, so the counter and push are updated here
+        adjust_unread_counts({request.user.id: -updated})
+        publish_notifications(notifications, PUSH_UPDATED)
         return Response({'status': 'All notifications have been marked as read'})
+
+
+class UnreadNotificationsView(AsyncAPIView):
+    """Returns unread notifications, served as an async view."""
     
-    @action(detail=False, methods=['get'])
-    def unread(self, request):
+    permission_classes = [permissions.IsAuthenticated]
+    
+    async def get(self, request):
         """Returns unread notifications."""
-        notifications = self.get_queryset().filter(read=False)
-        serializer = self.get_serializer(notifications, many=True)
-        return Response(serializer.data)
+        notifications = Notification.objects.select_related(
+            'user', 'appointment__client', 'appointment__actor', 'appointment__service'
+        ).filter(user=request.user, read=False)
+        notifications = [notification async for notification in notifications]
+        serializer = NotificationSerializer(notifications, many=True, context={'request': request})
+        # Serializers are synchronous and may touch the ORM, so they run in a thread
+        return Response(await sync_to_async(lambda: serializer.data)())
+
+
+class NotificationCounterView(AsyncAPIView):
+    """Returns the unread notifications counter, served as an async view."""
+    
+    permission_classes = [permissions.IsAuthenticated]
     
-    @action(detail=False, methods=['get'])
-    def counter(self, request):
-        """Returns unread notifications counter."""
-        count = self.get_queryset().filter(read=False).count()
+    async def get(self, request):
+        """Returns unread notifications counter, read from the cache."""
+        count = await aget_unread_count(request.user.id)
         return Response({'count': count})
 
 
@@ -61,7 +148,7 @@ class NotificationConfigViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Filters settings based on logged user."""
-        return NotificationConfig.objects.filter(user=self.request.user)
+        return NotificationConfig.objects.select_related('user').filter(user=self.request.user)
     
     def perform_create(self, serializer):
         """Sets the user for the configuration."""
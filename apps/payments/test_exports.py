@@ -0,0 +1,95 @@
+"""
+Tests for the streaming payment export.
+"""
+
+import csv
+import io
+from datetime import date, time, timedelta
+from django.test import override_settings
+from django.urls import include, path, reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from apps.companies.models import Company
+from apps.authentication.models import User
+from apps.appointments.models import Service, Appointment
+from apps.appointments.occupancy import combine_aware
+from .models import Payment
+
+
+# The payments API is not mounted in the project URLs yet
+urlpatterns = [
+    path('api/payments/', include('apps.payments.urls')),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class PaymentExportTest(APITestCase):
+    """Tests for the payment export action."""
+
+    def setUp(self):
+        """Initial setup for tests."""
+        self.company = Company.objects.create(
+            name="Test Barber Shop",
+            cnpj="12.345.678/0001-90"
+        )
+
+        self.admin = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="testpass123",
+            role="admin",
+            company=self.company
+        )
+
+        actor = User.objects.create_user(
+            username="actor",
+            email="actor@example.com",
+            password="testpass123",
+            role="actor",
+            company=self.company
+        )
+
+        service = Service.objects.create(
+            name="Haircut",
+            duration_minutes=30,
+            base_price=25.00,
+            company=self.company,
+            actor=actor
+        )
+
+        day = date(2030, 1, 7)
+        appointment = Appointment.objects.create(
+            client=self.admin,
+            actor=actor,
+            service=service,
+            start_time=combine_aware(day, time(10, 0)),
+            end_time=combine_aware(day, time(10, 30)),
+            status='completed'
+        )
+
+        self.payment = Payment.objects.create(
+            appointment=appointment,
+            value=25.00,
+            method="pix",
+            status="approved"
+        )
+
+        self.client.force_authenticate(user=self.admin)
+
+    def test_csv(self):
+        """Tests the CSV export of the company payments."""
+        response = self.client.get(reverse('payment-export'), {'export_format': 'csv'})
+
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['id'], str(self.payment.id))
+        self.assertEqual(rows[0]['value'], '25.00')
+        self.assertEqual(rows[0]['service_name'], "Haircut")
+
+    def test_date_range(self):
+        """Tests the created_at bounds."""
+        tomorrow = timezone.localdate() + timedelta(days=1)
+
+        response = self.client.get(reverse('payment-export'), {'start_date': tomorrow.isoformat()})
+
+        self.assertEqual(b''.join(response.streaming_content), b'')
@@ -0,0 +1,195 @@
+"""
+Query budget tests for the payments list endpoints.
+"""
+
+from datetime import date, time, timedelta
+from django.test import override_settings
+from django.urls import include, path, reverse
+from rest_framework.test import APITestCase
+from apps.companies.models import Company
+from apps.authentication.models import User
+from apps.appointments.models import Service, Appointment
+from apps.appointments.occupancy import combine_aware
+from apps.appointments.test_fastpath import FastListMixin
+from apps.appointments.test_query_budget import QueryBudgetMixin, ROW_COUNTS
+from .models import Coupon, CouponUsage, Payment, ActorCost, FinancialReport
+
+
+# The payments API is not mounted in the project URLs yet
+urlpatterns = [
+    path('api/payments/', include('apps.payments.urls')),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class PaymentsQueryBudgetTest(QueryBudgetMixin, FastListMixin, APITestCase):
+    """Query budgets for the payments app."""
+
+    def setUp(self):
+        """Initial setup for tests."""
+        self.company = Company.objects.create(
+            name="Test Barber Shop",
+            cnpj="12.345.678/0001-90"
+        )
+
+        self.admin = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="testpass123",
+            role="admin",
+            company=self.company
+        )
+
+        self.actors = User.objects.bulk_create([
+            User(
+                username=f"actor{index}",
+                email=f"actor{index}@example.com",
+                role="actor",
+                company=self.company
+            )
+            for index in range(max(ROW_COUNTS))
+        ])
+
+        self.service = Service.objects.create(
+            name="Haircut",
+            duration_minutes=30,
+            base_price=25.00,
+            company=self.company,
+            actor=self.actors[0]
+        )
+
+        day = date(2030, 1, 7)
+        self.appointments = Appointment.objects.bulk_create([
+            Appointment(
+                client=self.admin,
+                actor=actor,
+                service=self.service,
+                start_time=combine_aware(day, time(10, 0)),
+                end_time=combine_aware(day, time(10, 30)),
+                status='completed'
+            )
+            for actor in self.actors
+        ])
+        self.day = day
+        self.client.force_authenticate(user=self.admin)
+
+    def test_coupons(self):
+        """Tests the coupon list, including the services of each coupon."""
+        def create_rows(first, last):
+            coupons = Coupon.objects.bulk_create([
+                Coupon(
+                    code=f"CODE{index}",
+                    company=self.company,
+                    actor=self.actors[index],
+                    discount_type="percentage",
+                    discount_value=10.00,
+                    start_date=self.day,
+                    end_date=self.day + timedelta(days=30)
+                )
+                for index in range(first, last)
+            ])
+            Coupon.services.through.objects.bulk_create([
+                Coupon.services.through(coupon_id=coupon.id, service_id=self.service.id)
+                for coupon in coupons
+            ])
+
+        self.assertListBudget(reverse('coupon-list'), create_rows, 5)
+
+    def test_coupon_usages(self):
+        """Tests the coupon usage list."""
+        coupon = Coupon.objects.create(
+            code="DISCOUNT10",
+            company=self.company,
+            discount_type="percentage",
+            discount_value=10.00,
+            start_date=self.day,
+            end_date=self.day + timedelta(days=30)
+        )
+
+        def create_rows(first, last):
+            CouponUsage.objects.bulk_create([
+                CouponUsage(
+                    coupon=coupon,
+                    client=self.admin,
+                    appointment=self.appointments[index],
+                    discount_value_applied=2.50
+                )
+                for index in range(first, last)
+            ])
+
+        self.assertListBudget(reverse('coupon-usage-list'), create_rows, 4)
+
+    def test_coupon_usages_fast_list(self):
+        """Tests that the fast coupon usage list matches the serializer output."""
+        coupon = Coupon.objects.create(
+            code="DISCOUNT10",
+            company=self.company,
+            discount_type="percentage",
+            discount_value=10.00,
+            start_date=self.day,
+            end_date=self.day + timedelta(days=30)
+        )
+        CouponUsage.objects.bulk_create([
+            CouponUsage(
+                coupon=coupon,
+                client=self.admin,
+                appointment=appointment,
+                discount_value_applied=2.50
+            )
+            for appointment in self.appointments[:20]
+        ])
+
+        response, queries = self.assertFastListMatches(reverse('coupon-usage-list'))
+
+        self.assertEqual(len(response.json()['results']), 20)
+        # The page number pagination adds a COUNT query
+        self.assertLessEqual(queries, 4)
+
+    def test_payments(self):
+        """Tests the payment list with its nested appointment."""
+        def create_rows(first, last):
+            Payment.objects.bulk_create([
+                Payment(
+                    appointment=self.appointments[index],
+                    value=25.00,
+                    method="cash",
+                    status="approved"
+                )
+                for index in range(first, last)
+            ])
+
+        self.assertListBudget(reverse('payment-list'), create_rows, 4)
+
+    def test_actor_costs(self):
+        """Tests the actor cost list."""
+        def create_rows(first, last):
+            ActorCost.objects.bulk_create([
+                ActorCost(
+                    actor=self.actors[index],
+                    description="Product purchase",
+                    value=50.00,
+                    date=self.day,
+                    category="products",
+                    created_by=self.admin
+                )
+                for index in range(first, last)
+            ])
+
+        self.assertListBudget(reverse('actor-cost-list'), create_rows, 4)
+
+    def test_financial_reports(self):
+        """Tests the financial report list."""
+        def create_rows(first, last):
+            FinancialReport.objects.bulk_create([
+                FinancialReport(
+                    company=self.company,
+                    actor=self.actors[index],
+                    type="revenue",
+                    start_date=self.day,
+                    end_date=self.day + timedelta(days=30),
+                    data={}
+                )
+                for index in range(first, last)
+            ])
+
+        self.assertListBudget(reverse('financial-report-list'), create_rows, 4)
@@ -5,7 +5,11 @@ Views for the payments app.
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db.models import Prefetch
 from django.utils import timezone
+from apps.appointments.fastpath import ValuesListMixin, format_datetime, format_decimal, full_name
+from apps.appointments.models import Service
+from secretariaVirtual.exports import StreamingExportMixin
 from .models import Coupon, CouponUsage, Payment, ActorCost, FinancialReport
 from .serializers import (
     CouponSerializer, CouponUsageSerializer, PaymentSerializer,
@@ -23,15 +27,18 @@ class CouponViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Filter coupons based on logged user."""
         user = self.request.user
+        queryset = Coupon.objects.select_related('company', 'actor').prefetch_related(
+            Prefetch('services', queryset=Service.objects.select_related('actor'))
+        )
         
         if user.is_superadmin:
-            return Coupon.objects.all()
+            return queryset
         elif user.is_admin:
-            return Coupon.objects.filter(company=user.company)
+            return queryset.filter(company=user.company)
         elif user.is_manager:
-            return Coupon.objects.filter(company=user.company)
+            return queryset.filter(company=user.company)
         else:
-            return Coupon.objects.filter(company=user.company, is_active=True)
+            return queryset.filter(company=user.company, is_active=True)
     
     @action(detail=False, methods=['post'])
     def validate(self, request):
@@ -62,42 +69,79 @@ class CouponViewSet(viewsets.ModelViewSet):
             })
 
 
-class CouponUsageViewSet(viewsets.ModelViewSet):
+class CouponUsageViewSet(ValuesListMixin, viewsets.ModelViewSet):
     """ViewSet for managing coupon usage."""
     
     queryset = CouponUsage.objects.all()
     serializer_class = CouponUsageSerializer
     permission_classes = [permissions.IsAuthenticated]
+    fast_values = (
+        'id', 'coupon', 'client', 'appointment', 'discount_value_applied', 'used_at',
+        'coupon__code', 'client__first_name', 'client__last_name'
+    )
+    
+    def fast_row(self, values):
+        """Builds a CouponUsageSerializer row for the fast list path."""
+        return {
+            'id': values['id'],
+            'coupon': values['coupon'],
+            'client': values['client'],
+            'appointment': values['appointment'],
+            'discount_value_applied': format_decimal(values['discount_value_applied']),
+            'used_at': format_datetime(values['used_at']),
+            'coupon_code': values['coupon__code'],
+            'client_name': full_name(values['client__first_name'], values['client__last_name']),
+        }
     
     def get_queryset(self):
         """Filters coupon usage based on logged user."""
         user = self.request.user
+        queryset = CouponUsage.objects.select_related('coupon', 'client')
         
         if user.is_superadmin:
-            return CouponUsage.objects.all()
+            return queryset
         elif user.is_admin:
-            return CouponUsage.objects.filter(coupon__company=user.company)
+            return queryset.filter(coupon__company=user.company)
         else:
-            return CouponUsage.objects.filter(client=user)
+            return queryset.filter(client=user)
 
 
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(StreamingExportMixin, viewsets.ModelViewSet):
     """ViewSet for managing payments."""
     
     queryset = Payment.objects.all()
     serializer_class = PaymentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    export_fields = (
+        ('id', 'id'),
+        ('appointment_id', 'appointment_id'),
+        ('appointment_start_time', 'appointment__start_time'),
+        ('service_name', 'appointment__service__name'),
+        ('client_first_name', 'appointment__client__first_name'),
+        ('client_last_name', 'appointment__client__last_name'),
+        ('value', 'value'),
+        ('method', 'method'),
+        ('status', 'status'),
+        ('payment_date', 'payment_date'),
+        ('created_at', 'created_at'),
+    )
+    export_date_field = 'created_at'
+    export_ordering = ('created_at', 'id')
+    export_filename = 'payments'
     
     def get_queryset(self):
         """Filters payments based on logged user."""
         user = self.request.user
+        queryset = Payment.objects.select_related(
+            'appointment__client', 'appointment__actor', 'appointment__service'
+        )
         
         if user.is_superadmin:
-            return Payment.objects.all()
+            return queryset
         elif user.is_admin:
-            return Payment.objects.filter(appointment__service__company=user.company)
+            return queryset.filter(appointment__service__company=user.company)
         else:
-            return Payment.objects.filter(appointment__client=user)
+            return queryset.filter(appointment__client=user)
 
 
 class ActorCostViewSet(viewsets.ModelViewSet):
@@ -110,13 +154,14 @@ class ActorCostViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Filters costs based on logged user."""
         user = self.request.user
+        queryset = ActorCost.objects.select_related('actor', 'created_by')
         
         if user.is_superadmin:
-            return ActorCost.objects.all()
+            return queryset
         elif user.is_admin:
-            return ActorCost.objects.filter(actor__company=user.company)
+            return queryset.filter(actor__company=user.company)
         else:
-            return ActorCost.objects.filter(actor=user)
+            return queryset.filter(actor=user)
     
     def perform_create(self, serializer):
         """Sets the cost creator."""
@@ -133,15 +178,16 @@ class FinancialReportViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Filters reports based on logged user."""
         user = self.request.user
+        queryset = FinancialReport.objects.select_related('company', 'actor')
         
         if user.is_superadmin:
-            return FinancialReport.objects.all()
+            return queryset
         elif user.is_admin:
-            return FinancialReport.objects.filter(company=user.company)
+            return queryset.filter(company=user.company)
         elif user.is_manager:
-            return FinancialReport.objects.filter(company=user.company)
+            return queryset.filter(company=user.company)
         else:
-            return FinancialReport.objects.filter(actor=user)
+            return queryset.filter(actor=user)
     
     @action(detail=False, methods=['post'])
     def generate(self, request):
@@ -0,0 +1,111 @@
+"""
+Async API views for the REST API.
+
+DRF views are synchronous, so under ASGI every request holds a thread from
+the sync-to-async pool until it is done. AsyncAPIView keeps the DRF request,
+authentication, permission and response handling, but runs as a coroutine:
+token authentication and the handlers use the async ORM API, and the
+thread is only used while a query runs.
+"""
+
+from asgiref.sync import sync_to_async
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from rest_framework.request import ForcedAuthentication
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    """
+    APIView whose handlers are coroutines.
+
+    Subclasses define `async def get(self, request, ...)` and friends and
+    return a DRF Response.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.ainitial(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def ainitial(self, request, *args, **kwargs):
+        """Async version of APIView.initial."""
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+
+        neg = self.perform_content_negotiation(request)
+        request.accepted_renderer, request.accepted_media_type = neg
+
+        version, scheme = self.determine_version(request, *args, **kwargs)
+        request.version, request.versioning_scheme = version, scheme
+
+        await self.aperform_authentication(request)
+        self.check_permissions(request)
+        self.check_throttles(request)
+
+    async def aperform_authentication(self, request):
+        """
+        Authenticates the request like Request._authenticate.
+
+        Tokens are looked up with the async ORM. Other authenticators, such as
+        sessions, are synchronous and run through sync_to_async.
+        """
+        for authenticator in request.authenticators:
+            try:
+                if isinstance(authenticator, ForcedAuthentication):
+                    user_auth_tuple = authenticator.authenticate(request)
+                elif isinstance(authenticator, TokenAuthentication):
+                    user_auth_tuple = await self._authenticate_token(authenticator, request)
+                else:
+                    user_auth_tuple = await sync_to_async(authenticator.authenticate)(request)
+            except exceptions.APIException:
+                request._not_authenticated()
+                raise
+
+            if user_auth_tuple is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth_tuple
+                return
+
+        request._not_authenticated()
+
+    async def _authenticate_token(self, authenticator, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != authenticator.keyword.lower().encode():
+            return None
+        try:
+            key = auth[1].decode() if len(auth) == 2 else None
+        except UnicodeError:
+            key = None
+        if key is None:
+            # Malformed headers are rejected before any query is made
+            return authenticator.authenticate(request)
+
+        model = authenticator.get_model()
+        try:
+            token = await model.objects.select_related('user').aget(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return (token.user, token)
+
+    async def options(self, request, *args, **kwargs):
+        return super().options(request, *args, **kwargs)
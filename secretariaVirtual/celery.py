@@ -72,6 +72,18 @@ app.conf.beat_schedule = {
         'task': 'apps.google_calendar.tasks.sync_all_google_calendar_integrations',
         'schedule': crontab(minute='*/15'),  # Every 15 minutes
     },
+    
+    # Unread notification counters reconciliation (every 30 minutes)
+    'reconcile-unread-notification-counters': {
+        'task': 'apps.notifications.tasks.low_priority_reconcile_unread_counters',
+        'schedule': crontab(minute='*/30'),  # Every 30 minutes
+    },
+    
+    # Send the appointment reminders that became due (every minute)
+    'send-due-appointment-reminders': {
+        'task': 'apps.notifications.tasks.low_priority_send_due_reminders',
+        'schedule': crontab(),  # Every minute
+    },
 }
 
 @app.task(bind=True)
@@ -0,0 +1,123 @@
+"""
+Conditional GET support for the API viewsets.
+
+Dashboards poll the same list and detail endpoints over and over, and most
+polls return unchanged data. ConditionalGetMixin computes a cheap validator
+with a single query. When the client's If-None-Match or If-Modified-Since
+still matches it, the view answers 304 Not Modified and skips the list
+queries and serialization.
+"""
+
+import hashlib
+from datetime import datetime
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework.pagination import CursorPagination
+
+
+class ConditionalGetMixin:
+    """
+    Adds ETag and Last-Modified validators to list and retrieve.
+
+    Views describe the changes that must produce a new validator in
+    get_validator_aggregates(). The default is the row count, the highest
+    primary key and the latest updated_at of the scoped queryset. Views that
+    show fields of related rows, such as names, add those rows' updated_at.
+
+    Cursor-paginated lists are validated from the page window instead. Their
+    validator reads get_validator_fields() from the rows of the requested
+    page, with the same keyset query as the list, so deep pages do not pay
+    for an aggregate over the whole queryset.
+
+    Lists only get an ETag, because deleting a row does not move any
+    timestamp forward and If-Modified-Since would miss it. Detail responses
+    also get Last-Modified.
+    """
+
+    def get_validator_fields(self):
+        """Returns the per-row values that change whenever a row of a cursor-paginated list changes."""
+        return ('pk', 'updated_at')
+
+    def get_validator_aggregates(self):
+        """Returns the aggregates that change whenever the output changes."""
+        return {
+            'rows': Count('pk'),
+            'last_id': Max('pk'),
+            'updated_at': Max('updated_at'),
+        }
+
+    def get_validators(self, queryset):
+        """Returns the ETag, the Last-Modified timestamp and the row count for queryset."""
+        aggregates = queryset.order_by().aggregate(**self.get_validator_aggregates())
+        etag = self._etag(sorted(aggregates.items()))
+        timestamps = [value for value in aggregates.values() if isinstance(value, datetime)]
+        last_modified = int(max(timestamps).timestamp()) if timestamps else None
+        return etag, last_modified, aggregates['rows']
+
+    def get_window_etag(self, queryset):
+        """Returns the ETag of the page a cursor-paginated list would answer."""
+        paginator = self.paginator
+        ordering = paginator.get_ordering(self.request, queryset, self)
+        # The cursor position is read from the ordering fields of each row
+        fields = list(dict.fromkeys(
+            list(self.get_validator_fields()) + [field.lstrip('-') for field in ordering]
+        ))
+        rows = paginator.paginate_queryset(queryset.values(*fields), self.request, view=self)
+        return self._etag((
+            [tuple(row[field] for field in fields) for row in rows],
+            paginator.has_next,
+            paginator.has_previous,
+        ))
+
+    def _etag(self, validators):
+        request = self.request
+        # The same data renders differently per path, format and language
+        seed = repr((
+            request.user.pk,
+            request.get_full_path(),
+            request.META.get('HTTP_ACCEPT', ''),
+            getattr(request, 'LANGUAGE_CODE', ''),
+            validators,
+        ))
+        return hashlib.md5(seed.encode(), usedforsecurity=False).hexdigest()
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if isinstance(self.paginator, CursorPagination):
+            etag = self.get_window_etag(queryset)
+        else:
+            etag, _, _ = self.get_validators(queryset)
+        return self._conditional_response(request, etag, None, super().list, args, kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: kwargs[lookup_url_kwarg]}
+        )
+        etag, last_modified, rows = self.get_validators(queryset)
+        if not rows:
+            # Missing objects keep the regular 404 handling
+            return super().retrieve(request, *args, **kwargs)
+        return self._conditional_response(
+            request, etag, last_modified, super().retrieve, args, kwargs
+        )
+
+    def _conditional_response(self, request, etag, last_modified, handler, args, kwargs):
+        """Answers from the validators when they match, otherwise runs handler."""
+        # 304 Not Modified, or 412 when an If-Match precondition fails
+        conditional = get_conditional_response(
+            request._request, etag=quote_etag(etag), last_modified=last_modified
+        )
+        if conditional is not None:
+            conditional['ETag'] = quote_etag(etag)
+            return conditional
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response['ETag'] = quote_etag(etag)
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            # Clients must revalidate, and shared caches must not keep per-user data
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
@@ -0,0 +1,204 @@
+"""
+Request timing instrumentation for the secretariaVirtual project.
+
+Every API request records its SQL queries, SQL time, view time and render
+time. Render time covers response.render(), the encoding of the response
+body by the renderer, and is measured with a post-render callback. DRF
+evaluates serializer.data inside the view, so serializer work is part of the
+view time. The numbers are exposed as a Server-Timing header when
+REQUEST_TIMING_HEADERS is enabled, or when a superadmin sends the
+X-Request-Timing header. Requests slower than REQUEST_SLOW_THRESHOLD_MS are
+written to the slow request log together with their worst queries.
+
+The middleware works in both sync and async mode. The figures live in a
+context variable, which follows async views into the threads the async ORM
+runs its queries in.
+"""
+
+import heapq
+import json
+import logging
+import time
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+logger = logging.getLogger('secretariaVirtual.slow_requests')
+
+TIMING_REQUEST_HEADER = 'HTTP_X_REQUEST_TIMING'
+WORST_QUERIES_LOGGED = 5
+LOGGED_SQL_LENGTH = 500
+
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Timings collected while a single request is handled."""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.worst_queries = []
+
+    def record_query(self, sql, seconds):
+        self.queries += 1
+        self.sql_seconds += seconds
+        # Min-heap on duration, so the fastest of the kept queries is dropped
+        entry = (seconds, self.queries, sql)
+        if len(self.worst_queries) < WORST_QUERIES_LOGGED:
+            heapq.heappush(self.worst_queries, entry)
+        elif seconds > self.worst_queries[0][0]:
+            heapq.heapreplace(self.worst_queries, entry)
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper that times queries run while a request is measured."""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.record_query(sql, time.perf_counter() - started)
+
+
+def install_query_timer(connection, **kwargs):
+    """Adds record_query to a connection; safe to call more than once."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def _render_finished(request):
+    """Returns a post-render callback that marks when the response body was rendered."""
+    def callback(response):
+        request._timing_render_finished = time.perf_counter()
+    return callback
+
+
+class RequestTimingMiddleware:
+    """
+    Records per-request database and timing figures for the API.
+
+    Should be the first middleware, so the figures cover the whole stack.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.path_prefix = getattr(settings, 'REQUEST_TIMING_PATH_PREFIX', '/api/')
+        # Connections opened later, in any thread, get the timer as well
+        connection_created.connect(install_query_timer, dispatch_uid='request_timing_query_timer')
+        for connection in connections.all():
+            install_query_timer(connection)
+
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+            # Async hooks keep async requests from hopping to a thread
+            self.process_view = self._aprocess_view
+            self.process_template_response = self._aprocess_template_response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not request.path.startswith(self.path_prefix):
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, timings, started)
+
+    async def __acall__(self, request):
+        if not request.path.startswith(self.path_prefix):
+            return await self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, timings, started)
+
+    def _finish(self, request, response, timings, started):
+        """Adds the Server-Timing header and logs slow requests."""
+        total_seconds = time.perf_counter() - started
+
+        view_seconds = 0.0
+        view_started = getattr(request, '_timing_view_started', None)
+        if view_started is not None:
+            view_seconds = getattr(request, '_timing_view_finished', time.perf_counter()) - view_started
+
+        render_seconds = 0.0
+        render_finished = getattr(request, '_timing_render_finished', None)
+        if render_finished is not None:
+            render_seconds = render_finished - request._timing_view_finished
+
+        if self._show_headers(request):
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={timings.sql_seconds * 1000:.1f};desc="{timings.queries} queries"',
+                f'view;dur={view_seconds * 1000:.1f}',
+                f'render;dur={render_seconds * 1000:.1f}',
+                f'total;dur={total_seconds * 1000:.1f}',
+            ])
+
+        threshold = getattr(settings, 'REQUEST_SLOW_THRESHOLD_MS', 500)
+        if total_seconds * 1000 >= threshold:
+            self._log_slow_request(request, response, timings, view_seconds, render_seconds, total_seconds)
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._timing_view_started = time.perf_counter()
+        return None
+
+    def process_template_response(self, request, response):
+        request._timing_view_finished = time.perf_counter()
+        response.add_post_render_callback(_render_finished(request))
+        return response
+
+    # process_view and process_template_response are replaced by these on
+    # async instances, so they must not call them back
+    async def _aprocess_view(self, request, view_func, view_args, view_kwargs):
+        request._timing_view_started = time.perf_counter()
+        return None
+
+    async def _aprocess_template_response(self, request, response):
+        request._timing_view_finished = time.perf_counter()
+        response.add_post_render_callback(_render_finished(request))
+        return response
+
+    def _show_headers(self, request):
+        if getattr(settings, 'REQUEST_TIMING_HEADERS', False):
+            return True
+        # DRF copies the authenticated user back onto the Django request
+        user = getattr(request, 'user', None)
+        return TIMING_REQUEST_HEADER in request.META and getattr(user, 'is_superadmin', False)
+
+    def _log_slow_request(self, request, response, timings, view_seconds, render_seconds, total_seconds):
+        logger.warning(json.dumps({
+            'event': 'slow_request',
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total_seconds * 1000, 1),
+            'view_ms': round(view_seconds * 1000, 1),
+            'render_ms': round(render_seconds * 1000, 1),
+            'db_ms': round(timings.sql_seconds * 1000, 1),
+            'queries': timings.queries,
+            'worst_queries': [
+                {'ms': round(seconds * 1000, 1), 'sql': sql[:LOGGED_SQL_LENGTH]}
+                for seconds, _, sql in sorted(timings.worst_queries, reverse=True)
+            ],
+        }))
@@ -0,0 +1,32 @@
+"""
+orjson-based JSON parser for the REST API.
+"""
+
+import codecs
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+
+class ORJSONParser(JSONParser):
+    """
+    Parses JSON request bodies with orjson.
+
+    Like DRF's strict JSONParser, NaN and Infinity are rejected. orjson only
+    reads UTF-8, so bodies sent with another charset go through JSONParser.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            is_utf8 = codecs.lookup(encoding).name == 'utf-8'
+        except LookupError:
+            is_utf8 = False
+        if not is_utf8:
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
@@ -56,6 +56,7 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'secretariaVirtual.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
@@ -162,6 +163,15 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'secretariaVirtual.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'secretariaVirtual.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
 }
@@ -198,6 +208,17 @@ CELERY_TASK_SOFT_TIME_LIMIT = 180
 # Celery Beat (Scheduler)
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
 
+# Cache
+CACHES = {
+    'default': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.getenv('REDIS_CACHE_URL', 'redis://localhost:6379/1'),
+        'OPTIONS': {
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+        }
+    }
+}
+
 # Channels Configuration
 CHANNEL_LAYERS = {
     'default': {
@@ -239,9 +260,19 @@ LOGGING = {
             'level': 'INFO',
             'propagate': True,
         },
+        'secretariaVirtual.slow_requests': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
     },
 }
 
+# Request timing: Server-Timing headers for every API request (superadmins can
+# also ask for them with the X-Request-Timing header) and a slow request log
+REQUEST_TIMING_HEADERS = os.getenv('REQUEST_TIMING_HEADERS', 'False').lower() == 'true'
+REQUEST_SLOW_THRESHOLD_MS = int(os.getenv('REQUEST_SLOW_THRESHOLD_MS', '500'))
+
 # Google Calendar Integration Settings
 GOOGLE_OAUTH_CLIENT_ID = os.getenv('GOOGLE_OAUTH_CLIENT_ID', '')
 GOOGLE_OAUTH_CLIENT_SECRET = os.getenv('GOOGLE_OAUTH_CLIENT_SECRET', '')
@@ -252,6 +283,25 @@ GOOGLE_CALENDAR_AUTO_SYNC = os.getenv('GOOGLE_CALENDAR_AUTO_SYNC', 'True').lower
 GOOGLE_CALENDAR_SYNC_INTERVAL = int(os.getenv('GOOGLE_CALENDAR_SYNC_INTERVAL', '3600'))  # 1 hour in seconds
 GOOGLE_CALENDAR_CLEANUP_DAYS = int(os.getenv('GOOGLE_CALENDAR_CLEANUP_DAYS', '30'))  # 30 days
 
+# Scheduling settings
+APPOINTMENT_WORKING_HOURS = (
+    os.getenv('APPOINTMENT_WORKING_HOURS_START', '08:00'),
+    os.getenv('APPOINTMENT_WORKING_HOURS_END', '18:00'),
+)
+APPOINTMENT_SLOT_STEP_MINUTES = int(os.getenv('APPOINTMENT_SLOT_STEP_MINUTES', '30'))
+APPOINTMENT_SEARCH_RESOLUTION_MINUTES = int(os.getenv('APPOINTMENT_SEARCH_RESOLUTION_MINUTES', '5'))
+APPOINTMENT_OCCUPANCY_CACHE_TIMEOUT = int(os.getenv('APPOINTMENT_OCCUPANCY_CACHE_TIMEOUT', '86400'))  # 1 day
+APPOINTMENT_CATALOG_CACHE_TIMEOUT = int(os.getenv('APPOINTMENT_CATALOG_CACHE_TIMEOUT', '86400'))  # 1 day
+# Recurrences are expanded on the fly; enable to also store them as appointments
+APPOINTMENT_MATERIALIZE_RECURRENCES = os.getenv('APPOINTMENT_MATERIALIZE_RECURRENCES', 'False').lower() == 'true'
+# Generation shards spread the actors over the low queue workers, within these sizes
+APPOINTMENT_RECURRENCE_WORKERS = int(os.getenv('APPOINTMENT_RECURRENCE_WORKERS', '4'))  # Worker processes on the low queue
+APPOINTMENT_RECURRENCE_MIN_SHARD_SIZE = int(os.getenv('APPOINTMENT_RECURRENCE_MIN_SHARD_SIZE', '50'))  # Fewest actors per task
+APPOINTMENT_RECURRENCE_SHARD_SIZE = int(os.getenv('APPOINTMENT_RECURRENCE_SHARD_SIZE', '500'))  # Most actors per task
+
+# Real-time notifications
+NOTIFICATION_PUSH_WINDOW_MS = int(os.getenv('NOTIFICATION_PUSH_WINDOW_MS', '250'))  # Pushes coalesced into one WebSocket frame
+
 # Internationalization
 LANGUAGE_CODE = 'pt-br'
 TIME_ZONE = 'America/Sao_Paulo'
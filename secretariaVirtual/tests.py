@@ -0,0 +1,509 @@
+"""
+Tests for the request timing middleware, conditional GET support, the
+orjson renderer and parser, and the async views.
+"""
+
+import asyncio
+import io
+import json
+import time as time_module
+import uuid
+from datetime import date, datetime, time, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils.translation import gettext_lazy
+from rest_framework import serializers, status
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from apps.companies.models import Company
+from apps.authentication.models import User
+from apps.appointments.models import Service, Appointment
+from apps.appointments.occupancy import combine_aware
+from apps.notifications.models import Notification
+from apps.notifications.serializers import NotificationSerializer
+from .parsers import ORJSONParser
+from .renderers import ORJSONRenderer
+
+
+class RequestTimingMiddlewareTest(APITestCase):
+    """Tests for RequestTimingMiddleware."""
+
+    def setUp(self):
+        """Initial setup for tests."""
+        self.company = Company.objects.create(
+            name="Test Barber Shop",
+            cnpj="12.345.678/0001-90"
+        )
+
+        self.admin = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="testpass123",
+            role="admin",
+            company=self.company
+        )
+
+        self.superadmin = User.objects.create_user(
+            username="superadmin",
+            email="superadmin@example.com",
+            password="testpass123",
+            role="superadmin"
+        )
+
+        self.url = reverse('service-list')
+
+    @override_settings(REQUEST_TIMING_HEADERS=True)
+    def test_server_timing_header(self):
+        """Tests the header when the debug flag is on."""
+        self.client.force_authenticate(user=self.admin)
+
+        response = self.client.get(self.url)
+
+        metrics = dict(
+            part.strip().split(';', 1) for part in response['Server-Timing'].split(',')
+        )
+        self.assertEqual(set(metrics), {'db', 'view', 'render', 'total'})
+        self.assertRegex(metrics['db'], r'desc="[1-9]\d* queries"')
+
+    @override_settings(REQUEST_TIMING_HEADERS=True)
+    def test_render_metric_times_rendering(self):
+        """Tests that the render metric covers rendering the response body."""
+        self.client.force_authenticate(user=self.admin)
+        render = ORJSONRenderer.render
+
+        def slow_render(renderer, *args, **kwargs):
+            time_module.sleep(0.05)
+            return render(renderer, *args, **kwargs)
+
+        with patch.object(ORJSONRenderer, 'render', slow_render):
+            response = self.client.get(self.url)
+
+        metrics = dict(
+            part.strip().split(';', 1) for part in response['Server-Timing'].split(',')
+        )
+        self.assertGreaterEqual(float(metrics['render'].split('=')[1]), 50)
+        self.assertFalse(hasattr(serializers.BaseSerializer.data.fget, '_request_timing'))
+
+    def test_header_requires_superadmin(self):
+        """Tests that only superadmins can ask for the header."""
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(self.url, HTTP_X_REQUEST_TIMING='1')
+        self.assertFalse(response.has_header('Server-Timing'))
+
+        self.client.force_authenticate(user=self.superadmin)
+        response = self.client.get(self.url, HTTP_X_REQUEST_TIMING='1')
+        self.assertTrue(response.has_header('Server-Timing'))
+
+    @override_settings(REQUEST_SLOW_THRESHOLD_MS=0)
+    def test_slow_request_log(self):
+        """Tests the structured slow request record."""
+        self.client.force_authenticate(user=self.admin)
+
+        with self.assertLogs('secretariaVirtual.slow_requests', 'WARNING') as logs:
+            self.client.get(self.url)
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['path'], self.url)
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['queries'], 0)
+        self.assertTrue(record['worst_queries'])
+        self.assertLessEqual(len(record['worst_queries']), 5)
+
+    @override_settings(REQUEST_TIMING_HEADERS=True, REQUEST_SLOW_THRESHOLD_MS=0)
+    def test_ignores_non_api_paths(self):
+        """Tests that only API requests are instrumented."""
+        with self.assertNoLogs('secretariaVirtual.slow_requests', 'WARNING'):
+            response = self.client.get('/admin/login/')
+
+        self.assertFalse(response.has_header('Server-Timing'))
+
+
+class ConditionalGetTest(APITestCase):
+    """Tests for ConditionalGetMixin."""
+
+    def setUp(self):
+        """Initial setup for tests."""
+        self.company = Company.objects.create(
+            name="Test Barber Shop",
+            cnpj="12.345.678/0001-90"
+        )
+
+        self.admin = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="testpass123",
+            role="admin",
+            company=self.company
+        )
+
+        self.actor = User.objects.create_user(
+            username="actor",
+            email="actor@example.com",
+            password="testpass123",
+            role="actor",
+            company=self.company
+        )
+
+        self.service = Service.objects.create(
+            name="Hair Cut",
+            duration_minutes=30,
+            base_price=25.00,
+            company=self.company,
+            actor=self.actor
+        )
+
+        day = date(2030, 1, 7)
+        self.appointment = Appointment.objects.create(
+            client=self.admin,
+            actor=self.actor,
+            service=self.service,
+            start_time=combine_aware(day, time(10, 0)),
+            end_time=combine_aware(day, time(10, 30)),
+            status='pending'
+        )
+
+        self.client.force_authenticate(user=self.admin)
+
+    def assertRevalidates(self, url):
+        """Polls url with its ETag and returns the first response."""
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('private', response['Cache-Control'])
+
+        poll = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(poll.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(poll.content, b'')
+        self.assertEqual(poll['ETag'], response['ETag'])
+        return response
+
+    def test_appointment_list(self):
+        """Tests that changing, adding or deleting appointments changes the ETag."""
+        url = reverse('appointment-list')
+        etag = self.assertRevalidates(url)['ETag']
+
+        self.appointment.status = 'confirmed'
+        self.appointment.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+        etag = response['ETag']
+        self.appointment.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_related_names_change_the_etag(self):
+        """Tests that renaming the actor shown in the rows changes the list and detail ETags."""
+        list_url = reverse('appointment-list')
+        detail_url = reverse('appointment-detail', args=[self.appointment.id])
+        list_etag = self.client.get(list_url)['ETag']
+        detail_etag = self.client.get(detail_url)['ETag']
+
+        self.actor.first_name = "Beatriz"
+        self.actor.save()
+
+        self.assertEqual(self.client.get(list_url, HTTP_IF_NONE_MATCH=list_etag).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag).status_code, status.HTTP_200_OK)
+
+    def test_cursor_list_validates_page_window(self):
+        """Tests that cursor-paginated lists are validated without a COUNT, per page."""
+        for day in range(1, 4):
+            Appointment.objects.create(
+                client=self.admin,
+                actor=self.actor,
+                service=self.service,
+                start_time=combine_aware(date(2030, 1, 7 + day), time(10, 0)),
+                end_time=combine_aware(date(2030, 1, 7 + day), time(10, 30)),
+                status='pending'
+            )
+        url = reverse('appointment-list')
+        first = self.client.get(url, {'page_size': 2})
+        next_url = first.data['next']
+        second = self.assertRevalidates(next_url)
+
+        with CaptureQueriesContext(connection) as queries:
+            poll = self.client.get(next_url, HTTP_IF_NONE_MATCH=second['ETag'])
+        self.assertEqual(poll.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertFalse(any('COUNT(' in query['sql'].upper() for query in queries.captured_queries))
+
+        # Editing a row of the first page leaves the second page valid
+        first_row = Appointment.objects.get(id=first.data['results'][0]['id'])
+        first_row.notes = "Moved"
+        first_row.save()
+        poll = self.client.get(next_url, HTTP_IF_NONE_MATCH=second['ETag'])
+        self.assertEqual(poll.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.appointment.notes = "Changed"
+        self.appointment.save()
+        poll = self.client.get(next_url, HTTP_IF_NONE_MATCH=second['ETag'])
+        self.assertEqual(poll.status_code, status.HTTP_200_OK)
+
+    def test_query_string_is_part_of_the_etag(self):
+        """Tests that other filters or pages do not share a validator."""
+        url = reverse('appointment-list')
+        etag = self.client.get(url)['ETag']
+
+        response = self.client.get(url, {'page_size': 5}, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_appointment_detail_last_modified(self):
+        """Tests If-Modified-Since on a detail endpoint."""
+        url = reverse('appointment-detail', args=[self.appointment.id])
+        response = self.assertRevalidates(url)
+
+        poll = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+
+        self.assertEqual(poll.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_has_no_last_modified(self):
+        """Tests that lists, whose deletions move no timestamp, only use ETags."""
+        response = self.client.get(reverse('appointment-list'))
+
+        self.assertFalse(response.has_header('Last-Modified'))
+
+    def test_missing_detail(self):
+        """Tests that unknown objects still answer 404."""
+        response = self.client.get(reverse('appointment-detail', args=[0]))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_service_list(self):
+        """Tests that editing a service changes the ETag."""
+        url = reverse('service-list')
+        etag = self.assertRevalidates(url)['ETag']
+
+        self.service.base_price = 30
+        self.service.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_notification_list(self):
+        """Tests that reading a notification changes the ETag."""
+        notification = Notification.objects.create(
+            user=self.admin,
+            title="Appointment confirmed",
+            message="Your appointment was confirmed.",
+            type='appointment_confirmed',
+            appointment=self.appointment
+        )
+        url = reverse('notification-list')
+        etag = self.assertRevalidates(url)['ETag']
+
+        notification.mark_as_read()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_company_totals(self):
+        """Tests that a new company user changes the company ETag."""
+        url = reverse('company-detail', args=[self.company.id])
+        etag = self.assertRevalidates(url)['ETag']
+
+        User.objects.create_user(
+            username="customer",
+            email="customer@example.com",
+            password="testpass123",
+            role="user",
+            company=self.company
+        )
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_users'], 3)
+
+
+class ORJSONRendererTest(APITestCase):
+    """Tests that ORJSONRenderer and ORJSONParser behave like the DRF defaults."""
+
+    def test_matches_drf_renderer(self):
+        """Tests the types the DRF encoder handles."""
+        data = {
+            'utc': datetime(2030, 1, 7, 10, 0, tzinfo=dt_timezone.utc),
+            'local': datetime(2030, 1, 7, 10, 0, 30, 500, tzinfo=ZoneInfo('America/Sao_Paulo')),
+            'naive': datetime(2030, 1, 7, 10, 0),
+            'date': date(2030, 1, 7),
+            'time': time(10, 30),
+            'duration': timedelta(minutes=90),
+            'price': Decimal('25.50'),
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'label': gettext_lazy('Pending'),
+            'separator': 'line\u2028break',
+            'nested': [{'value': None, 'flag': True, 'count': 3, 'ratio': 0.5}],
+            7: 'integer key',
+        }
+
+        rendered = ORJSONRenderer().render(data)
+
+        self.assertEqual(json.loads(rendered), json.loads(JSONRenderer().render(data)))
+        self.assertIn(b'"2030-01-07T10:00:00Z"', rendered)
+        self.assertIn(b'\\u2028', rendered)
+
+    def test_indent(self):
+        """Tests that an indent requested through the media type is honoured."""
+        rendered = ORJSONRenderer().render({'a': 1}, 'application/json; indent=4')
+
+        self.assertEqual(rendered, b'{\n  "a": 1\n}')
+
+    def test_none(self):
+        """Tests that no data renders an empty body."""
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+    def test_api_uses_renderer(self):
+        """Tests that the project default renders the API."""
+        company = Company.objects.create(name="Test Barber Shop")
+        admin = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="testpass123",
+            role="admin",
+            company=company
+        )
+        self.client.force_authenticate(user=admin)
+
+        response = self.client.get(reverse('service-list'))
+
+        self.assertIsInstance(response.accepted_renderer, ORJSONRenderer)
+
+    def test_parser(self):
+        """Tests parsing and the strict JSON errors."""
+        body = '{"name": "Corte", "price": 25.5, "tags": ["a", null]}'.encode()
+
+        self.assertEqual(
+            ORJSONParser().parse(io.BytesIO(body)),
+            JSONParser().parse(io.BytesIO(body))
+        )
+        for invalid in (b'{"a": ', b'{"a": NaN}', b''):
+            with self.assertRaises(ParseError):
+                ORJSONParser().parse(io.BytesIO(invalid))
+
+    def test_parser_decodes_request_charset(self):
+        """Tests that bodies in a charset other than UTF-8 are decoded with it."""
+        body = '{"name": "Coloração"}'.encode('latin-1')
+
+        self.assertEqual(
+            ORJSONParser().parse(io.BytesIO(body), parser_context={'encoding': 'latin-1'}),
+            {'name': 'Coloração'}
+        )
+        self.assertEqual(
+            ORJSONParser().parse(io.BytesIO('{"name": "Coloração"}'.encode()), parser_context={'encoding': 'UTF8'}),
+            {'name': 'Coloração'}
+        )
+
+
+class AsyncViewsTest(APITestCase):
+    """Tests for the endpoints served by AsyncAPIView."""
+
+    def setUp(self):
+        """Initial setup for tests."""
+        cache.clear()
+
+        self.company = Company.objects.create(
+            name="Test Barber Shop",
+            cnpj="12.345.678/0001-90"
+        )
+        self.other_company = Company.objects.create(
+            name="Other Shop",
+            cnpj="98.765.432/0001-10"
+        )
+
+        self.admin = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="testpass123",
+            role="admin",
+            company=self.company
+        )
+
+        for index in range(3):
+            Notification.objects.create(
+                user=self.admin,
+                type='system',
+                title=f"Notice {index}",
+                message="Message",
+                read=index == 0
+            )
+
+    def test_views_are_coroutines(self):
+        """Tests that the URLs resolve to async views."""
+        urls = (
+            reverse('notification-unread'),
+            reverse('notification-counter'),
+            reverse('appointment-availability'),
+            reverse('company-statistics', args=[self.company.id]),
+        )
+        for url in urls:
+            self.assertTrue(asyncio.iscoroutinefunction(resolve(url).func), url)
+
+    def test_unread_and_counter(self):
+        """Tests the unread notification endpoints."""
+        self.client.force_authenticate(user=self.admin)
+
+        response = self.client.get(reverse('notification-unread'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(row['title'] for row in response.data), ['Notice 1', 'Notice 2'])
+
+        response = self.client.get(reverse('notification-counter'))
+        self.assertEqual(response.data, {'count': 2})
+
+    def test_unread_serializes_outside_the_event_loop(self):
+        """Tests that the unread view runs its serializer in a thread, not on the event loop."""
+        self.client.force_authenticate(user=self.admin)
+        to_representation = NotificationSerializer.to_representation
+        loops = []
+
+        def record_loop(serializer, instance):
+            try:
+                loops.append(asyncio.get_running_loop())
+            except RuntimeError:
+                loops.append(None)
+            return to_representation(serializer, instance)
+
+        with patch.object(NotificationSerializer, 'to_representation', record_loop):
+            self.client.get(reverse('notification-unread'))
+
+        self.assertEqual(loops, [None, None])
+
+    def test_company_statistics(self):
+        """Tests the statistics endpoint and its company scoping."""
+        self.client.force_authenticate(user=self.admin)
+
+        response = self.client.get(reverse('company-statistics', args=[self.company.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_users'], 1)
+
+        response = self.client.get(reverse('company-statistics', args=[self.other_company.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_session_authentication(self):
+        """Tests that synchronous authenticators still work."""
+        self.client.login(username="admin", password="testpass123")
+
+        response = self.client.get(reverse('notification-counter'))
+
+        self.assertEqual(response.data, {'count': 2})
+
+    def test_requires_authentication(self):
+        """Tests that anonymous requests are rejected."""
+        response = self.client.get(reverse('notification-counter'))
+
+        self.assertIn(response.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+
+    @override_settings(REQUEST_TIMING_HEADERS=True)
+    def test_server_timing_counts_async_queries(self):
+        """Tests that queries made by async views are timed."""
+        self.client.force_authenticate(user=self.admin)
+
+        response = self.client.get(reverse('notification-counter'))
+
+        self.assertRegex(response['Server-Timing'], r'desc="[1-9]\d* queries"')